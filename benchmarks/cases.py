@@ -0,0 +1,171 @@
+""" Benchmarked strategy code paths, each run for every size of its size parameter
+
+    A case is a function which sets up the workers in an :class:`~benchmarks.environment.Environment` and returns
+    the function to time, or a (prepare, run) tuple when some untimed preparation is needed before every run.
+"""
+import subprocess
+import sys
+from collections import namedtuple
+
+from benchmarks.environment import MARKET
+from dexbot.strategies.external_feeds.process_pair import normalize_pair
+
+# Center price of the benchmarked market, BTS per USD
+CENTER_PRICE = 20
+
+# USD in every order of the rest of the order book
+BOOK_ORDER_AMOUNT = 10
+
+Case = namedtuple('Case', 'name size setup')
+
+CASES = []
+
+
+def case(**sizes):
+    """ Register a case with its size parameter, e.g. ``@case(width=[10, 40])``
+    """
+    (parameter, values), = sizes.items()
+
+    def register(setup):
+        for value in values:
+            CASES.append(Case('{}[{}={}]'.format(setup.__name__, parameter, value), value, setup))
+        return setup
+    return register
+
+
+def staggered_worker(env, width):
+    """ Create a staggered orders worker with a ladder of about ``width`` orders and place all of them
+    """
+    env.place_book(CENTER_PRICE, 5, amount=BOOK_ORDER_AMOUNT)
+    env.create_account('staggered', {'BTS': 10 ** 12, 'USD': 10 ** 8})
+    # Orders are 1% apart, half of the ladder on each side of the center price
+    half_width = width / 2
+    infrastructure = env.create_workers({'staggered': {
+        'account': 'staggered', 'market': MARKET, 'module': 'dexbot.strategies.staggered_orders',
+        'mode': 'neutral', 'spread': 2, 'increment': 1, 'center_price_dynamic': False, 'center_price': CENTER_PRICE,
+        'lower_bound': CENTER_PRICE / 1.01 ** half_width, 'upper_bound': CENTER_PRICE * 1.01 ** half_width,
+        'instant_fill': True, 'operational_depth': int(half_width) + 1, 'fee_asset': 'BTS'}})
+    worker = infrastructure.workers['staggered']
+
+    # Bootstrap places an order per side on every maintenance, the worker checks less often once the balances
+    # stop changing
+    for _ in range(width * 2):
+        env.clock.advance(worker.max_check_interval)
+        worker.maintain_strategy()
+        if worker.current_check_interval == worker.max_check_interval:
+            break
+    return worker
+
+
+def relative_worker(env, name, depth):
+    env.create_account(name, {'BTS': 10 ** 12, 'USD': 10 ** 8})
+    return {
+        'account': name, 'market': MARKET, 'module': 'dexbot.strategies.relative_orders', 'amount': 5,
+        'center_price_dynamic': True, 'center_price_depth': depth * BOOK_ORDER_AMOUNT, 'spread': 2,
+        'reset_on_price_change': True, 'price_change_threshold': 10, 'fee_asset': 'BTS'}
+
+
+@case(width=[10, 40, 160])
+def staggered_maintain_strategy(env, width):
+    worker = staggered_worker(env, width)
+
+    def run():
+        env.clock.advance(worker.max_check_interval)
+        worker.maintain_strategy()
+    return run
+
+
+@case(width=[10, 40, 160])
+def staggered_refresh_orders(env, width):
+    worker = staggered_worker(env, width)
+    return worker.refresh_orders
+
+
+@case(width=[10, 40, 160])
+def staggered_allocate_asset(env, width):
+    worker = staggered_worker(env, width)
+    # New funds make allocate_asset increase the sizes of the whole ladder
+    env.deposit('staggered', 'BTS', 10 ** 11)
+
+    def prepare():
+        worker.refresh_orders()
+        worker.refresh_balances(use_cached_orders=True)
+        worker.bitshares.bundle = True
+
+    def run():
+        worker.allocate_asset('base', worker.base_balance)
+        # Keep the ladder as it is for the next run
+        worker.bitshares.txbuffer.clear()
+        worker.bitshares.bundle = False
+    return prepare, run
+
+
+@case(depth=[5, 20, 50])
+def relative_check_orders(env, depth):
+    env.place_book(CENTER_PRICE, depth, amount=BOOK_ORDER_AMOUNT)
+    infrastructure = env.create_workers({'relative': relative_worker(env, 'relative', depth)})
+    worker = infrastructure.workers['relative']
+    worker.check_orders()
+
+    def run():
+        env.clock.advance(worker.min_check_interval)
+        worker.check_orders()
+    return run
+
+
+@case(depth=[5, 20, 50])
+def relative_update_orders(env, depth):
+    env.place_book(CENTER_PRICE, depth, amount=BOOK_ORDER_AMOUNT)
+    infrastructure = env.create_workers({'relative': relative_worker(env, 'relative', depth)})
+    return infrastructure.workers['relative'].update_orders
+
+
+@case(workers=[1, 4, 16])
+def relative_on_market(env, workers):
+    """ Dispatch of a market notification to all the workers of the market
+    """
+    env.place_book(CENTER_PRICE, 10, amount=BOOK_ORDER_AMOUNT)
+    configs = {'relative-{}'.format(number): relative_worker(env, 'relative-{}'.format(number), 10)
+               for number in range(workers)}
+    infrastructure = env.create_workers(configs)
+    for worker in infrastructure.workers.values():
+        worker.check_orders()
+    order = next(iter(infrastructure.workers.values())).get_market_orders(depth=1)[0]
+
+    def run():
+        env.clock.advance(60)
+        infrastructure.on_market(order)
+    return run
+
+
+@case(depth=[5, 20, 50])
+def base_market_center_price(env, depth):
+    env.place_book(CENTER_PRICE, depth, amount=BOOK_ORDER_AMOUNT)
+    infrastructure = env.create_workers({'relative': relative_worker(env, 'relative', depth)})
+    worker = infrastructure.workers['relative']
+    worker.fetch_depth = depth
+    return lambda: worker.get_market_center_price(quote_amount=depth * BOOK_ORDER_AMOUNT)
+
+
+@case(depth=[5, 20, 50])
+def base_market_spread(env, depth):
+    env.place_book(CENTER_PRICE, depth, amount=BOOK_ORDER_AMOUNT)
+    infrastructure = env.create_workers({'relative': relative_worker(env, 'relative', depth)})
+    worker = infrastructure.workers['relative']
+    worker.fetch_depth = depth
+    return lambda: worker.get_market_spread(quote_amount=depth * BOOK_ORDER_AMOUNT)
+
+
+@case(symbols=[4, 64])
+def external_normalize_pair(env, symbols):
+    """ Mapping of the BitShares markets to the symbols of the external price sources
+    """
+    markets = ['BRIDGE.ASSET{}/bitUSD'.format(number) for number in range(symbols)]
+    return lambda: [normalize_pair(market) for market in markets]
+
+
+@case(commands=[1])
+def cli_import(env, commands):
+    """ Import of the command line in a fresh interpreter, what every short-lived dexbot command pays at least
+    """
+    return lambda: [subprocess.check_call([sys.executable, '-c', 'import dexbot.cli']) for _ in range(commands)]
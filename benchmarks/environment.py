@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+
+from bitshares import BitShares
+from bitshares.blockchainobject import BlockchainObject
+from bitshares.instance import set_shared_bitshares_instance
+from bitsharesbase.account import PrivateKey
+from bitsharesbase.operationids import operations
+
+from dexbot import storage
+from dexbot.backtest import UnsignedTransactionBuilder
+from dexbot.clock import SimulatedClock, set_clock
+from dexbot.fake_node import CORE_SYMBOL, OPERATION_FEE, FakeChain, FakeNode
+from dexbot.worker import WorkerInfrastructure
+
+# Market of the benchmarked workers
+MARKET = 'USD/BTS'
+QUOTE_PRECISION = 4
+
+# Account which holds the rest of the order book
+MARKET_ACCOUNT = 'bench-market'
+
+# Starting time of the simulated clock
+START_TIME = 1546300800
+
+
+class Environment:
+    """ Fake chain, node, clock and storage the benchmarked workers run on, nothing leaves the process
+
+        Use as a context manager, the process wide clock, storage and shared BitShares instance are restored on exit.
+    """
+
+    def __init__(self):
+        self.clock = None
+        self.chain = None
+        self.node = None
+        self.bitshares = None
+        self.directory = None
+        self.old_clock = None
+        self.old_db_worker = None
+        self.key = PrivateKey()
+
+    def __enter__(self):
+        self.clock = SimulatedClock(START_TIME)
+        self.old_clock = set_clock(self.clock)
+        self.directory = tempfile.mkdtemp(prefix='dexbot-benchmark-')
+        self.old_db_worker = storage.set_db_worker(
+            storage.DatabaseWorker(os.path.join(self.directory, 'benchmark.sqlite')))
+        BlockchainObject.clear_cache()
+
+        self.chain = FakeChain(clock=self.clock)
+        self.chain.create_asset('USD', QUOTE_PRECISION)
+        self.create_account(MARKET_ACCOUNT, {CORE_SYMBOL: 10 ** 15, 'USD': 10 ** 15})
+        self.node = FakeNode(self.chain)
+        self.bitshares = BitShares(node=self.node.url, keys=[str(self.key)])
+        self.bitshares._txbuffers[0] = UnsignedTransactionBuilder(bitshares_instance=self.bitshares)
+        set_shared_bitshares_instance(self.bitshares)
+        return self
+
+    def __exit__(self, *args):
+        self.node.close()
+        storage.set_db_worker(self.old_db_worker).close()
+        set_clock(self.old_clock)
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def create_account(self, name, balances):
+        """ Create an account with the key of the environment
+
+            :param str name: Account name
+            :param dict balances: {symbol: amount in satoshis}
+        """
+        return self.chain.create_account(name, str(self.key.pubkey), balances)
+
+    def place_book(self, center_price, depth, step=0.005, amount=10):
+        """ Fill the order book of the market around a price
+
+            :param float center_price: Price in BTS per USD
+            :param int depth: Number of orders on each side
+            :param float step: Relative distance between the orders
+            :param float amount: USD amount of each order
+        """
+        for level in range(1, depth + 1):
+            self.place_order('buy', center_price * (1 - step * level), amount)
+            self.place_order('sell', center_price * (1 + step * level), amount)
+
+    def place_order(self, side, price, amount):
+        usd = {'amount': int(amount * 10 ** QUOTE_PRECISION), 'asset_id': self.chain.resolve_asset('USD')}
+        bts = {'amount': int(amount * price * 10 ** 5), 'asset_id': self.chain.resolve_asset(CORE_SYMBOL)}
+        sell, receive = (bts, usd) if side == 'buy' else (usd, bts)
+        self.node.call(self.chain.push_transaction, {'operations': [[operations['limit_order_create'], {
+            'fee': {'amount': OPERATION_FEE, 'asset_id': '1.3.0'},
+            'seller': self.chain.resolve_account(MARKET_ACCOUNT),
+            'amount_to_sell': sell,
+            'min_to_receive': receive,
+            'expiration': None,
+            'fill_or_kill': False,
+            'extensions': [],
+        }]]})
+
+    def deposit(self, account, symbol, amount):
+        self.node.call(self.chain.deposit, self.chain.resolve_account(account), self.chain.resolve_asset(symbol),
+                       amount)
+
+    def create_workers(self, workers):
+        """ Initialize workers without listening to notifications
+
+            :param dict workers: Worker configs by worker name
+            :return WorkerInfrastructure: Infrastructure holding the workers
+        """
+        config = {'workers': workers}
+        infrastructure = WorkerInfrastructure(config, bitshares_instance=self.bitshares)
+        infrastructure.init_services()
+        infrastructure.init_workers(infrastructure.config)
+        missing = set(workers) - set(infrastructure.workers)
+        if missing:
+            raise RuntimeError('Workers {} could not be initialized'.format(', '.join(sorted(missing))))
+        return infrastructure
@@ -0,0 +1,128 @@
+import datetime
+import fnmatch
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+
+import click
+
+from benchmarks.cases import CASES
+from benchmarks.environment import Environment
+from dexbot import VERSION
+
+log = logging.getLogger(__name__)
+
+# Timed runs of every case
+ROUNDS = 20
+
+# Relative slowdown of the median against the baseline which counts as a regression
+TOLERANCE = 0.25
+
+
+def run_case(case, rounds=ROUNDS):
+    """ Time a case in a fresh environment
+
+        :param benchmarks.cases.Case case: Case to run
+        :param int rounds: Timed runs, after an untimed warm-up run
+        :return dict: Seconds per run, min, median and max
+    """
+    with Environment() as env:
+        benchmark = case.setup(env, case.size)
+        prepare, run = benchmark if isinstance(benchmark, tuple) else (None, benchmark)
+        timings = []
+        for number in range(rounds + 1):
+            if prepare:
+                prepare()
+            started = time.perf_counter()
+            run()
+            if number:
+                timings.append(time.perf_counter() - started)
+    return {
+        'min': min(timings),
+        'median': statistics.median(timings),
+        'max': max(timings),
+        'rounds': rounds,
+    }
+
+
+def run_cases(cases, rounds=ROUNDS, echo=None):
+    """ Run the cases and return the document written by the command line
+
+        :param list cases: Cases to run
+        :param int rounds: Timed runs of every case
+        :param callable echo: Called with every case name and its result
+    """
+    results = {}
+    for case in cases:
+        results[case.name] = run_case(case, rounds)
+        if echo:
+            echo(case.name, results[case.name])
+    return {
+        'version': VERSION,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'time': datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare(document, baseline, tolerance=TOLERANCE):
+    """ Find the cases which became slower than in the baseline
+
+        :param dict document: Results of this run
+        :param dict baseline: Results of an earlier run
+        :param float tolerance: Relative slowdown of the median which is accepted
+        :return list: (case name, baseline median, median) of the regressions
+    """
+    regressions = []
+    for name, result in sorted(document['results'].items()):
+        old_result = baseline['results'].get(name)
+        if old_result and result['median'] > old_result['median'] * (1 + tolerance):
+            regressions.append((name, old_result['median'], result['median']))
+    return regressions
+
+
+@click.command()
+@click.option('--output', '-o', type=click.Path(dir_okay=False, writable=True), help='Write the results to a JSON '
+                                                                                     'file')
+@click.option('--baseline', '-b', type=click.Path(exists=True, dir_okay=False),
+              help='Results of an earlier run, exit with status 1 when a case got slower')
+@click.option('--tolerance', default=TOLERANCE, help='Accepted relative slowdown against the baseline')
+@click.option('--rounds', default=ROUNDS, help='Timed runs of every case')
+@click.option('--quick', is_flag=True, help='Only run the smallest size of every case')
+@click.argument('patterns', nargs=-1)
+def main(output, baseline, tolerance, rounds, quick, patterns):
+    """ Time the strategy maintenance code paths on a fake chain
+
+        PATTERNS select cases by name, e.g. 'staggered_*'
+    """
+    logging.basicConfig(level=logging.WARNING)
+    cases = CASES
+    if patterns:
+        cases = [case for case in cases if any(fnmatch.fnmatch(case.name, pattern) for pattern in patterns)]
+    if quick:
+        smallest = {}
+        for case in cases:
+            smallest.setdefault(case.setup, case)
+        cases = list(smallest.values())
+
+    def echo(name, result):
+        click.echo('{:<45} median {:>9.2f}ms  min {:>9.2f}ms'.format(
+            name, result['median'] * 1000, result['min'] * 1000))
+
+    document = run_cases(cases, rounds, echo=echo)
+    if output:
+        with open(output, 'w') as file:
+            json.dump(document, file, indent=2, sort_keys=True)
+
+    if baseline:
+        with open(baseline) as file:
+            regressions = compare(document, json.load(file), tolerance)
+        for name, old_median, median in regressions:
+            click.echo(click.style('{} regressed: {:.2f}ms -> {:.2f}ms'.format(
+                name, old_median * 1000, median * 1000), fg='red'))
+        if regressions:
+            sys.exit(1)
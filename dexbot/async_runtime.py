@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import threading
+
+log = logging.getLogger(__name__)
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_event_loop():
+    """ Return the event loop shared by the whole process
+
+        When no runtime has registered its loop with :func:`set_event_loop`, a loop is started in a daemon thread.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=_run_loop, args=(_loop,), name='dexbot-asyncio', daemon=True)
+            thread.start()
+        return _loop
+
+
+def set_event_loop(loop):
+    """ Make the loop of a running runtime the shared loop
+
+        :param asyncio.AbstractEventLoop loop: Event loop driven by the caller
+    """
+    global _loop
+    with _loop_lock:
+        _loop = loop
+
+
+def _run_loop(loop):
+    asyncio.set_event_loop(loop)
+    loop.run_forever()
+
+
+def run_coroutine(coroutine, timeout=None):
+    """ Run a coroutine on the shared loop and wait for the result from a synchronous caller
+
+        Synchronous code such as strategy callbacks and price feed helpers can use this instead of creating a
+        new event loop per call.
+
+        :param coroutine: Coroutine object
+        :param float timeout: Seconds to wait for the result
+        :return: Result of the coroutine
+    """
+    loop = get_event_loop()
+    if _in_loop_thread(loop):
+        coroutine.close()
+        raise RuntimeError('run_coroutine() would block the event loop, await the coroutine instead')
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+
+def _in_loop_thread(loop):
+    # asyncio.get_running_loop() is not available on python 3.6
+    return asyncio._get_running_loop() is loop
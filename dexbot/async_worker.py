@@ -0,0 +1,204 @@
+import asyncio
+import collections
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from bitsharesapi.websocket import BitSharesWebsocket
+
+from dexbot.async_runtime import set_event_loop
+from dexbot.worker import WorkerInfrastructure
+
+log = logging.getLogger(__name__)
+
+# Seconds between websocket pings
+KEEP_ALIVE = 25
+
+# Callback number of block notices, same as in BitSharesWebsocket subscriptions
+BLOCK_NOTICE = BitSharesWebsocket.__events__.index('on_block')
+
+
+class LoopTransport:
+    """ Stands in for the websocket-client connection of BitSharesWebsocket, messages are sent by the event loop
+
+        :param asyncio.AbstractEventLoop loop: Event loop owning the connection
+        :param aiohttp.ClientWebSocketResponse connection: Websocket connection to the node
+    """
+
+    def __init__(self, loop, connection):
+        self.loop = loop
+        self.connection = connection
+
+    def send(self, data):
+        if isinstance(data, bytes):
+            data = data.decode('utf8')
+        # Subscriptions may be changed from other threads, e.g. when a worker is added from the GUI
+        self.loop.call_soon_threadsafe(self._send, data)
+
+    def _send(self, data):
+        asyncio.ensure_future(self.connection.send_str(data), loop=self.loop)
+
+    def close(self):
+        self.loop.call_soon_threadsafe(lambda: asyncio.ensure_future(self.connection.close(), loop=self.loop))
+
+
+class AsyncWorkerInfrastructure(WorkerInfrastructure):
+    """ WorkerInfrastructure running on a single asyncio event loop
+
+        The loop drives the websocket subscription and the external price feeds. Strategies keep their
+        synchronous callback API: notifications are processed by the same Notify code as in the threaded
+        runtime, and the callbacks run one at a time in a single dispatch thread, so a slow worker never blocks
+        the network I/O. Blocks which arrive while the workers are busy are coalesced, only the newest block
+        is dispatched.
+
+        Strategies may define an ``async def maintain(self)`` coroutine, which is run on the loop for as long
+        as the worker is running.
+
+        :param dict config: Configuration
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :param view: GUI view
+        :param asyncio.AbstractEventLoop loop: Event loop to use, a new loop is created by default
+    """
+
+    def __init__(self, config, bitshares_instance=None, view=None, loop=None):
+        super().__init__(config, bitshares_instance=bitshares_instance, view=view)
+        self.loop = loop
+        # All strategy code runs in this thread, the shared txbuffer is never used concurrently
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.messages = collections.deque()
+        self.pending_block = None
+        self.wakeup = None
+        self.maintenance_tasks = {}
+
+    def run(self):
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        # External feeds run their requests on this loop
+        set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self.run_async())
+        finally:
+            self.executor.shutdown(wait=False)
+
+    async def run_async(self):
+        await self.dispatch(self.init_services)
+        await self.dispatch(self.init_workers, self.config)
+        await self.dispatch(self.update_notify)
+        await self.serve()
+
+    async def serve(self):
+        """ Listen to the notifications and dispatch them until the websocket is closed
+        """
+        self.wakeup = asyncio.Event()
+        self.start_maintenance()
+        try:
+            await asyncio.gather(self.listen(), self.dispatch_messages())
+        finally:
+            for task in self.maintenance_tasks.values():
+                task.cancel()
+
+    async def dispatch(self, func, *args):
+        """ Run a blocking function in the dispatch thread
+        """
+        return await self.loop.run_in_executor(self.executor, func, *args)
+
+    @property
+    def running(self):
+        return not self.notify.websocket.run_event.is_set()
+
+    async def listen(self):
+        """ Keep the websocket connected and subscribed, reconnecting to the next node when it drops
+        """
+        websocket = self.notify.websocket
+        attempts = 0
+        while self.running:
+            url = next(websocket.urls)
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(url, heartbeat=KEEP_ALIVE) as connection:
+                        log.debug('Connected to {}'.format(url))
+                        attempts = 0
+                        websocket.url = url
+                        websocket.ws = LoopTransport(self.loop, connection)
+
+                        # Same as BitSharesWebsocket.on_open() without its keep-alive thread
+                        websocket.login(websocket.user, websocket.password, api_id=1)
+                        websocket.database(api_id=1)
+                        websocket.reset_subscriptions(
+                            websocket.subscription_accounts,
+                            websocket.subscription_markets,
+                            websocket.subscription_objects
+                        )
+
+                        async for message in connection:
+                            if message.type == aiohttp.WSMsgType.TEXT:
+                                self.enqueue(message.data)
+                            elif message.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+            except (aiohttp.ClientError, OSError) as exception:
+                log.warning('Lost connection to node {}: {}'.format(url, exception))
+
+            if self.running:
+                attempts += 1
+                await asyncio.sleep(min((attempts - 1) * 2, 10))
+
+        self.wakeup.set()
+
+    def enqueue(self, message):
+        """ Queue a message for the dispatch thread, replacing a block which is still waiting
+        """
+        try:
+            data = json.loads(message)
+        except ValueError:
+            log.warning('Node returned invalid JSON: {}'.format(message))
+            return
+
+        if data.get('method') == 'notice' and data['params'][0] == BLOCK_NOTICE:
+            self.pending_block = message
+        elif data.get('method') == 'notice':
+            self.messages.append(message)
+        else:
+            # Replies to the subscription calls are not needed
+            return
+        self.wakeup.set()
+
+    async def dispatch_messages(self):
+        """ Hand the messages over to the Notify processing in the dispatch thread
+        """
+        websocket = self.notify.websocket
+        while self.running:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            while self.running and (self.messages or self.pending_block):
+                if self.messages:
+                    message = self.messages.popleft()
+                else:
+                    message, self.pending_block = self.pending_block, None
+                try:
+                    await self.dispatch(websocket.on_message, message)
+                except Exception:
+                    log.exception('Unable to process notification')
+            if self.running:
+                # Workers may have been added while processing
+                self.start_maintenance()
+
+    def start_maintenance(self):
+        """ Start the maintenance coroutines of the workers which define one
+        """
+        for worker_name, task in list(self.maintenance_tasks.items()):
+            if worker_name not in self.workers:
+                task.cancel()
+                self.maintenance_tasks.pop(worker_name)
+
+        for worker_name, worker in list(self.workers.items()):
+            maintain = getattr(worker, 'maintain', None)
+            if worker_name in self.maintenance_tasks or not asyncio.iscoroutinefunction(maintain):
+                continue
+            self.maintenance_tasks[worker_name] = asyncio.ensure_future(maintain(), loop=self.loop)
+
+    def stop(self, *args, **kwargs):
+        super().stop(*args, **kwargs)
+        if self.wakeup and not self.running:
+            self.loop.call_soon_threadsafe(self.wakeup.set)
@@ -0,0 +1,367 @@
+import copy
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+
+from bitshares import BitShares
+from bitshares.account import AccountUpdate
+from bitshares.blockchainobject import BlockchainObject
+from bitshares.instance import set_shared_bitshares_instance
+from bitshares.price import FilledOrder, Order
+from bitshares.transactionbuilder import TransactionBuilder
+from bitsharesbase.account import PrivateKey
+from bitsharesbase.operationids import operations
+
+from dexbot import storage
+from dexbot.clock import SimulatedClock, set_clock
+from dexbot.fake_node import CORE_SYMBOL, OPERATION_FEE, FakeChain, FakeNode
+from dexbot.worker import WorkerInfrastructure
+
+log = logging.getLogger(__name__)
+
+# Simulated seconds between the blocks produced while the history is quiet
+TICK_INTERVAL = 60
+
+# Precision of the simulated assets, other than the core asset
+DEFAULT_PRECISION = 5
+
+# Account which replays the order books and trades of the history
+MARKET_ACCOUNT = 'backtest-market'
+MARKET_ACCOUNT_BALANCE = 10 ** 15
+
+# History of the process pool workers, loaded once per process
+_history = None
+
+
+class UnsignedTransactionBuilder(TransactionBuilder):
+    """ TransactionBuilder which doesn't sign, the fake chain doesn't verify signatures and signing in pure python
+        takes most of the CPU time of a backtest
+    """
+
+    def sign(self):
+        self.constructTx()
+        # Looks signed to broadcast(), which would construct the transaction again otherwise
+        self["signatures"] = ['00' * 65]
+
+
+class BacktestResult(namedtuple('BacktestResult', 'params base_total quote_total value hold_value fills '
+                                                  'operation_fees blocks disabled balance_history')):
+    """ Outcome of one simulation
+
+        :param dict params: Worker parameters which differ from the config
+        :param float base_total: Base asset of the worker in balance and in orders at the end
+        :param float quote_total: Quote asset of the worker in balance and in orders at the end
+        :param float value: base_total + quote_total at the last price of the history, in the base asset
+        :param float hold_value: Value of the initial balances at the last price, i.e. without trading
+        :param int fills: Number of fills of the worker orders
+        :param float operation_fees: Transaction fees paid in the core asset
+        :param int blocks: Number of simulated blocks
+        :param bool disabled: Whether the worker disabled itself
+        :param list balance_history: (timestamp, base_total, quote_total, center_price) tuples the worker stored
+    """
+
+    @property
+    def profit(self):
+        """ Relative gain against holding the initial balances
+        """
+        if not self.hold_value:
+            return 0
+        return self.value / self.hold_value - 1
+
+
+def load_history(path):
+    """ Read market history from a JSON lines file
+
+        Every line is an event with a unix ``time``. Order book snapshots replace the orders of the rest of the
+        market, trades are played against the book including the orders of the worker::
+
+            {"time": 1546300800, "type": "book", "bids": [[price, amount], ...], "asks": [[price, amount], ...]}
+            {"time": 1546300803, "type": "trade", "side": "buy", "price": 0.051, "amount": 120.5}
+
+        Prices are in the base asset per quote asset, amounts in the quote asset. ``side`` is the side of the
+        taker. Events of other types are ignored.
+
+        :param str path: File to read
+        :return list: Events sorted by time
+    """
+    with open(path) as file:
+        events = [json.loads(line) for line in file if line.strip()]
+    return sorted(events, key=lambda event: event['time'])
+
+
+class Backtest:
+    """ Replays market history through one worker on a fake chain, in simulated time
+
+        The worker trades against the order books and trades of the history and pays the fees of the fake chain.
+        The strategies read the time from the simulated clock, so check intervals and the balance history follow
+        the history. Storage lives in a temporary database which is removed after the run.
+
+        :param dict config: Config with a single worker
+        :param list history: Events, see :func:`load_history`
+        :param dict balances: Starting balances of the worker account, {symbol: amount}. Include the core asset
+            to pay the transaction fees
+        :param float tick_interval: Simulated seconds between blocks while there are no events
+        :param dict precisions: Precision of the market assets, {symbol: decimals}
+        :param dict market_fees: Market fees of the assets in hundredths of a percent, {symbol: fee}
+    """
+
+    def __init__(self, config, history, balances, tick_interval=TICK_INTERVAL, precisions=None, market_fees=None):
+        if len(config['workers']) != 1:
+            raise ValueError('Backtests run a single worker, {} are configured'.format(len(config['workers'])))
+
+        self.config = copy.deepcopy(config)
+        # Real nodes are not used and the fake chain doesn't verify signatures
+        self.config.pop('node', None)
+        self.config.pop('signing_processes', None)
+        # The port is taken by dexbot run or the previous backtest of the process
+        self.config.pop('metrics_port', None)
+        self.worker_name, self.worker = next(iter(self.config['workers'].items()))
+        self.quote_symbol, self.base_symbol = self.worker['market'].split('/')
+        self.history = [event for event in history if event.get('type') in ('book', 'trade')]
+        self.balances = balances
+        self.tick_interval = tick_interval
+        self.precisions = precisions or {}
+        self.market_fees = market_fees or {}
+
+        self.chain = None
+        self.node = None
+        self.bitshares = None
+        self.infrastructure = None
+        self.clock = None
+        self.notifications = []
+        self.last_price = None
+
+    def run(self):
+        """ Run the whole history
+
+            :return BacktestResult: Outcome of the run
+        """
+        self.clock = SimulatedClock(self.history[0]['time'] if self.history else 0)
+        old_clock = set_clock(self.clock)
+        directory = tempfile.mkdtemp(prefix='dexbot-backtest-')
+        old_db_worker = storage.set_db_worker(storage.DatabaseWorker(os.path.join(directory, 'backtest.sqlite')))
+        # Objects cached by an earlier run in this process have the same ids but another state
+        BlockchainObject.clear_cache()
+
+        key = PrivateKey()
+        try:
+            self.create_chain(key)
+            self.chain.listeners.append(self.on_chain_event)
+            self.node = FakeNode(self.chain)
+            self.bitshares = BitShares(node=self.node.url, keys=[str(key)])
+            self.bitshares._txbuffers[0] = UnsignedTransactionBuilder(bitshares_instance=self.bitshares)
+            set_shared_bitshares_instance(self.bitshares)
+            return self.simulate()
+        finally:
+            if self.infrastructure is not None:
+                self.infrastructure.stop_services()
+            if self.node is not None:
+                self.node.close()
+            storage.set_db_worker(old_db_worker).close()
+            set_clock(old_clock)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def create_chain(self, key):
+        self.chain = chain = FakeChain(clock=self.clock)
+        for symbol in (self.quote_symbol, self.base_symbol):
+            if symbol not in chain.assets_by_symbol:
+                chain.create_asset(symbol, self.precisions.get(symbol, DEFAULT_PRECISION),
+                                   market_fee_percent=self.market_fees.get(symbol, 0))
+
+        balances = {symbol: self.to_satoshis(symbol, amount) for symbol, amount in self.balances.items()}
+        chain.create_account(self.worker['account'], str(key.pubkey), balances)
+        market_balances = {symbol: MARKET_ACCOUNT_BALANCE for symbol in (CORE_SYMBOL, self.quote_symbol,
+                                                                         self.base_symbol)}
+        chain.create_account(MARKET_ACCOUNT, str(key.pubkey), market_balances)
+
+    def to_satoshis(self, symbol, amount):
+        precision = self.chain_asset(symbol)['precision']
+        return int(round(amount * 10 ** precision))
+
+    def chain_asset(self, symbol):
+        return self.chain.objects[self.chain.resolve_asset(symbol)]
+
+    def simulate(self):
+        # The worker needs the market of the first moment to find its center price
+        start = self.history[0]['time'] if self.history else 0
+        for event in self.history:
+            if event['time'] > start:
+                break
+            self.node.call(self.apply_event, event)
+        self.node.produce_block()
+        self.notifications = []
+
+        self.infrastructure = WorkerInfrastructure(self.config, bitshares_instance=self.bitshares)
+        self.infrastructure.init_services()
+        self.infrastructure.init_workers(self.config)
+        strategy = self.infrastructure.workers.get(self.worker_name)
+        if strategy is None:
+            raise RuntimeError('Worker {} could not be initialized'.format(self.worker_name))
+
+        initial_base, initial_quote = self.get_totals()
+        blocks = 1
+        for event in self.history:
+            if event['time'] <= start:
+                continue
+            # Quiet periods still produce blocks, strategies act on ticks too
+            while self.clock.time() + self.tick_interval < event['time']:
+                self.clock.advance(self.tick_interval)
+                self.produce_block()
+                blocks += 1
+            self.clock.set(event['time'])
+            self.node.call(self.apply_event, event)
+            self.produce_block()
+            blocks += 1
+
+        account_id = self.chain.resolve_account(self.worker['account'])
+        base_total, quote_total = self.get_totals()
+        entries = storage.Storage.get_balance_entries(self.worker['account'], self.worker_name)
+        return BacktestResult(
+            params={},
+            base_total=base_total,
+            quote_total=quote_total,
+            value=base_total + quote_total * (self.last_price or 0),
+            hold_value=initial_base + initial_quote * (self.last_price or 0),
+            fills=len([fill for fill in self.chain.fills if fill['account_id'] == account_id]),
+            operation_fees=self.chain.operation_fees.get(account_id, 0) / 10 ** self.chain_asset(CORE_SYMBOL)[
+                'precision'],
+            blocks=blocks,
+            disabled=strategy.disabled,
+            balance_history=[(entry.timestamp, entry.base_total, entry.quote_total, entry.center_price)
+                             for entry in entries],
+        )
+
+    def get_totals(self):
+        """ Return the base and quote of the worker account in balance and in orders
+        """
+        account_id = self.chain.resolve_account(self.worker['account'])
+        totals = []
+        for symbol in (self.base_symbol, self.quote_symbol):
+            asset = self.chain_asset(symbol)
+            amount = self.chain.balances[account_id].get(asset['id'], 0)
+            amount += sum(order['for_sale'] for order in self.chain.get_account_orders(account_id)
+                          if order['sell_price']['base']['asset_id'] == asset['id'])
+            totals.append(amount / 10 ** asset['precision'])
+        return totals
+
+    # History, applied on the node loop
+
+    def apply_event(self, event):
+        market_account = self.chain.resolve_account(MARKET_ACCOUNT)
+        if event['type'] == 'book':
+            for order in self.chain.get_account_orders(market_account):
+                self.chain.close_order(order)
+            for price, amount in event['bids']:
+                self.place_order('buy', price, amount)
+            for price, amount in event['asks']:
+                self.place_order('sell', price, amount)
+            if event['bids'] and event['asks']:
+                self.last_price = (event['bids'][0][0] + event['asks'][0][0]) / 2
+        elif event['type'] == 'trade':
+            order_id = self.place_order(event['side'], event['price'], event['amount'])
+            # The rest of the taker order was not part of the trade
+            if order_id in self.chain.limit_orders:
+                self.chain.close_order(self.chain.limit_orders[order_id])
+            self.last_price = event['price']
+
+    def place_order(self, side, price, amount):
+        quote = self.chain_asset(self.quote_symbol)
+        base = self.chain_asset(self.base_symbol)
+        quote_amount = {'amount': self.to_satoshis(self.quote_symbol, amount), 'asset_id': quote['id']}
+        base_amount = {'amount': self.to_satoshis(self.base_symbol, amount * price), 'asset_id': base['id']}
+        if not quote_amount['amount'] or not base_amount['amount']:
+            return None
+
+        sell, receive = (base_amount, quote_amount) if side == 'buy' else (quote_amount, base_amount)
+        transaction = self.chain.push_transaction({'operations': [[operations['limit_order_create'], {
+            'fee': {'amount': OPERATION_FEE, 'asset_id': '1.3.0'},
+            'seller': self.chain.resolve_account(MARKET_ACCOUNT),
+            'amount_to_sell': sell,
+            'min_to_receive': receive,
+            'expiration': None,
+            'fill_or_kill': False,
+            'extensions': [],
+        }]]})
+        return transaction['operation_results'][0][1]
+
+    # Notifications
+
+    def on_chain_event(self, kind, data):
+        # Called on the node loop, the worker is notified from the simulation thread
+        self.notifications.append((kind, data))
+
+    def produce_block(self):
+        """ Produce a block and deliver the notifications which happened before it, like Notify does
+        """
+        self.node.call(self.chain.produce_block)
+        block_id = self.chain.head_block_id
+        notifications, self.notifications = self.notifications, []
+
+        market = {self.chain.resolve_asset(self.quote_symbol), self.chain.resolve_asset(self.base_symbol)}
+        account_id = self.chain.resolve_account(self.worker['account'])
+        account_updated = False
+        for kind, data in notifications:
+            if kind == 'market' and set(data[0]) == market:
+                for item in data[1]:
+                    if 'pays' in item:
+                        self.infrastructure.on_market(FilledOrder(item, blockchain_instance=self.bitshares))
+                    else:
+                        self.infrastructure.on_market(Order(item, blockchain_instance=self.bitshares))
+            elif kind == 'account' and data == account_id:
+                account_updated = True
+
+        if account_updated:
+            statistics = self.node.call(self.chain.account_notice, account_id)
+            self.infrastructure.on_account(AccountUpdate(statistics, blockchain_instance=self.bitshares))
+        self.infrastructure.on_block(block_id)
+
+
+def parameter_grid(grid):
+    """ Return all the combinations of the parameter values
+
+        :param dict grid: {parameter: [values]}
+        :return list: {parameter: value} dicts
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_backtests(config, history, balances, grid, processes=None, **kwargs):
+    """ Run a backtest for every combination of the worker parameters, in parallel processes
+
+        :param dict config: Config with a single worker
+        :param list history: Events, see :func:`load_history`
+        :param dict balances: Starting balances of the worker account, {symbol: amount}
+        :param dict grid: Values to try per worker parameter, {parameter: [values]}
+        :param int processes: Number of processes, the number of cores by default
+        :param kwargs: Other :class:`Backtest` arguments
+        :return list: :class:`BacktestResult` per combination, in the order of :func:`parameter_grid`
+    """
+    jobs = [(config, balances, params, kwargs) for params in parameter_grid(grid)]
+    # Forked processes would inherit the threads of the parent in an unusable state
+    context = multiprocessing.get_context('spawn')
+    with context.Pool(processes, initializer=_init_process, initargs=(history,)) as pool:
+        return pool.map(_run_job, jobs, chunksize=1)
+
+
+def _init_process(history):
+    global _history
+    _history = history
+
+
+def _run_job(job):
+    config, balances, params, kwargs = job
+    config = copy.deepcopy(config)
+    worker = next(iter(config['workers'].values()))
+    worker.update(params)
+    try:
+        result = Backtest(config, _history, balances, **kwargs).run()
+    except Exception:
+        log.exception('Backtest with {} failed'.format(params))
+        return BacktestResult(params, None, None, None, None, 0, 0, 0, True, [])
+    return result._replace(params=params)
@@ -5,20 +5,22 @@ import os.path
 import signal
 import sys
 
+from ruamel import yaml
+
 from dexbot.config import Config, DEFAULT_CONFIG_FILE
-from dexbot.cli_conf import SYSTEMD_SERVICE_NAME, get_whiptail, setup_systemd
-from dexbot.helper import initialize_orders_log, initialize_data_folders
+from dexbot.helper import get_user_data_directory, initialize_orders_log, initialize_data_folders
 from dexbot.ui import (
     verbose,
     chain,
     unlock,
     configfile
 )
-from .worker import WorkerInfrastructure
-from .cli_conf import configure_dexbot, dexbot_service_running
 from . import errors
 from . import helper
 
+# The workers, the strategies and the price feeds take most of a second to import, the commands import what they
+# use so e.g. dexbot --help and dexbot profile start at once
+
 # We need to do this before importing click
 if "LANG" not in os.environ:
     os.environ['LANG'] = 'C.UTF-8'
@@ -27,6 +29,9 @@ import click  # noqa: E402
 
 log = logging.getLogger(__name__)
 
+# Worker to profile, written by dexbot profile for the running process
+PROFILE_REQUEST_FILE = os.path.join(get_user_data_directory(), 'profile_request')
+
 # Initial logging before proper setup.
 logging.basicConfig(
     level=logging.INFO,
@@ -76,19 +81,37 @@ def main(ctx, **kwargs):
 
 
 @main.command()
+@click.option('--asyncio', 'use_asyncio', is_flag=True, help='Run the workers on a single asyncio event loop')
+@click.option('--record', type=click.Path(dir_okay=False, writable=True), default=None,
+              help='Record the notifications and RPC responses to a file for dexbot replay, gzipped if it ends '
+                   'with .gz')
 @click.pass_context
 @configfile
 @chain
 @unlock
 @verbose
-def run(ctx):
+def run(ctx, use_asyncio, record):
     """ Continuously run the worker
     """
+    from dexbot.metadata_cache import set_metadata_cache, user_metadata_cache
+    from .async_worker import AsyncWorkerInfrastructure
+    from .recorder import Recorder
+    from .worker import WorkerInfrastructure
+
     if ctx.obj['pidfile']:
         with open(ctx.obj['pidfile'], 'w') as fd:
             fd.write(str(os.getpid()))
+    recorder = None
+    # Recordings fetch the assets so they can be replayed without the cache file
+    if ctx.config.get('metadata_cache', True) and not record:
+        set_metadata_cache(user_metadata_cache())
     try:
-        worker = WorkerInfrastructure(ctx.config)
+        if use_asyncio:
+            worker = AsyncWorkerInfrastructure(ctx.config)
+        else:
+            worker = WorkerInfrastructure(ctx.config)
+        if record:
+            recorder = worker.recorder = Recorder(record)
         # Set up signalling. do it here as of no relevance to GUI
         kill_workers = worker_job(worker, lambda: worker.stop(pause=True))
         # These first two UNIX & Windows
@@ -98,8 +121,10 @@ def run(ctx):
             # These signals are UNIX-only territory, will ValueError or AttributeError here on Windows (depending on
             # python version)
             signal.signal(signal.SIGHUP, kill_workers)
-            # TODO: reload config on SIGUSR1
-            # signal.signal(signal.SIGUSR1, lambda x, y: worker.do_next_tick(worker.reread_config))
+            # Log the timings and start or stop profiling a worker, see dexbot profile
+            signal.signal(signal.SIGUSR2, worker_job(worker, lambda: toggle_profile(worker)))
+            # Apply the changes of the workers in the config file, the other workers keep running
+            signal.signal(signal.SIGUSR1, worker_job(worker, lambda: reload_config(worker, ctx.obj['configfile'])))
         except (ValueError, AttributeError):
             log.debug("Cannot set all signals -- not available on this platform")
         if ctx.obj['systemd']:
@@ -113,6 +138,8 @@ def run(ctx):
     except errors.NoWorkersAvailable:
         sys.exit(70)  # 70= "Software error" in /usr/include/sysexts.h
     finally:
+        if recorder:
+            recorder.close()
         if ctx.obj['pidfile']:
             helper.remove(ctx.obj['pidfile'])
 
@@ -125,6 +152,8 @@ def run(ctx):
 def runservice(ctx):
     """ Continuously run the worker as a service
     """
+    from dexbot.cli_conf import SYSTEMD_SERVICE_NAME, dexbot_service_running, get_whiptail, setup_systemd
+
     if dexbot_service_running():
         click.echo("Stopping dexbot daemon")
         os.system('systemctl --user stop dexbot')
@@ -144,11 +173,16 @@ def runservice(ctx):
 def configure(ctx):
     """ Interactively configure dexbot
     """
+    from dexbot.cli_conf import configure_dexbot, dexbot_service_running
+    from dexbot.metadata_cache import set_metadata_cache, user_metadata_cache
+
     # Make sure the dexbot service isn't running while we do the config edits
     if dexbot_service_running():
         click.echo("Stopping dexbot daemon")
         os.system('systemctl --user stop dexbot')
 
+    if ctx.config.get('metadata_cache', True):
+        set_metadata_cache(user_metadata_cache())
     config = Config(path=ctx.obj['configfile'])
     configure_dexbot(config, ctx)
     config.save_config()
@@ -159,6 +193,122 @@ def configure(ctx):
         os.system("systemctl --user start dexbot")
 
 
+@main.command()
+@click.pass_context
+@configfile
+@click.option('--timeout', default=3, help='Seconds to wait for a node to answer')
+def nodes(ctx, timeout):
+    """ Measure latency and head block lag of the configured nodes
+    """
+    from .node_manager import NodePool
+
+    pool = NodePool(ctx.config['node'], timeout=timeout)
+    for url in pool.check():
+        stats = pool.stats[url]
+        if stats.reachable:
+            status = click.style('synced', fg='green') if stats.synced else click.style('lagging', fg='yellow')
+            click.echo('{:<50} {:>8.2f}ms  block {:<10} lag {:<4} {}'.format(
+                url, stats.latency, stats.head_block, stats.lag, status))
+        else:
+            click.echo('{:<50} {}  {}'.format(url, click.style('unreachable', fg='red'), stats.error))
+
+
+@main.command()
+@click.pass_context
+@configfile
+@click.argument('worker_name')
+@click.argument('history', type=click.Path(exists=True, dir_okay=False))
+@click.option('--balance', '-b', multiple=True, help='Starting balance of the worker as SYMBOL=AMOUNT, e.g. BTS=1000')
+@click.option('--param', '-p', multiple=True,
+              help='Values of a worker parameter to try as NAME=VALUE,VALUE,..., e.g. spread=1,1.5,2')
+@click.option('--processes', type=int, default=None, help='Number of simulations run in parallel, one per core '
+                                                          'by default')
+@click.option('--tick-interval', type=int, default=None, help='Simulated seconds between blocks without events')
+def backtest(ctx, worker_name, history, balance, param, processes, tick_interval):
+    """ Replay market history through a worker with every combination of the given parameters
+    """
+    from .backtest import TICK_INTERVAL, load_history, run_backtests
+
+    if worker_name not in ctx.config['workers']:
+        raise click.BadParameter('Worker {} is not configured'.format(worker_name))
+    config = dict(ctx.config, workers={worker_name: ctx.config['workers'][worker_name]})
+
+    balances = {}
+    for item in balance:
+        symbol, amount = item.split('=')
+        balances[symbol.upper()] = float(amount)
+    grid = {}
+    for item in param:
+        name, values = item.split('=')
+        grid[name] = [yaml.safe_load(value) for value in values.split(',')]
+
+    results = run_backtests(config, load_history(history), balances, grid, processes=processes,
+                            tick_interval=TICK_INTERVAL if tick_interval is None else tick_interval)
+    for result in sorted(results, key=lambda result: result.profit, reverse=True):
+        params = ' '.join('{}={}'.format(name, value) for name, value in sorted(result.params.items()))
+        if result.value is None:
+            click.echo('{:<40} {}'.format(params, click.style('failed', fg='red')))
+            continue
+        status = click.style('disabled', fg='yellow') if result.disabled else ''
+        click.echo('{:<40} profit {:>7.2%}  fills {:<6} fees {:<10.5f} {}'.format(
+            params, result.profit, result.fills, result.operation_fees, status))
+
+
+@main.command()
+@click.pass_context
+@configfile
+@click.argument('recording', type=click.Path(exists=True, dir_okay=False))
+@click.option('--use-config', is_flag=True, help='Replay with the workers of the config file instead of the '
+                                                 'recorded ones')
+def replay(ctx, recording, use_config):
+    """ Feed a recording of dexbot run --record through the workers as fast as possible
+    """
+    from .recorder import Replay
+
+    result = Replay.from_file(recording, config=ctx.config if use_config else None).run()
+    click.echo('{} notices in {:.2f}s ({:.0f}/s), {} RPC calls, {} not recorded'.format(
+        result.notices, result.seconds, result.notices / result.seconds if result.seconds else 0,
+        result.rpc_calls, result.rpc_misses))
+
+
+@main.command()
+@click.pass_context
+@click.argument('worker_name', required=False)
+def profile(ctx, worker_name):
+    """ Start or stop profiling a worker of dexbot run, the busiest one by default. Give the same --pidfile as to
+        dexbot run
+    """
+    if not ctx.obj['pidfile'] or not os.path.isfile(ctx.obj['pidfile']):
+        raise click.UsageError('Give the --pidfile of the running dexbot run')
+    with open(ctx.obj['pidfile']) as fd:
+        pid = int(fd.read())
+    with open(PROFILE_REQUEST_FILE, 'w') as fd:
+        fd.write(worker_name or '')
+    os.kill(pid, signal.SIGUSR2)
+    click.echo('Profiling toggled on the next block, the profile is written to the log when stopped')
+
+
+def toggle_profile(worker):
+    """ Log the timings and start or stop profiling the worker requested by dexbot profile
+    """
+    log.info('Worker timings:\n{}'.format(worker.instrumentation.format_report()))
+    worker_name = None
+    if os.path.isfile(PROFILE_REQUEST_FILE):
+        with open(PROFILE_REQUEST_FILE) as fd:
+            worker_name = fd.read().strip() or None
+        helper.remove(PROFILE_REQUEST_FILE)
+    worker.instrumentation.toggle_profile(worker_name)
+
+
+def reload_config(worker, config_file):
+    """ Read the config file again and restart the workers which were added, removed or changed in it
+    """
+    try:
+        worker.reload_config(Config.load_config(config_file))
+    except Exception:
+        log.exception('Unable to reload the config file {}'.format(config_file))
+
+
 def worker_job(worker, job):
     return lambda x, y: worker.do_next_tick(job)
 
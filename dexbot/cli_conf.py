@@ -13,7 +13,6 @@ understand the common code so worker strategy writers can define their configura
 for each strategy class.
 """
 
-import importlib
 import pathlib
 import os
 import os.path
@@ -24,28 +23,8 @@ import subprocess
 from dexbot.whiptail import get_whiptail
 from dexbot.strategies.base import StrategyBase
 from dexbot.config_validator import ConfigValidator
+from dexbot.strategy_registry import get_strategy_registry
 
-import dexbot.helper
-
-
-STRATEGIES = [
-    {'tag': 'relative',
-     'class': 'dexbot.strategies.relative_orders',
-     'name': 'Relative Orders'},
-    {'tag': 'stagger',
-     'class': 'dexbot.strategies.staggered_orders',
-     'name': 'Staggered Orders'}]
-
-tags_so_far = {'stagger', 'relative'}
-for desc, module in dexbot.helper.find_external_strategies():
-    tag = desc.split()[0].lower()
-    # make sure tag is unique
-    i = 1
-    while tag in tags_so_far:
-        tag = tag+str(i)
-        i += 1
-    tags_so_far.add(tag)
-    STRATEGIES.append({'tag': tag, 'class': module, 'name': desc})
 
 SYSTEMD_SERVICE_NAME = os.path.expanduser(
     "~/.local/share/systemd/user/dexbot.service")
@@ -189,10 +168,8 @@ def get_strategy_tag(strategy_class):
 
         It may seems that tags may be common across strategies, but it is not. Every strategy must use unique tag.
     """
-    for strategy in STRATEGIES:
-        if strategy_class == strategy['class']:
-            return strategy['tag']
-    return None
+    strategy = get_strategy_registry().get(strategy_class)
+    return strategy.tag if strategy else None
 
 
 def configure_worker(whiptail, worker_config, bitshares_instance):
@@ -211,12 +188,12 @@ def configure_worker(whiptail, worker_config, bitshares_instance):
     default_strategy = worker_config.get('module', 'dexbot.strategies.relative_orders')
     strategy_list = []
 
-    for strategy in STRATEGIES:
-        if default_strategy == strategy['class']:
-            default_strategy = strategy['tag']
+    for strategy in get_strategy_registry().strategies().values():
+        if default_strategy == strategy.module:
+            default_strategy = strategy.tag
 
         # Add strategy tag and name pairs to a list
-        strategy_list.append([strategy['tag'], strategy['name']])
+        strategy_list.append([strategy.tag, strategy.name])
 
     # Strategy selection
     worker_config['module'] = whiptail.radiolist(
@@ -224,15 +201,12 @@ def configure_worker(whiptail, worker_config, bitshares_instance):
         select_choice(default_strategy, strategy_list)
     )
 
-    for strategy in STRATEGIES:
-        if strategy['tag'] == worker_config['module']:
-            worker_config['module'] = strategy['class']
+    strategy = get_strategy_registry().find_by_tag(worker_config['module'])
+    if strategy:
+        worker_config['module'] = strategy.module
 
     # Import the strategy class but we don't __init__ it here
-    strategy_class = getattr(
-        importlib.import_module(worker_config["module"]),
-        'Strategy'
-    )
+    strategy_class = get_strategy_registry().load(worker_config['module'])
 
     # Check if strategy has changed and editing existing worker
     if editing and default_strategy != get_strategy_tag(worker_config['module']):
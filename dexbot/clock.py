@@ -0,0 +1,71 @@
+import datetime
+import time
+
+
+class Clock:
+    """ Wall clock, the strategies read the time through a clock so that simulations can replace it
+    """
+
+    def time(self):
+        """ Return the current time as a unix timestamp
+        """
+        return time.time()
+
+    def now(self):
+        """ Return the current local time as a datetime
+        """
+        return datetime.datetime.now()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """ Clock which only moves when it is told to, used to replay history faster than real time
+
+        :param float start: Unix timestamp to start at
+    """
+
+    def __init__(self, start=0):
+        self.timestamp = start
+
+    def time(self):
+        return self.timestamp
+
+    def now(self):
+        return datetime.datetime.fromtimestamp(self.timestamp)
+
+    def sleep(self, seconds):
+        # Nothing happens on a simulated chain while a strategy waits, so waiting just moves the time on
+        self.advance(seconds)
+
+    def advance(self, seconds):
+        self.timestamp += seconds
+
+    def set(self, timestamp):
+        """ Move the clock to a later time
+
+            :param float timestamp: Unix timestamp, not before the current time of the clock
+        """
+        if timestamp < self.timestamp:
+            raise ValueError('Simulated time can not go back from {} to {}'.format(self.timestamp, timestamp))
+        self.timestamp = timestamp
+
+
+_clock = Clock()
+
+
+def get_clock():
+    """ Return the clock of the process
+    """
+    return _clock
+
+
+def set_clock(clock):
+    """ Use another clock in the process, e.g. a :class:`SimulatedClock` in backtests
+
+        :return Clock: Clock used before
+    """
+    global _clock
+    old_clock, _clock = _clock, clock
+    return old_clock
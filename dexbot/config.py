@@ -1,5 +1,7 @@
+import copy
 import os
 import pathlib
+import threading
 
 from dexbot import APP_NAME, AUTHOR
 
@@ -11,6 +13,43 @@ from collections import OrderedDict
 DEFAULT_CONFIG_DIR = appdirs.user_config_dir(APP_NAME, appauthor=AUTHOR)
 DEFAULT_CONFIG_FILE = os.path.join(DEFAULT_CONFIG_DIR, 'config.yml')
 
+# Absolute path => (modification time and size of the file, parsed config)
+_parsed_configs = {}
+_parsed_configs_lock = threading.Lock()
+
+
+def parse_config(path=None):
+    """ Return the parsed config file, parsed once per process until the file changes
+
+        The result is shared, it must not be modified. :meth:`Config.load_config` returns a copy and
+        :meth:`Config.get_worker_config_file` copies only the worker.
+
+        :param str path: Path of the config file, the default one when None
+        :return collections.OrderedDict: Config
+    """
+    path = os.path.abspath(path or DEFAULT_CONFIG_FILE)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    with _parsed_configs_lock:
+        cached = _parsed_configs.get(path)
+    if cached and cached[0] == key:
+        return cached[1]
+
+    with open(path, 'r') as f:
+        config = Config.ordered_load(f, loader=yaml.SafeLoader)
+    with _parsed_configs_lock:
+        _parsed_configs[path] = (key, config)
+    return config
+
+
+def forget_config(path=None):
+    """ Parse the config file again on next use, called after writing it
+
+        :param str path: Path of the config file, the default one when None
+    """
+    with _parsed_configs_lock:
+        _parsed_configs.pop(os.path.abspath(path or DEFAULT_CONFIG_FILE), None)
+
 
 class Config(dict):
 
@@ -85,18 +124,18 @@ class Config(dict):
 
         with open(config_file, 'w') as f:
             yaml.dump(config, f, default_flow_style=False)
+        forget_config(config_file)
 
     @staticmethod
     def load_config(path=None):
-        if not path:
-            path = DEFAULT_CONFIG_FILE
-
-        with open(path, 'r') as f:
-            return Config.ordered_load(f, loader=yaml.SafeLoader)
+        """ Returns a copy of the config file data, see parse_config()
+        """
+        return copy.deepcopy(parse_config(path))
 
     def save_config(self):
         with open(self.config_file, 'w') as f:
             yaml.dump(self._config, f, default_flow_style=False)
+        forget_config(self.config_file)
 
     def refresh_config(self):
         self._config = self.load_config(self.config_file)
@@ -104,17 +143,26 @@ class Config(dict):
     @staticmethod
     def get_worker_config_file(worker_name, path=None):
         """ Returns config file data with only the data from a specific worker.
-            Config loaded from a file
+            Config loaded from a file, only the worker is copied from the parsed file
         """
-        if not path:
-            path = DEFAULT_CONFIG_FILE
-
-        with open(path, 'r') as f:
-            config = Config.ordered_load(f, loader=yaml.SafeLoader)
-
-        config['workers'] = OrderedDict({worker_name: config['workers'][worker_name]})
+        parsed = parse_config(path)
+        config = OrderedDict()
+        for key, value in parsed.items():
+            if key == 'workers':
+                config[key] = OrderedDict({worker_name: copy.deepcopy(value[worker_name])})
+            else:
+                config[key] = copy.deepcopy(value)
         return config
 
+    @staticmethod
+    def get_workers_data_file(path=None):
+        """ Returns dict of all the workers data in the config file, shared by the callers so it must not be
+            modified
+        """
+        if not os.path.isfile(path or DEFAULT_CONFIG_FILE):
+            return OrderedDict()
+        return parse_config(path)['workers']
+
     def get_worker_config(self, worker_name):
         """ Returns config file data with only the data from a specific worker.
             Config loaded from memory
@@ -126,14 +174,12 @@ class Config(dict):
     def remove_worker_config(self, worker_name):
         self._config['workers'].pop(worker_name, None)
 
-        with open(self.config_file, 'w') as f:
-            yaml.dump(self._config, f, default_flow_style=False)
+        self.save_config()
 
     def add_worker_config(self, worker_name, worker_data):
         self._config['workers'][worker_name] = worker_data
 
-        with open(self.config_file, 'w') as f:
-            yaml.dump(self._config, f, default_flow_style=False)
+        self.save_config()
 
     def replace_worker_config(self, worker_name, new_worker_name, worker_data):
         workers = self._config['workers']
@@ -145,8 +191,7 @@ class Config(dict):
             else:
                 workers[key] = value
 
-        with open(self.config_file, 'w') as f:
-            yaml.dump(self._config, f, default_flow_style=False)
+        self.save_config()
 
     @staticmethod
     def ordered_load(stream, loader=None, object_pairs_hook=OrderedDict):
@@ -1,9 +1,9 @@
 from dexbot.config import Config
+from dexbot.metadata_cache import load_assets
 
 from bitshares.instance import shared_bitshares_instance
 from bitshares.account import Account
-from bitshares.asset import Asset
-from bitshares.exceptions import KeyAlreadyInStoreException, AccountDoesNotExistsException, AssetDoesNotExistsException
+from bitshares.exceptions import KeyAlreadyInStoreException, AccountDoesNotExistsException
 from bitsharesbase.account import PrivateKey
 
 
@@ -78,7 +78,7 @@ class ConfigValidator:
             :param str old_worker_name: old name of the worker
         """
         if old_worker_name != worker_name:
-            worker_names = Config().workers_data.keys()
+            worker_names = Config.get_workers_data_file().keys()
             # Check that the name is unique
             if worker_name in worker_names:
                 return False
@@ -91,7 +91,7 @@ class ConfigValidator:
 
             :param str account: bitshares account name
         """
-        workers = Config().workers_data
+        workers = Config.get_workers_data_file()
         for worker_name, worker in workers.items():
             if worker['account'] == account:
                 return False
@@ -102,11 +102,10 @@ class ConfigValidator:
 
             :param str asset: asset name
         """
-        try:
-            Asset(asset, bitshares_instance=self.bitshares)
-            return True
-        except AssetDoesNotExistsException:
+        if not asset:
             return False
+        # Assets come from the metadata cache when it is enabled
+        return load_assets(self.bitshares, [asset])[asset] is not None
 
     @staticmethod
     def validate_market(base_asset, quote_asset):
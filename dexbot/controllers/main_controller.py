@@ -1,3 +1,4 @@
+import copy
 import os
 import logging
 import sys
@@ -59,6 +60,22 @@ class MainController:
         else:
             self.worker_manager = WorkerInfrastructure(config, self.bitshares_instance)
 
+    def reload_config(self):
+        """ Read the config file again, the running workers which were changed or removed in it are restarted or
+            stopped at the next block
+        """
+        self.config.refresh_config()
+        if not self.worker_manager or not self.worker_manager.is_alive():
+            return
+        worker_manager = self.worker_manager
+        with worker_manager.config_lock:
+            running = set(worker_manager.config['workers'])
+        # Workers which are not running in the GUI are not started by the reload
+        config = copy.deepcopy(self.config.dict())
+        config['workers'] = {worker_name: worker for worker_name, worker in config['workers'].items()
+                             if worker_name in running}
+        worker_manager.do_next_tick(lambda: worker_manager.reload_config(config))
+
     def remove_worker(self, worker_name):
         # Todo: Add some threading here so that the GUI doesn't freeze
         if self.worker_manager and self.worker_manager.is_alive():
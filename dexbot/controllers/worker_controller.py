@@ -4,7 +4,7 @@ import re
 from dexbot.views.errors import gui_error
 from dexbot.config import Config
 from dexbot.config_validator import ConfigValidator
-from dexbot.helper import find_external_strategies
+from dexbot.strategy_registry import get_strategy_registry
 from dexbot.views.notice import NoticeDialog
 from dexbot.views.confirmation import ConfirmationDialog
 from dexbot.views.strategy_form import StrategyFormWidget
@@ -22,7 +22,11 @@ class WorkerController:
 
     @property
     def strategies(self):
-        """ Defines strategies that are configurable from the GUI.
+        return self.get_strategies()
+
+    @staticmethod
+    def get_strategies():
+        """ Defines strategies that are configurable from the GUI, see dexbot.strategy_registry
 
             key: Strategy location in the project
             name: The name that is shown in the GUI for user
@@ -31,32 +35,17 @@ class WorkerController:
             :return: List of strategies
         """
         strategies = collections.OrderedDict()
-        strategies['dexbot.strategies.relative_orders'] = {
-            'name': 'Relative Orders',
-            'form_module': 'dexbot.views.ui.forms.relative_orders_widget_ui'
-        }
-        strategies['dexbot.strategies.staggered_orders'] = {
-            'name': 'Staggered Orders',
-            'form_module': ''
-        }
-        for desc, module in find_external_strategies():
-            strategies[module] = {'name': desc, 'form_module': module}
-            # if there is no UI form in the module then GUI will gracefully revert to auto-ui
+        for strategy in get_strategy_registry().strategies().values():
+            strategies[strategy.module] = {'name': strategy.name, 'form_module': strategy.form_module}
         return strategies
 
-    @classmethod
-    def get_strategies(cls):
-        """ Class method for getting the strategies
-        """
-        return cls(None, None, None).strategies
-
     @staticmethod
     def get_unique_worker_name():
         """ Returns unique worker name "Worker %n"
             %n is the next available index
         """
         index = 1
-        workers = Config().workers_data.keys()
+        workers = Config.get_workers_data_file().keys()
         worker_name = "Worker {0}".format(index)
         while worker_name in workers:
             worker_name = "Worker {0}".format(index)
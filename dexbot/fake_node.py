@@ -0,0 +1,885 @@
+import asyncio
+import copy
+import datetime
+import hashlib
+import json
+import logging
+import threading
+from fractions import Fraction
+
+from aiohttp import web
+from bitsharesapi.websocket import BitSharesWebsocket
+from bitsharesbase.chains import known_chains
+from bitsharesbase.operationids import operations
+
+from dexbot.clock import get_clock
+
+log = logging.getLogger(__name__)
+
+CHAIN_ID = known_chains['BTS']['chain_id']
+CORE_SYMBOL = 'BTS'
+
+# Fee charged in the core asset for every operation
+OPERATION_FEE = 100
+
+# Callback numbers of the notifications, same as in BitSharesWebsocket subscriptions
+OBJECT_NOTICE = BitSharesWebsocket.__events__.index('on_object')
+BLOCK_NOTICE = BitSharesWebsocket.__events__.index('on_block')
+
+# Seconds orders live by default
+DEFAULT_EXPIRATION = 60 * 60 * 24 * 365
+
+
+class ChainError(Exception):
+    """ Raised when an operation or a call is rejected, returned to the client as an RPC error
+    """
+    pass
+
+
+def format_time(timestamp):
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class FakeChain:
+    """ In-memory BitShares chain implementing the part of the protocol used by the bot
+
+        Limit orders are matched at the price of the maker. Signatures are not verified, the transactions are
+        applied as soon as they are broadcasted and included in the next block.
+
+        :param Clock clock: Time of the chain, the clock of the process by default
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or get_clock()
+        self.objects = {}
+        self.next_ids = {}
+        self.assets_by_symbol = {}
+        self.accounts_by_name = {}
+        # Account id => {asset id: amount}
+        self.balances = {}
+        self.limit_orders = {}
+        self.fills = []
+        # Account id => operation fees paid in the core asset
+        self.operation_fees = {}
+        self.head_block_number = 0
+        self.head_block_id = '0' * 40
+        self.pending_transactions = []
+        # Called with (kind, data) on every change: 'block', 'market' and 'account'
+        self.listeners = []
+
+        self.objects['2.0.0'] = {
+            'id': '2.0.0',
+            'parameters': {
+                'current_fees': {
+                    'parameters': [[operation_id, {'fee': OPERATION_FEE}] for operation_id in operations.values()],
+                    'scale': 10000,
+                },
+                'block_interval': 3,
+                'maintenance_interval': 3600,
+            },
+            'next_available_vote_id': 0,
+            'active_committee_members': [],
+            'active_witnesses': [],
+        }
+        self.create_asset(CORE_SYMBOL, 5, supply=10 ** 15)
+        self.create_account('committee-account')
+        self.objects['2.8.0'] = {'id': '2.8.0'}
+        self.update_dynamic_properties()
+
+    # Objects
+
+    def new_id(self, space):
+        number = self.next_ids.get(space, 0)
+        self.next_ids[space] = number + 1
+        return '{}.{}'.format(space, number)
+
+    def get_object(self, object_id):
+        if object_id.startswith('1.7.'):
+            return self.limit_orders.get(object_id)
+        if object_id.startswith('2.5.'):
+            return self._balance_object(object_id)
+        return self.objects.get(object_id)
+
+    def update_dynamic_properties(self):
+        now = self.clock.time()
+        self.objects['2.1.0'] = {
+            'id': '2.1.0',
+            'head_block_number': self.head_block_number,
+            'head_block_id': self.head_block_id,
+            'time': format_time(now),
+            'current_witness': '1.6.0',
+            'next_maintenance_time': format_time(now + 3600),
+            'last_budget_time': format_time(now),
+            'witness_budget': 0,
+            'accounts_registered_this_interval': 0,
+            'recently_missed_count': 0,
+            'current_aslot': self.head_block_number,
+            'recent_slots_filled': str(2 ** 128 - 1),
+            'dynamic_flags': 0,
+            'last_irreversible_block_num': max(self.head_block_number - 1, 0),
+        }
+
+    # Setup
+
+    def create_asset(self, symbol, precision, supply=0, market_fee_percent=0):
+        """ Create an user issued asset
+
+            :param str symbol: Asset symbol
+            :param int precision: Number of decimals
+            :param int supply: Current supply in satoshis
+            :param int market_fee_percent: Fee charged from the receivers of the asset in fills, in hundredths of
+                a percent like on the chain
+            :return str: Asset id
+        """
+        asset_id = self.new_id('1.3')
+        dynamic_id = '2.3.' + asset_id.split('.')[2]
+        self.objects[asset_id] = {
+            'id': asset_id,
+            'symbol': symbol,
+            'precision': precision,
+            'issuer': '1.2.0',
+            'options': {
+                'max_supply': str(10 ** 15),
+                'market_fee_percent': market_fee_percent,
+                'max_market_fee': str(10 ** 15) if market_fee_percent else '0',
+                'issuer_permissions': 0,
+                'flags': 0,
+                'core_exchange_rate': {
+                    'base': {'amount': 1, 'asset_id': '1.3.0'},
+                    'quote': {'amount': 1, 'asset_id': asset_id},
+                },
+                'whitelist_authorities': [],
+                'blacklist_authorities': [],
+                'whitelist_markets': [],
+                'blacklist_markets': [],
+                'description': '',
+                'extensions': [],
+            },
+            'dynamic_asset_data_id': dynamic_id,
+        }
+        self.objects[dynamic_id] = {
+            'id': dynamic_id,
+            'current_supply': str(supply),
+            'confidential_supply': '0',
+            'accumulated_fees': 0,
+            'fee_pool': 0,
+        }
+        self.assets_by_symbol[symbol] = asset_id
+        return asset_id
+
+    def create_account(self, name, public_key=None, balances=None):
+        """ Create an account
+
+            :param str name: Account name
+            :param str public_key: Owner, active and memo key
+            :param dict balances: Symbol => amount in satoshis
+            :return str: Account id
+        """
+        account_id = self.new_id('1.2')
+        statistics_id = '2.6.' + account_id.split('.')[2]
+        authority = {
+            'weight_threshold': 1,
+            'account_auths': [],
+            'key_auths': [[public_key, 1]] if public_key else [],
+            'address_auths': [],
+        }
+        self.objects[account_id] = {
+            'id': account_id,
+            'membership_expiration_date': '1969-12-31T23:59:59',
+            'registrar': '1.2.0',
+            'referrer': '1.2.0',
+            'lifetime_referrer': '1.2.0',
+            'network_fee_percentage': 2000,
+            'lifetime_referrer_fee_percentage': 3000,
+            'referrer_rewards_percentage': 0,
+            'name': name,
+            'owner': authority,
+            'active': copy.deepcopy(authority),
+            'options': {
+                'memo_key': public_key or 'BTS1111111111111111111111111111111114T1Anm',
+                'voting_account': '1.2.5',
+                'num_witness': 0,
+                'num_committee': 0,
+                'votes': [],
+                'extensions': [],
+            },
+            'statistics': statistics_id,
+            'whitelisting_accounts': [],
+            'blacklisting_accounts': [],
+            'whitelisted_accounts': [],
+            'blacklisted_accounts': [],
+            'owner_special_authority': [0, {}],
+            'active_special_authority': [0, {}],
+            'top_n_control_flags': 0,
+        }
+        self.objects[statistics_id] = {
+            'id': statistics_id,
+            'owner': account_id,
+            'most_recent_op': '2.9.0',
+            'total_ops': 0,
+            'removed_ops': 0,
+            'total_core_in_orders': 0,
+            'lifetime_fees_paid': 0,
+            'pending_fees': 0,
+            'pending_vested_fees': 0,
+        }
+        self.accounts_by_name[name] = account_id
+        self.balances[account_id] = {}
+        for symbol, amount in (balances or {}).items():
+            self.balances[account_id][self.assets_by_symbol[symbol]] = int(amount)
+        return account_id
+
+    def issue(self, account, symbol, amount):
+        """ Add to the balance of the account
+
+            :param str account: Account name or id
+            :param str symbol: Asset symbol
+            :param int amount: Amount in satoshis
+        """
+        account_id = self.resolve_account(account)
+        asset_id = self.assets_by_symbol[symbol]
+        self.balances[account_id][asset_id] = self.balances[account_id].get(asset_id, 0) + int(amount)
+        self.notify_account(account_id)
+
+    # Lookups
+
+    def resolve_account(self, name_or_id):
+        if name_or_id in self.objects:
+            return name_or_id
+        if name_or_id in self.accounts_by_name:
+            return self.accounts_by_name[name_or_id]
+        raise ChainError('Account {} does not exist'.format(name_or_id))
+
+    def resolve_asset(self, symbol_or_id):
+        if symbol_or_id in self.objects:
+            return symbol_or_id
+        if symbol_or_id in self.assets_by_symbol:
+            return self.assets_by_symbol[symbol_or_id]
+        raise ChainError('Asset {} does not exist'.format(symbol_or_id))
+
+    def _balance_object(self, object_id):
+        # Balance objects are numbered by account and asset, 2.5.<account>_<asset> is not a valid id on the real
+        # chain but nothing in the bot relies on its format
+        for account_id, balances in self.balances.items():
+            for asset_id, amount in balances.items():
+                if self.balance_id(account_id, asset_id) == object_id:
+                    return {'id': object_id, 'owner': account_id, 'asset_type': asset_id, 'balance': amount}
+        return None
+
+    @staticmethod
+    def balance_id(account_id, asset_id):
+        return '2.5.{}{:04d}'.format(account_id.split('.')[2], int(asset_id.split('.')[2]))
+
+    def get_balances(self, account_id):
+        return [
+            {'id': self.balance_id(account_id, asset_id), 'owner': account_id, 'asset_type': asset_id,
+             'balance': amount}
+            for asset_id, amount in sorted(self.balances[account_id].items()) if amount
+        ]
+
+    def get_account_orders(self, account_id):
+        return [order for order in self.limit_orders.values() if order['seller'] == account_id]
+
+    def get_market_orders(self, sell_asset_id, receive_asset_id):
+        """ Orders selling one asset for the other, best price first
+        """
+        orders = [
+            order for order in self.limit_orders.values()
+            if order['sell_price']['base']['asset_id'] == sell_asset_id
+            and order['sell_price']['quote']['asset_id'] == receive_asset_id
+        ]
+        return sorted(orders, key=lambda order: (-self.order_price(order), order['id']))
+
+    @staticmethod
+    def order_price(order):
+        """ Amount of the sold asset per unit of the received asset, high is good for the buyer
+        """
+        sell_price = order['sell_price']
+        return Fraction(int(sell_price['base']['amount']), int(sell_price['quote']['amount']))
+
+    def amount_to_real(self, amount, asset_id):
+        return int(amount) / 10 ** self.objects[asset_id]['precision']
+
+    # Operations
+
+    def push_transaction(self, transaction):
+        """ Apply the operations of a transaction, all or none
+
+            :param dict transaction: Signed transaction as JSON
+            :return list: Operation results
+        """
+        saved_state = (copy.deepcopy(self.balances), copy.deepcopy(self.limit_orders), list(self.fills),
+                       dict(self.next_ids), dict(self.operation_fees))
+        events = []
+        try:
+            results = [self.apply_operation(operation, events) for operation in transaction['operations']]
+        except Exception:
+            self.balances, self.limit_orders, self.fills, self.next_ids, self.operation_fees = saved_state
+            raise
+
+        transaction = dict(transaction, operation_results=results)
+        self.pending_transactions.append(transaction)
+        for kind, data in events:
+            self.notify(kind, data)
+        return transaction
+
+    def apply_operation(self, operation, events):
+        operation_id, data = operation
+        if operation_id == operations['limit_order_create']:
+            return self.limit_order_create(data, events)
+        elif operation_id == operations['limit_order_cancel']:
+            return self.limit_order_cancel(data, events)
+        raise ChainError('Operation {} is not supported'.format(operation_id))
+
+    def pay_fee(self, account_id, events):
+        self.withdraw(account_id, '1.3.0', OPERATION_FEE)
+        self.operation_fees[account_id] = self.operation_fees.get(account_id, 0) + OPERATION_FEE
+        events.append(('account', account_id))
+
+    def withdraw(self, account_id, asset_id, amount):
+        balance = self.balances[account_id].get(asset_id, 0)
+        if balance < amount:
+            raise ChainError('Insufficient Balance: {} has {} of {}, needs {}'.format(
+                account_id, balance, asset_id, amount))
+        self.balances[account_id][asset_id] = balance - amount
+
+    def deposit(self, account_id, asset_id, amount):
+        self.balances[account_id][asset_id] = self.balances[account_id].get(asset_id, 0) + amount
+
+    def limit_order_create(self, data, events):
+        account_id = self.resolve_account(data['seller'])
+        sell = data['amount_to_sell']
+        receive = data['min_to_receive']
+        if int(sell['amount']) <= 0 or int(receive['amount']) <= 0:
+            raise ChainError('Invalid order amounts')
+
+        self.pay_fee(account_id, events)
+        self.withdraw(account_id, sell['asset_id'], int(sell['amount']))
+
+        order_id = self.new_id('1.7')
+        expiration = data.get('expiration') or format_time(self.clock.time() + DEFAULT_EXPIRATION)
+        order = {
+            'id': order_id,
+            'expiration': expiration,
+            'seller': account_id,
+            'for_sale': int(sell['amount']),
+            'sell_price': {
+                'base': {'amount': int(sell['amount']), 'asset_id': sell['asset_id']},
+                'quote': {'amount': int(receive['amount']), 'asset_id': receive['asset_id']},
+            },
+            'deferred_fee': 0,
+        }
+        self.limit_orders[order_id] = order
+        market = (sell['asset_id'], receive['asset_id'])
+        events.append(('market', (market, [dict(order)])))
+
+        self.match(order, events)
+
+        if order_id in self.limit_orders and data.get('fill_or_kill'):
+            raise ChainError('Fill or kill order was not filled')
+        return [1, order_id]
+
+    def limit_order_cancel(self, data, events):
+        account_id = self.resolve_account(data['fee_paying_account'])
+        order = self.limit_orders.get(data['order'])
+        if order is None or order['seller'] != account_id:
+            raise ChainError('Limit order {} does not exist'.format(data['order']))
+
+        self.pay_fee(account_id, events)
+        del self.limit_orders[order['id']]
+        asset_id = order['sell_price']['base']['asset_id']
+        self.deposit(account_id, asset_id, order['for_sale'])
+        events.append(('account', account_id))
+        return [2, {'amount': order['for_sale'], 'asset_id': asset_id}]
+
+    def match(self, taker, events):
+        """ Fill the new order against the orders on the other side of the book
+        """
+        sell_asset = taker['sell_price']['base']['asset_id']
+        receive_asset = taker['sell_price']['quote']['asset_id']
+        # Taker wants at least this much of the received asset per unit sold
+        taker_price = Fraction(int(taker['sell_price']['quote']['amount']), int(taker['sell_price']['base']['amount']))
+
+        for maker in self.get_market_orders(receive_asset, sell_asset):
+            if taker['for_sale'] <= 0:
+                break
+            # Maker gives this much of the received asset per unit of the taker's asset
+            maker_price = self.order_price(maker)
+            if maker_price < taker_price:
+                break
+
+            taker_receives = int(taker['for_sale'] * maker_price)
+            if taker_receives >= maker['for_sale']:
+                taker_receives = maker['for_sale']
+                taker_pays = min(-(-taker_receives // maker_price), taker['for_sale'])
+            else:
+                taker_pays = taker['for_sale']
+            taker_pays = int(taker_pays)
+            if taker_receives <= 0:
+                break
+
+            taker['for_sale'] -= taker_pays
+            maker['for_sale'] -= taker_receives
+            taker_fee = self.market_fee(receive_asset, taker_receives)
+            maker_fee = self.market_fee(sell_asset, taker_pays)
+            self.deposit(taker['seller'], receive_asset, taker_receives - taker_fee)
+            self.deposit(maker['seller'], sell_asset, taker_pays - maker_fee)
+
+            fills = [
+                self.fill(maker, pays=(taker_receives, receive_asset), receives=(taker_pays, sell_asset),
+                          fee=maker_fee, is_maker=True),
+                self.fill(taker, pays=(taker_pays, sell_asset), receives=(taker_receives, receive_asset),
+                          fee=taker_fee, is_maker=False),
+            ]
+            events.append(('market', ((sell_asset, receive_asset), fills)))
+            events.append(('account', maker['seller']))
+            events.append(('account', taker['seller']))
+
+            if self.is_dust(maker):
+                self.close_order(maker)
+        if self.is_dust(taker):
+            self.close_order(taker)
+
+    def market_fee(self, asset_id, amount):
+        options = self.objects[asset_id]['options']
+        return min(amount * options['market_fee_percent'] // 10000, int(options['max_market_fee']))
+
+    def fill(self, order, pays, receives, fee, is_maker):
+        fill = {
+            'fee': {'amount': fee, 'asset_id': receives[1]},
+            'order_id': order['id'],
+            'account_id': order['seller'],
+            'pays': {'amount': pays[0], 'asset_id': pays[1]},
+            'receives': {'amount': receives[0], 'asset_id': receives[1]},
+            'fill_price': order['sell_price'],
+            'is_maker': is_maker,
+        }
+        self.fills.append(dict(fill, block_num=self.head_block_number + 1, time=format_time(self.clock.time())))
+        return fill
+
+    def is_dust(self, order):
+        # An order which can't receive a single satoshi anymore is closed
+        sell_price = order['sell_price']
+        return order['for_sale'] * int(sell_price['quote']['amount']) < int(sell_price['base']['amount'])
+
+    def close_order(self, order):
+        if order['id'] in self.limit_orders:
+            del self.limit_orders[order['id']]
+            self.deposit(order['seller'], order['sell_price']['base']['asset_id'], order['for_sale'])
+            order['for_sale'] = 0
+
+    # Blocks
+
+    def produce_block(self):
+        """ Include the pending transactions in a new block
+
+            :return list: Transactions of the block
+        """
+        transactions, self.pending_transactions = self.pending_transactions, []
+        self.head_block_number += 1
+        self.head_block_id = '{:08x}'.format(self.head_block_number) + hashlib.sha1(
+            str(self.head_block_number).encode()).hexdigest()[8:]
+        self.update_dynamic_properties()
+        self.notify('block', self.head_block_id)
+        return transactions
+
+    # Notifications
+
+    def notify(self, kind, data):
+        for listener in list(self.listeners):
+            listener(kind, data)
+
+    def notify_account(self, account_id):
+        self.notify('account', account_id)
+
+    def account_notice(self, account_id):
+        statistics = dict(self.objects[self.objects[account_id]['statistics']])
+        statistics['total_ops'] += 1
+        self.objects[statistics['id']] = statistics
+        return statistics
+
+
+class FakeNode:
+    """ Websocket JSON-RPC server on top of a :class:`FakeChain`, runs its own event loop in a thread
+
+        Implements the database, network_broadcast and history calls used by the bot and the
+        market, account and block notifications of BitSharesWebsocket.
+
+        :param FakeChain chain: Chain to serve, a new chain by default
+        :param float block_interval: Seconds between blocks, blocks are only produced by :meth:`produce_block`
+            and by synchronous broadcasts when None
+        :param float latency: Seconds added before every reply, to emulate a remote node
+    """
+
+    def __init__(self, chain=None, block_interval=None, latency=0):
+        self.chain = chain or FakeChain()
+        self.block_interval = block_interval
+        self.latency = latency
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+        self.port = None
+        self.sessions = set()
+        self.calls = 0
+        self.block_produced = None
+        self.chain.listeners.append(self.on_chain_event)
+
+        started = threading.Event()
+        self.thread = threading.Thread(target=self._run, args=(started,), name='fake-node', daemon=True)
+        self.thread.start()
+        if not started.wait(10):
+            raise RuntimeError('Fake node did not start')
+
+    @property
+    def url(self):
+        return 'ws://127.0.0.1:{}'.format(self.port)
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        self.block_produced = asyncio.Event()
+        app = web.Application()
+        app.router.add_get('/', self.handle)
+        self.runner = web.AppRunner(app, access_log=None)
+        self.loop.run_until_complete(self.runner.setup())
+        # Don't wait for the handlers of clients which keep their connection open on close()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0, shutdown_timeout=1)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        if self.block_interval:
+            asyncio.ensure_future(self.produce_blocks())
+        started.set()
+        self.loop.run_forever()
+
+    def call(self, func, *args):
+        """ Run a function on the node loop, e.g. to set up the chain while clients are connected
+        """
+        async def run():
+            return func(*args)
+        return asyncio.run_coroutine_threadsafe(run(), self.loop).result(10)
+
+    def produce_block(self):
+        return self.call(self.chain.produce_block)
+
+    def close(self):
+        async def shutdown():
+            await asyncio.gather(*(asyncio.wait_for(session.close(), 1) for session in list(self.sessions)),
+                                 return_exceptions=True)
+            await self.runner.cleanup()
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop).result(10)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+    async def produce_blocks(self):
+        while True:
+            await asyncio.sleep(self.block_interval)
+            self.chain.produce_block()
+
+    async def handle(self, request):
+        # Clients which don't answer the close handshake are dropped after a second
+        connection = web.WebSocketResponse(timeout=1)
+        await connection.prepare(request)
+        session = NodeSession(self, connection)
+        self.sessions.add(session)
+        try:
+            async for message in connection:
+                if message.type == web.WSMsgType.TEXT:
+                    asyncio.ensure_future(session.on_request(message.data))
+        finally:
+            self.sessions.discard(session)
+        return connection
+
+    def on_chain_event(self, kind, data):
+        if kind == 'block':
+            self.block_produced.set()
+            self.block_produced = asyncio.Event()
+        for session in list(self.sessions):
+            session.on_chain_event(kind, data)
+
+
+class NodeSession:
+    """ One client connection of the fake node with its subscriptions
+    """
+
+    def __init__(self, node, connection):
+        self.node = node
+        self.chain = node.chain
+        self.connection = connection
+        self.object_callback = None
+        self.block_callback = None
+        self.market_callbacks = {}
+        self.accounts = set()
+        # Replies and notices are sent in order
+        self.lock = asyncio.Lock()
+
+    async def send(self, payload):
+        async with self.lock:
+            if not self.connection.closed:
+                await self.connection.send_str(json.dumps(payload))
+
+    async def close(self):
+        await self.connection.close()
+
+    async def on_request(self, message):
+        request = json.loads(message)
+        self.node.calls += 1
+        if self.node.latency:
+            await asyncio.sleep(self.node.latency)
+
+        api, method, args = request['params']
+        try:
+            handler = getattr(self, 'rpc_' + method, None)
+            if handler is None:
+                raise ChainError('no method with name \'{}\''.format(method))
+            result = handler(*args)
+            if asyncio.iscoroutine(result):
+                result = await result
+        except ChainError as exception:
+            await self.send({'id': request['id'], 'jsonrpc': '2.0',
+                             'error': {'code': 1, 'message': str(exception), 'detail': str(exception)}})
+            return
+        except Exception as exception:
+            log.exception('Fake node failed in {}'.format(method))
+            await self.send({'id': request['id'], 'jsonrpc': '2.0',
+                             'error': {'code': 2, 'message': repr(exception)}})
+            return
+        await self.send({'id': request['id'], 'jsonrpc': '2.0', 'result': result})
+
+    def on_chain_event(self, kind, data):
+        if kind == 'block' and self.block_callback is not None:
+            asyncio.ensure_future(self.send({'method': 'notice', 'params': [self.block_callback, [data]]}))
+        elif kind == 'market':
+            (sell_asset, receive_asset), items = data
+            callback = self.market_callbacks.get(frozenset((sell_asset, receive_asset)))
+            if callback is not None:
+                asyncio.ensure_future(self.send({'method': 'notice', 'params': [callback, [items]]}))
+        elif kind == 'account' and data in self.accounts and self.object_callback is not None:
+            notice = self.chain.account_notice(data)
+            asyncio.ensure_future(self.send({'method': 'notice', 'params': [self.object_callback, [[notice]]]}))
+
+    # Login and api ids
+
+    def rpc_login(self, user, password):
+        return True
+
+    def rpc_database(self):
+        return 1
+
+    def rpc_network_broadcast(self):
+        return 2
+
+    def rpc_history(self):
+        return 3
+
+    # Subscriptions
+
+    def rpc_set_subscribe_callback(self, callback, clear_filter):
+        self.object_callback = callback
+
+    def rpc_set_pending_transaction_callback(self, callback):
+        pass
+
+    def rpc_set_block_applied_callback(self, callback):
+        self.block_callback = callback
+
+    def rpc_subscribe_to_market(self, callback, base, quote):
+        self.market_callbacks[frozenset((self.chain.resolve_asset(base), self.chain.resolve_asset(quote)))] = callback
+
+    def rpc_unsubscribe_from_market(self, base, quote):
+        self.market_callbacks.pop(frozenset((self.chain.resolve_asset(base), self.chain.resolve_asset(quote))), None)
+
+    def rpc_cancel_all_subscriptions(self):
+        self.object_callback = None
+        self.block_callback = None
+        self.market_callbacks = {}
+        self.accounts = set()
+
+    # Database api
+
+    def rpc_get_chain_properties(self):
+        return {'id': '2.11.0', 'chain_id': CHAIN_ID, 'immutable_parameters': {}}
+
+    def rpc_get_chain_id(self):
+        return CHAIN_ID
+
+    def rpc_get_config(self):
+        return {'GRAPHENE_SYMBOL': CORE_SYMBOL, 'GRAPHENE_ADDRESS_PREFIX': 'BTS'}
+
+    def rpc_get_dynamic_global_properties(self):
+        return self.chain.objects['2.1.0']
+
+    def rpc_get_global_properties(self):
+        return self.chain.objects['2.0.0']
+
+    def rpc_get_objects(self, object_ids):
+        return [self.chain.get_object(object_id) for object_id in object_ids]
+
+    def rpc_get_block_header(self, block_number):
+        return {'previous': '0' * 40, 'timestamp': self.chain.objects['2.1.0']['time'], 'witness': '1.6.0',
+                'transaction_merkle_root': '0' * 40, 'extensions': []}
+
+    def rpc_get_block(self, block_number):
+        return dict(self.rpc_get_block_header(block_number), transactions=[])
+
+    def rpc_lookup_asset_symbols(self, symbols_or_ids):
+        assets = []
+        for symbol in symbols_or_ids:
+            try:
+                assets.append(self.chain.objects[self.chain.resolve_asset(symbol)])
+            except ChainError:
+                assets.append(None)
+        return assets
+
+    def rpc_get_assets(self, asset_ids):
+        return self.rpc_lookup_asset_symbols(asset_ids)
+
+    def rpc_lookup_account_names(self, names):
+        return [self.chain.objects.get(self.chain.accounts_by_name.get(name)) for name in names]
+
+    def rpc_get_account_by_name(self, name):
+        return self.rpc_lookup_account_names([name])[0]
+
+    def rpc_get_key_references(self, public_keys):
+        references = []
+        for public_key in public_keys:
+            references.append([
+                account['id'] for account in self.chain.objects.values()
+                if account['id'].startswith('1.2.') and [public_key, 1] in account['active']['key_auths']
+            ])
+        return references
+
+    def rpc_get_full_accounts(self, names_or_ids, subscribe):
+        accounts = []
+        for name_or_id in names_or_ids:
+            try:
+                account_id = self.chain.resolve_account(name_or_id)
+            except ChainError:
+                continue
+            if subscribe:
+                self.accounts.add(account_id)
+            account = self.chain.objects[account_id]
+            accounts.append([name_or_id, {
+                'account': account,
+                'statistics': self.chain.objects[account['statistics']],
+                'registrar_name': 'committee-account',
+                'referrer_name': 'committee-account',
+                'lifetime_referrer_name': 'committee-account',
+                'votes': [],
+                'balances': self.chain.get_balances(account_id),
+                'vesting_balances': [],
+                'limit_orders': self.chain.get_account_orders(account_id),
+                'call_orders': [],
+                'settle_orders': [],
+                'proposals': [],
+                'assets': [],
+                'withdraws': [],
+            }])
+        return accounts
+
+    def rpc_get_account_balances(self, account_id, asset_ids):
+        balances = self.chain.balances[self.chain.resolve_account(account_id)]
+        if not asset_ids:
+            asset_ids = sorted(balances)
+        return [{'amount': balances.get(asset_id, 0), 'asset_id': asset_id} for asset_id in asset_ids]
+
+    def rpc_get_named_account_balances(self, name, asset_ids):
+        return self.rpc_get_account_balances(name, asset_ids)
+
+    def rpc_get_limit_orders(self, asset_a, asset_b, limit):
+        asset_a, asset_b = self.chain.resolve_asset(asset_a), self.chain.resolve_asset(asset_b)
+        return (self.chain.get_market_orders(asset_a, asset_b)[:limit] +
+                self.chain.get_market_orders(asset_b, asset_a)[:limit])
+
+    def rpc_get_call_orders(self, asset_id, limit):
+        return []
+
+    def rpc_get_settle_orders(self, asset_id, limit):
+        return []
+
+    def rpc_get_order_book(self, base, quote, limit):
+        base_id, quote_id = self.chain.resolve_asset(base), self.chain.resolve_asset(quote)
+        book = {'base': base, 'quote': quote, 'bids': [], 'asks': []}
+        # Bids sell the base asset, asks sell the quote asset
+        for side, sell_id, receive_id in (('bids', base_id, quote_id), ('asks', quote_id, base_id)):
+            for order in self.chain.get_market_orders(sell_id, receive_id)[:limit]:
+                price = order['sell_price']
+                for_sale = self.chain.amount_to_real(order['for_sale'], sell_id)
+                rate = (self.chain.amount_to_real(price['quote']['amount'], receive_id) /
+                        self.chain.amount_to_real(price['base']['amount'], sell_id))
+                if side == 'bids':
+                    base_amount, quote_amount, real_price = for_sale, for_sale * rate, 1 / rate
+                else:
+                    base_amount, quote_amount, real_price = for_sale * rate, for_sale, rate
+                book[side].append({'price': repr(real_price), 'quote': repr(quote_amount), 'base': repr(base_amount)})
+        return book
+
+    def rpc_get_ticker(self, base, quote):
+        book = self.rpc_get_order_book(base, quote, 1)
+        highest_bid = book['bids'][0]['price'] if book['bids'] else '0'
+        lowest_ask = book['asks'][0]['price'] if book['asks'] else '0'
+        base_id, quote_id = self.chain.resolve_asset(base), self.chain.resolve_asset(quote)
+        latest = '0'
+        for fill in reversed(self.chain.fills):
+            if {fill['pays']['asset_id'], fill['receives']['asset_id']} == {base_id, quote_id}:
+                amounts = {fill['pays']['asset_id']: fill['pays'], fill['receives']['asset_id']: fill['receives']}
+                latest = repr(self.chain.amount_to_real(amounts[base_id]['amount'], base_id) /
+                              self.chain.amount_to_real(amounts[quote_id]['amount'], quote_id))
+                break
+        return {
+            'time': self.chain.objects['2.1.0']['time'],
+            'base': base,
+            'quote': quote,
+            'latest': latest,
+            'lowest_ask': lowest_ask,
+            'highest_bid': highest_bid,
+            'percent_change': '0',
+            'base_volume': '0',
+            'quote_volume': '0',
+        }
+
+    def rpc_get_24_volume(self, base, quote):
+        return {'time': self.chain.objects['2.1.0']['time'], 'base': base, 'quote': quote,
+                'base_volume': '0', 'quote_volume': '0'}
+
+    def rpc_get_required_fees(self, operations, asset_id):
+        return [{'amount': OPERATION_FEE, 'asset_id': '1.3.0'} for _ in operations]
+
+    def rpc_get_potential_signatures(self, transaction):
+        return []
+
+    def rpc_verify_authority(self, transaction):
+        return True
+
+    # History api
+
+    def rpc_get_account_history(self, account, stop, limit, start):
+        return []
+
+    def rpc_get_fill_order_history(self, base, quote, limit):
+        base_id, quote_id = self.chain.resolve_asset(base), self.chain.resolve_asset(quote)
+        fills = [
+            {'id': '0.0.{}'.format(number), 'key': {}, 'time': fill['time'],
+             'op': {key: value for key, value in fill.items() if key not in ('time', 'block_num')}}
+            for number, fill in enumerate(self.chain.fills)
+            if {fill['pays']['asset_id'], fill['receives']['asset_id']} == {base_id, quote_id}
+        ]
+        return list(reversed(fills))[:limit]
+
+    def rpc_get_trade_history(self, base, quote, start, stop, limit):
+        return []
+
+    # Network broadcast api
+
+    def rpc_broadcast_transaction(self, transaction):
+        self.chain.push_transaction(transaction)
+
+    async def rpc_broadcast_transaction_synchronous(self, transaction):
+        transaction = self.chain.push_transaction(transaction)
+        if self.node.block_interval:
+            await self.node.block_produced.wait()
+        else:
+            self.chain.produce_block()
+        return {
+            'id': hashlib.sha1(json.dumps(transaction, sort_keys=True).encode()).hexdigest(),
+            'block_num': self.chain.head_block_number,
+            'trx_num': 0,
+            'trx': transaction,
+        }
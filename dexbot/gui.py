@@ -4,6 +4,7 @@ from dexbot.config import Config
 from dexbot.controllers.main_controller import MainController
 from dexbot.views.worker_list import MainView
 from dexbot.controllers.wallet_controller import WalletController
+from dexbot.metadata_cache import set_metadata_cache, user_metadata_cache
 from dexbot.views.unlock_wallet import UnlockWalletView
 from dexbot.views.create_wallet import CreateWalletView
 
@@ -16,6 +17,8 @@ class App(QApplication):
         super(App, self).__init__(sys_argv)
 
         config = Config()
+        if config.get('metadata_cache', True):
+            set_metadata_cache(user_metadata_cache())
         bitshares_instance = BitShares(config['node'], num_retries=-1)
 
         # Wallet unlock
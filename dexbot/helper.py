@@ -77,24 +77,16 @@ def initialize_orders_log():
         logger.info("worker_name;ID;operation_type;base_asset;base_amount;quote_asset;quote_amount;timestamp")
 
 
-try:
-    # Unfortunately setuptools is only "kinda-sorta" a standard module
-    # it's available on pretty much any modern Python system, but some embedded Pythons may not have it
-    # so we make it a soft-dependency
-    import pkg_resources
-
-    def find_external_strategies():
-        """Use setuptools introspection to find third-party strategies the user may have installed.
-        Packages that provide a strategy should export a setuptools "entry point" (see setuptools docs)
-        with group "dexbot.strategy", "name" is the display name of the strategy. 
-        Only set the module not any attribute (because it would always be a class called "Strategy")
-        If you want a handwritten graphical UI, define "Ui_Form" and "StrategyController" in the same module
-
-        yields a 2-tuple: description, module name"""
-        for entry_point in pkg_resources.iter_entry_points("dexbot.strategy"):
-            yield (entry_point.name, entry_point.module_name)
-
-except ImportError:
-    # Our system doesn't have setuptools, so no way to find external strategies
-    def find_external_strategies():
-        return []
+def find_external_strategies():
+    """Use setuptools introspection to find third-party strategies the user may have installed.
+    Packages that provide a strategy should export a setuptools "entry point" (see setuptools docs)
+    with group "dexbot.strategy", "name" is the display name of the strategy.
+    Only set the module not any attribute (because it would always be a class called "Strategy")
+    If you want a handwritten graphical UI, define "Ui_Form" and "StrategyController" in the same module
+
+    The installed packages are scanned by the strategy registry, see dexbot.strategy_registry.
+
+    returns a list of 2-tuples: description, module name"""
+    from dexbot.strategy_registry import BUILTIN_STRATEGIES, get_strategy_registry
+    return [(entry.name, entry.module) for entry in get_strategy_registry().strategies().values()
+            if entry not in BUILTIN_STRATEGIES]
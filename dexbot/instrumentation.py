@@ -0,0 +1,322 @@
+import bisect
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import threading
+import time
+
+from bitsharesapi.bitsharesnoderpc import BitSharesNodeRPC
+
+from dexbot.helper import get_user_data_directory
+
+log = logging.getLogger(__name__)
+
+# Upper bounds of the histogram buckets in seconds, doubling from 0.1 ms to about a minute
+BUCKETS = [0.0001 * 2 ** exponent for exponent in range(20)]
+
+# Functions listed when a profile is stopped
+PROFILE_TOP_FUNCTIONS = 25
+
+# Seconds between BitShares blocks, blocks dispatched later than this are lagging
+BLOCK_INTERVAL = 3
+
+
+class Histogram:
+    """ Distribution of durations in fixed exponential buckets, cheap enough for every call
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction):
+        """ Return the upper bound of the bucket holding the percentile, the max in the last bucket
+
+            :param float fraction: e.g. 0.99
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'p50': self.percentile(0.5),
+            'p99': self.percentile(0.99),
+            'max': self.max,
+            'buckets': list(zip(BUCKETS + [float('inf')], self.counts)),
+        }
+
+
+class Instrumentation:
+    """ Timings of the worker callbacks, the RPC calls and the database queue of the process
+
+        One cProfile capture at a time can follow the callbacks of a single worker, to find out what a slow worker
+        spends its time on.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.lock = threading.Lock()
+        # (worker name, callback name) => Histogram
+        self.callbacks = {}
+        # RPC method => Histogram
+        self.rpc = {}
+        # Worker name => Histogram of the RPC calls made in its callbacks
+        self.worker_rpc = {}
+        self.db_wait = Histogram()
+        # RPC method => number of calls which raised
+        self.rpc_errors = {}
+        # Delay of the block dispatches beyond the block interval and their duration
+        self.block_lag = Histogram()
+        self.block_dispatch = Histogram()
+        self.last_block = None
+        # External price source => Histogram of the refreshes, number of failed refreshes
+        self.feeds = {}
+        self.feed_errors = {}
+        self.local = threading.local()
+        self.profiler = None
+        self.profiled_worker = None
+        self.profile_started = None
+
+    def observe(self, histograms, key, seconds):
+        with self.lock:
+            histogram = histograms.get(key)
+            if histogram is None:
+                histogram = histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_rpc(self, method, seconds, error=False):
+        if not self.enabled:
+            return
+        self.observe(self.rpc, method, seconds)
+        if error:
+            with self.lock:
+                self.rpc_errors[method] = self.rpc_errors.get(method, 0) + 1
+        worker_name = getattr(self.local, 'worker_name', None)
+        if worker_name:
+            self.observe(self.worker_rpc, worker_name, seconds)
+
+    def observe_db_wait(self, seconds):
+        if self.enabled:
+            with self.lock:
+                self.db_wait.observe(seconds)
+
+    def observe_feed(self, source, seconds, error=False):
+        if not self.enabled:
+            return
+        self.observe(self.feeds, source, seconds)
+        if error:
+            with self.lock:
+                self.feed_errors[source] = self.feed_errors.get(source, 0) + 1
+
+    @contextlib.contextmanager
+    def block(self):
+        """ Time the dispatch of a block and how late it started after the previous one
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started = time.perf_counter()
+        with self.lock:
+            if self.last_block is not None:
+                self.block_lag.observe(max(started - self.last_block - BLOCK_INTERVAL, 0))
+            self.last_block = started
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.block_dispatch.observe(time.perf_counter() - started)
+
+    @contextlib.contextmanager
+    def callback(self, worker_name, callback_name):
+        """ Time a callback of a worker and profile it when the worker is being profiled
+
+            :param str worker_name: Name of the worker
+            :param str callback_name: ontick, onMarketUpdate or onAccount
+        """
+        if not self.enabled:
+            yield
+            return
+
+        profiler = self.profiler if self.profiled_worker == worker_name else None
+        self.local.worker_name = worker_name
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            self.observe(self.callbacks, (worker_name, callback_name), time.perf_counter() - started)
+            self.local.worker_name = None
+
+    def busiest_worker(self):
+        """ Return the name of the worker which spent the most time in its callbacks
+        """
+        with self.lock:
+            totals = {}
+            for (worker_name, _), histogram in self.callbacks.items():
+                totals[worker_name] = totals.get(worker_name, 0) + histogram.total
+        if not totals:
+            return None
+        return max(totals, key=totals.get)
+
+    def start_profile(self, worker_name):
+        """ Profile the callbacks of a worker until :meth:`stop_profile`
+
+            :param str worker_name: Name of the worker
+        """
+        if self.profiler:
+            self.stop_profile()
+        log.info('Profiling worker {}'.format(worker_name))
+        self.profile_started = time.time()
+        self.profiler = cProfile.Profile()
+        self.profiled_worker = worker_name
+
+    def stop_profile(self, directory=None):
+        """ Stop the profile, log the slowest functions and save the stats for pstats or snakeviz
+
+            :param str directory: Directory of the stats file, the user data directory by default
+            :return str: Path of the stats file or None when nothing was profiled
+        """
+        profiler, worker_name = self.profiler, self.profiled_worker
+        self.profiler = self.profiled_worker = None
+        if profiler is None:
+            return None
+
+        if directory is None:
+            directory = os.path.join(get_user_data_directory(), 'profiles')
+        os.makedirs(directory, exist_ok=True)
+        output = io.StringIO()
+        stats = pstats.Stats(profiler, stream=output)
+        if not stats.total_calls:
+            log.info('Worker {} was not called while profiled'.format(worker_name))
+            return None
+
+        path = os.path.join(directory, '{}-{}.prof'.format(worker_name, int(self.profile_started)))
+        stats.dump_stats(path)
+        stats.sort_stats('cumulative').print_stats(PROFILE_TOP_FUNCTIONS)
+        log.info('Profile of worker {} saved to {}\n{}'.format(worker_name, path, output.getvalue()))
+        return path
+
+    def toggle_profile(self, worker_name=None):
+        """ Start profiling a worker, or stop the running profile
+
+            :param str worker_name: Worker to profile, the busiest one by default
+        """
+        if self.profiler:
+            return self.stop_profile()
+        worker_name = worker_name or self.busiest_worker()
+        if worker_name:
+            self.start_profile(worker_name)
+        else:
+            log.warning('No worker has been called yet, nothing to profile')
+        return None
+
+    def snapshot(self):
+        """ Return the summaries of all the histograms
+
+            :return dict: {'callbacks': {worker: {callback: summary}}, 'rpc': {method: summary},
+                'rpc_errors': {method: count}, 'worker_rpc': {worker: summary}, 'db_wait': summary,
+                'block_lag': summary, 'block_dispatch': summary, 'feeds': {source: summary},
+                'feed_errors': {source: count}}
+        """
+        with self.lock:
+            callbacks = {}
+            for (worker_name, callback_name), histogram in self.callbacks.items():
+                callbacks.setdefault(worker_name, {})[callback_name] = histogram.summary()
+            return {
+                'callbacks': callbacks,
+                'rpc': {method: histogram.summary() for method, histogram in self.rpc.items()},
+                'rpc_errors': dict(self.rpc_errors),
+                'worker_rpc': {name: histogram.summary() for name, histogram in self.worker_rpc.items()},
+                'db_wait': self.db_wait.summary(),
+                'block_lag': self.block_lag.summary(),
+                'block_dispatch': self.block_dispatch.summary(),
+                'feeds': {source: histogram.summary() for source, histogram in self.feeds.items()},
+                'feed_errors': dict(self.feed_errors),
+            }
+
+    def format_report(self):
+        """ Return the timings as a table, slowest first
+        """
+        snapshot = self.snapshot()
+        lines = ['{:<40} {:>8} {:>10} {:>10} {:>10}'.format('', 'count', 'total s', 'p50 ms', 'p99 ms')]
+
+        def add(name, summary):
+            lines.append('{:<40} {:>8} {:>10.3f} {:>10.2f} {:>10.2f}'.format(
+                name[:40], summary['count'], summary['total'], summary['p50'] * 1000, summary['p99'] * 1000))
+
+        rows = [('{} {}'.format(worker_name, callback_name), summary)
+                for worker_name, callbacks in snapshot['callbacks'].items()
+                for callback_name, summary in callbacks.items()]
+        rows += [('{} rpc'.format(worker_name), summary) for worker_name, summary in snapshot['worker_rpc'].items()]
+        rows += [('rpc {}'.format(method), summary) for method, summary in snapshot['rpc'].items()]
+        for name, summary in sorted(rows, key=lambda row: row[1]['total'], reverse=True):
+            add(name, summary)
+        add('database queue wait', snapshot['db_wait'])
+        return '\n'.join(lines)
+
+
+class InstrumentedRPC(BitSharesNodeRPC):
+    """ Node connection which times every RPC call
+
+        Not instantiated, :func:`instrument_rpc` switches the class of a connected instance to this one. Calls made
+        by the methods of the connection itself, e.g. get_account, are timed as the underlying API calls.
+    """
+
+    def __getattr__(self, name):
+        func = super().__getattr__(name)
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                _instrumentation.observe_rpc(name, time.perf_counter() - started, error=True)
+                raise
+            _instrumentation.observe_rpc(name, time.perf_counter() - started)
+            return result
+        return call
+
+
+def instrument_rpc(bitshares_instance):
+    """ Time the RPC calls of the instance from now on
+
+        :param bitshares.BitShares bitshares_instance: Instance connected to a node
+    """
+    rpc = bitshares_instance.rpc
+    if type(rpc) is BitSharesNodeRPC:
+        rpc.__class__ = InstrumentedRPC
+
+
+_instrumentation = Instrumentation()
+
+
+def get_instrumentation():
+    """ Return the instrumentation of the process
+    """
+    return _instrumentation
@@ -0,0 +1,175 @@
+import threading
+
+from dexbot.clock import get_clock
+
+from bitshares.account import Account
+from bitshares.amount import Amount
+from bitshares.exceptions import AccountDoesNotExistsException
+from bitshares.instance import BlockchainInstance
+from bitshares.price import Order
+
+# Seconds after which a tracked account is fetched again even when no change was notified
+MAX_AGE = 60
+
+# Keys of get_full_accounts kept besides the account object
+KEPT_KEYS = ('balances', 'limit_orders')
+
+
+class LeanAccount(Account):
+    """ Account holding only the account object, its balances and its open orders
+
+        Account(full=True) also keeps the votes, vesting balances, proposals, statistics etc. of the account and
+        every worker had its own copy. A LeanAccount is shared by all the workers of the account, see
+        :func:`get_lean_account`.
+
+        An untracked account is fetched on every :meth:`ensure_fresh`. Once the worker infrastructure subscribed
+        to the notifications of the account it is tracked: it is only fetched again after a notification or a
+        broadcast of the account invalidated it, so the workers of the account share a single fetch.
+
+        :param str account_name: Name or id of the account
+        :param bitshares.BitShares bitshares_instance: Instance to fetch the account with
+        :param dict full_account: Result of get_full_accounts for the account, fetched when not given
+    """
+
+    def __init__(self, account_name, bitshares_instance=None, full_account=None):
+        BlockchainInstance.__init__(self, bitshares_instance=bitshares_instance)
+        self.full = False
+        self.identifier = account_name
+        # Never fetched again on item access like a lazy BlockchainObject
+        self.cached = True
+        self.tracked = False
+        self.stale = True
+        self.loaded_at = None
+        if full_account:
+            self.load(full_account)
+        else:
+            self.refresh()
+
+    def refresh(self):
+        """ Fetch the account, its balances and its open orders in a single call
+        """
+        self.load(self.fetch())
+
+    def fetch(self):
+        accounts = self.blockchain.rpc.get_full_accounts([self.identifier], False)
+        if not accounts:
+            raise AccountDoesNotExistsException(self.identifier)
+        return accounts[0][1]
+
+    def load(self, full_account):
+        """ Keep what the workers use of a get_full_accounts result
+
+            :param dict full_account: Result for the account
+        """
+        dict.clear(self)
+        dict.update(self, full_account['account'])
+        for key in KEPT_KEYS:
+            self[key] = full_account.get(key, [])
+        self.stale = False
+        self.loaded_at = get_clock().time()
+
+    @property
+    def is_fresh(self):
+        return (self.tracked and not self.stale and self.loaded_at is not None and
+                get_clock().time() - self.loaded_at < MAX_AGE)
+
+    def ensure_fresh(self):
+        if not self.is_fresh:
+            self.refresh()
+
+    def invalidate(self):
+        """ Fetch the account again on the next :meth:`ensure_fresh`, called when it changed
+        """
+        self.stale = True
+
+    @property
+    def balances(self):
+        """ Balances of the account as loaded, as :class:`bitshares.amount.Amount` objects
+        """
+        return [
+            Amount({'amount': balance['balance'], 'asset_id': balance['asset_type']},
+                   bitshares_instance=self.blockchain)
+            for balance in self['balances'] if int(balance['balance']) > 0
+        ]
+
+    @property
+    def openorders(self):
+        """ Open orders of the account as loaded, as :class:`bitshares.price.Order` objects
+        """
+        return [Order(order, bitshares_instance=self.blockchain) for order in self['limit_orders']]
+
+    @property
+    def is_fully_loaded(self):
+        return 'votes' in self
+
+    def ensure_full(self):
+        """ Fetch everything Account(full=True) holds, e.g. for :meth:`callpositions`. The account is lean again
+            when it is fetched the next time.
+        """
+        if not self.is_fully_loaded:
+            full_account = self.fetch()
+            self.load(full_account)
+            for key, value in full_account.items():
+                if key != 'account':
+                    self[key] = value
+
+    def __repr__(self):
+        return '<LeanAccount {}>'.format(self.identifier)
+
+
+_accounts = {}
+_accounts_lock = threading.Lock()
+
+
+def get_lean_account(account_name, bitshares_instance):
+    """ Return the account shared by the workers using the BitShares instance
+
+        An account which is not fresh is fetched again, its id may have changed, e.g. on a new test chain.
+
+        :param str account_name: Name of the account
+        :param bitshares.BitShares bitshares_instance: BitShares instance of the workers
+        :return: LeanAccount
+    """
+    with _accounts_lock:
+        account = _accounts.get((bitshares_instance, account_name))
+        if account is None:
+            account = _accounts[(bitshares_instance, account_name)] = LeanAccount(
+                account_name, bitshares_instance=bitshares_instance)
+            return account
+
+    if not account.is_fresh:
+        account.refresh()
+    return account
+
+
+def load_lean_accounts(full_accounts, bitshares_instance):
+    """ Share accounts fetched together, e.g. at startup
+
+        :param list full_accounts: Result of get_full_accounts, [account name, full account] pairs
+        :param bitshares.BitShares bitshares_instance: BitShares instance of the workers
+        :return list: LeanAccount objects
+    """
+    accounts = []
+    with _accounts_lock:
+        for account_name, full_account in full_accounts:
+            account = _accounts.get((bitshares_instance, account_name))
+            if account is None:
+                account = _accounts[(bitshares_instance, account_name)] = LeanAccount(
+                    account_name, bitshares_instance=bitshares_instance, full_account=full_account)
+            else:
+                account.load(full_account)
+            accounts.append(account)
+    return accounts
+
+
+def find_lean_account(account_id, bitshares_instance):
+    """ Return the shared account with the id, None when no worker uses it
+
+        :param str account_id: Account id, e.g. 1.2.100
+        :param bitshares.BitShares bitshares_instance: BitShares instance of the workers
+    """
+    with _accounts_lock:
+        for (instance, _), account in _accounts.items():
+            if instance is bitshares_instance and dict.get(account, 'id') == account_id:
+                return account
+    return None
@@ -0,0 +1,236 @@
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+from dexbot.helper import get_user_data_directory
+
+from bitshares.asset import Asset
+from bitshares.blockchainobject import BlockchainObject
+from bitsharesbase.asset_permissions import todict
+
+log = logging.getLogger(__name__)
+
+# Version of the cache file, files of other versions are ignored
+FORMAT_VERSION = 1
+
+# Name of the cache file in the user data directory
+CACHE_FILE = 'metadata-cache.json'
+
+# Seconds after which cached assets are fetched again, the issuer may have changed e.g. the market fee
+EXPIRATION = 24 * 60 * 60
+
+# Seconds the loaded assets stay in the object cache of the bitshares library, which keeps objects for 10 seconds
+OBJECT_CACHE_EXPIRATION = 60 * 60
+
+
+def worker_symbols(worker):
+    """ Return the symbols of the assets the constructor of a worker looks up
+
+        :param dict worker: Config of the worker
+        :return set: Asset symbols and ids
+    """
+    symbols = set(worker['market'].split('/'))
+    symbols.add(worker.get('fee_asset') or '1.3.0')
+    return symbols
+
+
+def cache_asset(asset_data, bitshares_instance):
+    """ Put an asset in the object cache of the bitshares library by id and by symbol, like Asset.refresh() loads it
+
+        Asset(symbol) is only cached by id when it is fetched, every lookup by symbol costs a call otherwise.
+
+        :param dict asset_data: Asset object of the node
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :return: Asset
+    """
+    asset = Asset(asset_data, bitshares_instance=bitshares_instance)
+    asset['permissions'] = todict(asset_data['options'].get('issuer_permissions'))
+    asset['flags'] = todict(asset_data['options'].get('flags'))
+    try:
+        asset['description'] = json.loads(asset_data['options']['description'])
+    except ValueError:
+        asset['description'] = asset_data['options']['description']
+
+    expires = datetime.datetime.utcnow() + datetime.timedelta(seconds=OBJECT_CACHE_EXPIRATION)
+    for key in (asset['id'], asset['symbol']):
+        BlockchainObject._cache[key] = asset
+        dict.__getitem__(BlockchainObject._cache, key)['expires'] = expires
+    return asset
+
+
+class MetadataCache:
+    """ Assets of the chains kept across restarts, keyed by chain id
+
+        The precision, symbol and id of an asset never change and its options hardly ever do, a warm start needs
+        no call for them besides the chain id of the node.
+
+        :param str path: Cache file, kept in memory only when None
+        :param float expiration: Seconds after which an asset is fetched again
+    """
+
+    def __init__(self, path=None, expiration=EXPIRATION):
+        self.path = path
+        self.expiration = expiration
+        self.lock = threading.Lock()
+        self.chains = None
+        # BitShares instance => chain id of its node
+        self.chain_ids = {}
+
+    def load(self):
+        self.chains = {}
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as file:
+                document = json.load(file)
+        except (IOError, ValueError) as exception:
+            log.warning('Ignoring the metadata cache {}: {}'.format(self.path, exception))
+            return
+        if document.get('version') == FORMAT_VERSION:
+            self.chains = document['chains']
+
+    def save(self):
+        if not self.path:
+            return
+        temporary_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            with open(temporary_path, 'w') as file:
+                json.dump({'version': FORMAT_VERSION, 'chains': self.chains}, file)
+            # Other processes never read a partly written file
+            os.replace(temporary_path, self.path)
+        except IOError as exception:
+            log.warning('Unable to save the metadata cache {}: {}'.format(self.path, exception))
+
+    def chain_id(self, bitshares_instance):
+        chain_id = self.chain_ids.get(bitshares_instance)
+        if chain_id is None:
+            chain_id = self.chain_ids[bitshares_instance] = bitshares_instance.rpc.get_chain_id()
+        return chain_id
+
+    def cached_assets(self, bitshares_instance, symbols):
+        """ Return the cached assets and the symbols which have to be fetched
+
+            :param bitshares.BitShares bitshares_instance: Instance connected to the chain
+            :param list symbols: Asset symbols or ids
+            :return tuple: Asset objects of the node by symbol or id, list of the missing and expired symbols
+        """
+        chain_id = self.chain_id(bitshares_instance)
+        now = time.time()
+        with self.lock:
+            if self.chains is None:
+                self.load()
+            chain = self.chains.setdefault(chain_id, {'assets': {}, 'symbols': {}})
+
+            assets = {}
+            missing = []
+            for symbol in symbols:
+                entry = chain['assets'].get(chain['symbols'].get(symbol, symbol))
+                if entry and now - entry['fetched'] < self.expiration:
+                    assets[symbol] = entry['data']
+                else:
+                    missing.append(symbol)
+        return assets, missing
+
+    def add_assets(self, bitshares_instance, symbols, assets_data):
+        """ Keep the fetched assets
+
+            :param bitshares.BitShares bitshares_instance: Instance connected to the chain
+            :param list symbols: Asset symbols or ids
+            :param list assets_data: Results of lookup_asset_symbols for the symbols
+            :return dict: Asset objects of the node by symbol or id, None for the assets which don't exist
+        """
+        chain_id = self.chain_id(bitshares_instance)
+        now = time.time()
+        with self.lock:
+            if self.chains is None:
+                self.load()
+            chain = self.chains.setdefault(chain_id, {'assets': {}, 'symbols': {}})
+            for asset_data in assets_data:
+                if asset_data:
+                    chain['assets'][asset_data['id']] = {'data': asset_data, 'fetched': now}
+                    chain['symbols'][asset_data['symbol']] = asset_data['id']
+            self.save()
+        return dict(zip(symbols, assets_data))
+
+
+_metadata_cache = None
+
+
+def set_metadata_cache(cache):
+    """ Use a metadata cache in the process, e.g. the one in the user data directory in dexbot run
+
+        Processes on a fake chain must not use the cache file, the fake chains have the chain id of BitShares.
+
+        :param MetadataCache cache: New cache, None to always fetch the assets
+        :return MetadataCache: Cache used before
+    """
+    global _metadata_cache
+    old_cache, _metadata_cache = _metadata_cache, cache
+    return old_cache
+
+
+def get_metadata_cache():
+    return _metadata_cache
+
+
+def user_metadata_cache():
+    """ Return a cache on the cache file of the user data directory
+    """
+    return MetadataCache(os.path.join(get_user_data_directory(), CACHE_FILE))
+
+
+def load_assets(bitshares_instance, symbols):
+    """ Make Asset(symbol) and Market(pair) work without calls for the assets
+
+        Assets in the object cache of the bitshares library are used as they are, the others come from the metadata
+        cache when one is set, the rest is fetched in a single call.
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :param iterable symbols: Asset symbols or ids
+        :return dict: Asset objects by symbol or id, None for the assets which don't exist
+    """
+    assets, missing = find_assets(bitshares_instance, symbols)
+    if missing:
+        assets.update(add_assets(bitshares_instance, missing, bitshares_instance.rpc.lookup_asset_symbols(missing)))
+    return assets
+
+
+def find_assets(bitshares_instance, symbols):
+    """ First half of :func:`load_assets`, for callers which fetch the missing assets along with other calls
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :param iterable symbols: Asset symbols or ids
+        :return tuple: Asset objects by symbol or id, list of the symbols to fetch with lookup_asset_symbols
+    """
+    assets = {}
+    missing = []
+    for symbol in sorted(set(symbols)):
+        cached = BlockchainObject._cache.get(symbol, None)
+        if isinstance(cached, Asset):
+            assets[symbol] = cached
+        else:
+            missing.append(symbol)
+    if not missing or not _metadata_cache:
+        return assets, missing
+
+    cached_assets, missing = _metadata_cache.cached_assets(bitshares_instance, missing)
+    for symbol, asset_data in cached_assets.items():
+        assets[symbol] = cache_asset(asset_data, bitshares_instance)
+    return assets, missing
+
+
+def add_assets(bitshares_instance, symbols, assets_data):
+    """ Second half of :func:`load_assets`, keep the fetched assets in the caches
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :param list symbols: Symbols returned as missing by :func:`find_assets`
+        :param list assets_data: Results of lookup_asset_symbols for the symbols
+        :return dict: Asset objects by symbol or id, None for the assets which don't exist
+    """
+    if _metadata_cache:
+        _metadata_cache.add_assets(bitshares_instance, symbols, assets_data)
+    return {symbol: cache_asset(asset_data, bitshares_instance) if asset_data else None
+            for symbol, asset_data in zip(symbols, assets_data)}
@@ -0,0 +1,176 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from dexbot import storage
+from dexbot.instrumentation import get_instrumentation
+from dexbot.strategies.external_feeds.price_feed_service import get_price_feed_service
+
+log = logging.getLogger(__name__)
+
+# Address the endpoint listens on by default, only local scrapers can reach it
+DEFAULT_HOST = '127.0.0.1'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join('{}="{}"'.format(name, escape(value)) for name, value in labels) + '}'
+
+
+class MetricsWriter:
+    """ Builds a page in the Prometheus text exposition format
+    """
+
+    def __init__(self):
+        self.lines = []
+
+    def describe(self, name, kind, help_text):
+        self.lines.append('# HELP {} {}'.format(name, help_text))
+        self.lines.append('# TYPE {} {}'.format(name, kind))
+
+    def sample(self, name, value, labels=()):
+        self.lines.append('{}{} {}'.format(name, format_labels(labels), float(value)))
+
+    def histogram(self, name, summary, labels=()):
+        """ Write the samples of a histogram summary of :class:`~dexbot.instrumentation.Histogram`
+        """
+        labels = tuple(labels)
+        cumulative = 0
+        for bound, count in summary['buckets']:
+            cumulative += count
+            le = '+Inf' if bound == float('inf') else '{:g}'.format(bound)
+            self.sample(name + '_bucket', cumulative, labels + (('le', le),))
+        self.sample(name + '_sum', summary['total'], labels)
+        self.sample(name + '_count', summary['count'], labels)
+
+    def render(self):
+        return '\n'.join(self.lines) + '\n'
+
+
+def collect(infrastructure):
+    """ Return the metrics page of a worker infrastructure
+
+        Only reads what the workers and the services already collected, nothing is requested from the node.
+
+        :param dexbot.worker.WorkerInfrastructure infrastructure: Running infrastructure
+        :return str: Page in the Prometheus text format
+    """
+    snapshot = get_instrumentation().snapshot()
+    writer = MetricsWriter()
+
+    writer.describe('dexbot_block_lag_seconds', 'histogram',
+                    'Delay of the block dispatches beyond the block interval')
+    writer.histogram('dexbot_block_lag_seconds', snapshot['block_lag'])
+    writer.describe('dexbot_block_dispatch_seconds', 'histogram', 'Time to dispatch a block to all the workers')
+    writer.histogram('dexbot_block_dispatch_seconds', snapshot['block_dispatch'])
+
+    writer.describe('dexbot_callback_duration_seconds', 'histogram', 'Time spent in the callbacks of the workers')
+    for worker_name, callbacks in sorted(snapshot['callbacks'].items()):
+        for callback_name, summary in sorted(callbacks.items()):
+            writer.histogram('dexbot_callback_duration_seconds', summary,
+                             (('worker', worker_name), ('callback', callback_name)))
+    writer.describe('dexbot_worker_rpc_duration_seconds', 'histogram', 'RPC calls made in the callbacks of a worker')
+    for worker_name, summary in sorted(snapshot['worker_rpc'].items()):
+        writer.histogram('dexbot_worker_rpc_duration_seconds', summary, (('worker', worker_name),))
+
+    writer.describe('dexbot_rpc_duration_seconds', 'histogram', 'Latency of the RPC calls to the node')
+    for method, summary in sorted(snapshot['rpc'].items()):
+        writer.histogram('dexbot_rpc_duration_seconds', summary, (('method', method),))
+    writer.describe('dexbot_rpc_errors_total', 'counter', 'RPC calls which failed')
+    for method, count in sorted(snapshot['rpc_errors'].items()):
+        writer.sample('dexbot_rpc_errors_total', count, (('method', method),))
+
+    writer.describe('dexbot_db_queue_depth', 'gauge', 'Tasks waiting for the database thread')
+    writer.sample('dexbot_db_queue_depth', storage.get_db_worker().task_queue.qsize())
+    writer.describe('dexbot_db_queue_wait_seconds', 'histogram', 'Time the database tasks waited in the queue')
+    writer.histogram('dexbot_db_queue_wait_seconds', snapshot['db_wait'])
+
+    workers = infrastructure.workers if isinstance(infrastructure.workers, dict) else {}
+    writer.describe('dexbot_worker_orders', 'gauge', 'Own orders of the worker in its market when it last looked')
+    writer.describe('dexbot_worker_disabled', 'gauge', 'Whether the worker disabled itself')
+    writer.describe('dexbot_worker_degraded', 'gauge', 'Whether the watchdog runs the worker on the slow schedule')
+    for worker_name, worker in sorted(list(workers.items())):
+        if worker.own_orders_count is not None:
+            writer.sample('dexbot_worker_orders', worker.own_orders_count, (('worker', worker_name),))
+        writer.sample('dexbot_worker_disabled', int(bool(worker.disabled)), (('worker', worker_name),))
+        writer.sample('dexbot_worker_degraded', int(infrastructure.watchdog.is_degraded(worker_name)),
+                      (('worker', worker_name),))
+
+    writer.describe('dexbot_external_feed_duration_seconds', 'histogram', 'Time to refresh an external price')
+    for source, summary in sorted(snapshot['feeds'].items()):
+        writer.histogram('dexbot_external_feed_duration_seconds', summary, (('source', source),))
+    writer.describe('dexbot_external_feed_errors_total', 'counter', 'External price refreshes which failed')
+    for source, count in sorted(snapshot['feed_errors'].items()):
+        writer.sample('dexbot_external_feed_errors_total', count, (('source', source),))
+    writer.describe('dexbot_external_price_age_seconds', 'gauge', 'Age of the last good external price')
+    for (source, symbol), quote in sorted(get_price_feed_service().status().items()):
+        if quote.age is not None:
+            writer.sample('dexbot_external_price_age_seconds', quote.age, (('source', source), ('pair', symbol)))
+
+    return writer.render()
+
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MetricsServer:
+    """ Serves the metrics of a worker infrastructure over HTTP from its own thread
+
+        The page is built when it is requested, from the numbers the workers collect anyway, so the endpoint
+        costs nothing to the thread dispatching the events between scrapes.
+
+        :param dexbot.worker.WorkerInfrastructure infrastructure: Infrastructure to expose
+        :param int port: Port to listen on, 0 for any free port
+        :param str host: Address to listen on
+    """
+
+    def __init__(self, infrastructure, port, host=DEFAULT_HOST):
+        self.infrastructure = infrastructure
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                try:
+                    body = collect(server.infrastructure).encode('utf-8')
+                except Exception:
+                    log.exception('Unable to collect the metrics')
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes every few seconds would flood the log
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='metrics', daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return 'http://{}:{}/metrics'.format(host, port)
+
+    def start(self):
+        self.thread.start()
+        log.info('Serving metrics on {}'.format(self.url))
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
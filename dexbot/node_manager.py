@@ -0,0 +1,253 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from itertools import cycle
+
+import websocket
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for a node to answer
+PROBE_TIMEOUT = 3
+
+# How many blocks a node may be behind the best known head block and still count as synced
+MAX_LAG = 3
+
+# Weight of the newest latency measurement in the moving average
+LATENCY_WEIGHT = 0.3
+
+# The active node is changed to a faster synced one only if it's faster by this ratio, to avoid flapping
+SWITCH_RATIO = 0.5
+
+
+class NodeStats:
+    """ Measurements of a single node
+
+        :param str url: Websocket url of the node
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.head_block = None
+        self.head_time = None
+        self.lag = None
+        self.failures = 0
+        self.error = None
+        self.checked_at = None
+
+    @property
+    def reachable(self):
+        return self.failures == 0 and self.latency is not None
+
+    @property
+    def synced(self):
+        return self.reachable and self.lag is not None and self.lag <= MAX_LAG
+
+    def update(self, latency, head_block, head_time):
+        if self.latency is None or not self.reachable:
+            self.latency = latency
+        else:
+            self.latency = LATENCY_WEIGHT * latency + (1 - LATENCY_WEIGHT) * self.latency
+        self.head_block = head_block
+        self.head_time = head_time
+        self.failures = 0
+        self.error = None
+        self.checked_at = time.time()
+
+    def fail(self, error):
+        self.failures += 1
+        self.error = str(error) or error.__class__.__name__
+        self.checked_at = time.time()
+
+    def as_dict(self):
+        return OrderedDict([
+            ('url', self.url),
+            ('latency', self.latency),
+            ('head_block', self.head_block),
+            ('lag', self.lag),
+            ('synced', self.synced),
+            ('failures', self.failures),
+            ('error', self.error),
+        ])
+
+
+class NodePool:
+    """ Keeps track of latency and head block lag of the configured nodes and routes the RPC connection to
+        the fastest synced node
+
+        The nodes are probed concurrently with a fresh websocket connection, so the measurement doesn't
+        interfere with the connections used by the workers.
+
+        :param list urls: Websocket urls of the nodes
+        :param float timeout: Seconds to wait for a node to answer
+        :param float interval: Seconds between the checks when running in the background
+        :param callable on_change: Called from the checking thread when the active node should be changed
+    """
+
+    def __init__(self, urls, timeout=PROBE_TIMEOUT, interval=30, on_change=None):
+        if isinstance(urls, str):
+            urls = [urls]
+        self.urls = list(OrderedDict.fromkeys(urls))
+        self.timeout = timeout
+        self.interval = interval
+        self.on_change = on_change
+        self.stats = OrderedDict((url, NodeStats(url)) for url in self.urls)
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def probe(self, url):
+        """ Measure the round trip time of a single RPC call on the node
+
+            :param str url: Websocket url of the node
+            :return tuple: (latency in ms, head block number, head block time)
+        """
+        connection = websocket.create_connection(url, timeout=self.timeout)
+        try:
+            payload = {'id': 1, 'jsonrpc': '2.0', 'method': 'call',
+                       'params': [0, 'get_dynamic_global_properties', []]}
+            start = time.time()
+            connection.send(json.dumps(payload))
+            reply = json.loads(connection.recv())
+            latency = (time.time() - start) * 1000
+        finally:
+            connection.close()
+
+        if 'error' in reply:
+            raise ValueError(reply['error'])
+        properties = reply['result']
+        head_time = datetime.strptime(properties['time'], '%Y-%m-%dT%H:%M:%S')
+        return latency, properties['head_block_number'], head_time
+
+    def check(self):
+        """ Probe all the nodes concurrently and update their stats
+
+            :return list: Node urls ordered from the best to the worst
+        """
+        with ThreadPoolExecutor(max_workers=min(len(self.urls), 16) or 1) as executor:
+            results = list(executor.map(self._probe_safe, self.urls))
+
+        with self.lock:
+            for url, (result, error) in zip(self.urls, results):
+                if error:
+                    log.debug('Node {} failed: {}'.format(url, error))
+                    self.stats[url].fail(error)
+                else:
+                    self.stats[url].update(*result)
+
+            heads = [stats.head_block for stats in self.stats.values() if stats.reachable]
+            best_head = max(heads) if heads else None
+            for stats in self.stats.values():
+                stats.lag = best_head - stats.head_block if stats.reachable else None
+
+        return self.ranked()
+
+    def _probe_safe(self, url):
+        try:
+            return self.probe(url), None
+        except Exception as exception:
+            return None, exception
+
+    def ranked(self):
+        """ Synced nodes ordered by latency, followed by the lagging and unreachable nodes
+
+            :return list: Node urls
+        """
+        def sort_key(stats):
+            if stats.synced:
+                return 0, stats.latency
+            if stats.reachable:
+                return 1, stats.lag
+            return 2, stats.failures
+
+        with self.lock:
+            return [stats.url for stats in sorted(self.stats.values(), key=sort_key)]
+
+    def best(self):
+        """ Url of the fastest synced node or None if none of the nodes is synced
+        """
+        url = self.ranked()[0]
+        return url if self.stats[url].synced else None
+
+    def is_healthy(self, url):
+        stats = self.stats.get(url)
+        # Nodes which are not measured yet are assumed to be fine
+        return stats is None or stats.checked_at is None or stats.synced
+
+    def should_switch(self, current_url):
+        """ Whether the active node should be replaced with the best node
+
+            :param str current_url: Url of the active node
+            :return bool:
+        """
+        best = self.best()
+        if not best or best == current_url:
+            return False
+        if not self.is_healthy(current_url):
+            return True
+        current = self.stats.get(current_url)
+        if current is None:
+            return False
+        return self.stats[best].latency < current.latency * SWITCH_RATIO
+
+    def switch_rpc(self, rpc):
+        """ Reorder failover urls of the RPC connection and move it to the best node when needed
+
+            :param grapheneapi.api.Api rpc: RPC connection, `bitshares.rpc`
+        """
+        ranked = self.ranked()
+        switch = self.should_switch(rpc.url)
+
+        # grapheneapi fails over to the next url of the cycle, keep it in the order of the ranking
+        rpc.urls = cycle(ranked)
+        rpc._url_counter = Counter(OrderedDict((url, 0) for url in ranked))
+
+        if switch:
+            url = self.best()
+            log.info('Switching node from {} to {}'.format(rpc.url, url))
+            rpc.connection.disconnect()
+            rpc.url = url
+            rpc.connect()
+
+    def switch_notify(self, notify):
+        """ Reconnect the notification websocket if its node stalled
+
+            Dropping the connection makes the websocket reconnect to the next url, events are not delivered
+            while the node is stalled so this can't wait for the next block.
+
+            :param bitshares.notify.Notify notify: Running notification instance
+        """
+        connection = notify.websocket
+        connection.urls = cycle(self.ranked())
+        url = getattr(connection, 'url', None)
+        if url and not self.is_healthy(url) and self.best():
+            log.warning('Node {} stalled, reconnecting notifications'.format(url))
+            connection.ws.close()
+
+    def start(self):
+        """ Check the nodes periodically in a background thread
+        """
+        if self.thread:
+            return
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, name='NodePool', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread = None
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.check()
+                if self.on_change:
+                    self.on_change()
+            except Exception:
+                log.exception('Node check failed')
+            self.stop_event.wait(self.interval)
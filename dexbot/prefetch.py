@@ -0,0 +1,85 @@
+import logging
+
+import websocket
+from grapheneapi.exceptions import RPCError
+
+from dexbot.lean_account import load_lean_accounts
+from dexbot.metadata_cache import add_assets, find_assets, worker_symbols
+from dexbot.rpc_pipeline import get_pipeline
+from dexbot.strategies.base import StrategyBase
+from dexbot.strategies.external_feeds.price_feed_service import get_price_feed_service
+
+log = logging.getLogger(__name__)
+
+# Slowest workers listed in the startup report
+REPORT_SLOWEST = 5
+
+
+def call_many(bitshares_instance, calls, pipelining=False):
+    """ Execute independent RPC calls, pipelined in one round trip when possible
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :param list calls: (method, args) tuples
+        :param bool pipelining: Send the calls back-to-back over a separate websocket
+        :return list: Results in the order of the calls
+    """
+    pipeline = get_pipeline(bitshares_instance) if pipelining else None
+    if pipeline:
+        try:
+            return pipeline.call_many(calls)
+        except RPCError as exception:
+            bitshares_instance.rpc.post_process_exception(exception)
+        except (IOError, websocket.WebSocketException) as exception:
+            log.debug('Pipelined prefetch failed, falling back to sequential calls: {}'.format(exception))
+    return [getattr(bitshares_instance.rpc, method)(*args) for method, args in calls]
+
+
+def prefetch(bitshares_instance, workers, pipelining=False):
+    """ Load what the constructors of the workers would look up one by one
+
+        The distinct accounts and assets of all the workers are fetched in one call each, the assets come from the
+        metadata cache when it is enabled. The account call and the lookup of the assets missing from the cache are
+        pipelined in one round trip when pipelining is on. The external price feeds of all the workers start
+        refreshing concurrently in the background.
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance of the workers
+        :param dict workers: Worker configs by worker name
+        :param bool pipelining: Send the calls back-to-back over a separate websocket
+        :return list: LeanAccount objects of the workers
+    """
+    workers = [worker for worker in workers.values() if 'account' in worker and 'market' in worker]
+    if not workers:
+        return []
+
+    account_names = sorted({worker['account'] for worker in workers})
+    # The metadata cache needs the chain id of the node first, once per BitShares instance
+    _, missing = find_assets(bitshares_instance, set().union(*(worker_symbols(worker) for worker in workers)))
+    calls = [('get_full_accounts', [account_names, False])]
+    if missing:
+        calls.append(('lookup_asset_symbols', [missing]))
+    results = call_many(bitshares_instance, calls, pipelining)
+    full_accounts = results[0]
+    if missing:
+        add_assets(bitshares_instance, missing, results[1])
+
+    service = None
+    for worker in workers:
+        if worker.get('external_feed'):
+            service = service or get_price_feed_service()
+            sources = StrategyBase.get_external_price_sources(worker, worker.get('external_price_source', 'gecko'))
+            service.subscribe(sources, worker['market'])
+
+    return load_lean_accounts(full_accounts, bitshares_instance)
+
+
+def format_startup_report(timings, prefetch_seconds, total_seconds):
+    """ Return the startup time and the slowest workers as a log message
+
+        :param dict timings: Seconds to initialize each worker by worker name
+        :param float prefetch_seconds: Seconds spent prefetching
+        :param float total_seconds: Seconds to start all the workers
+    """
+    slowest = sorted(timings.items(), key=lambda item: item[1], reverse=True)[:REPORT_SLOWEST]
+    return 'Initialized {} workers in {:.2f}s, prefetch {:.2f}s, slowest: {}'.format(
+        len(timings), total_seconds, prefetch_seconds,
+        ', '.join('{} {:.2f}s'.format(name, seconds) for name, seconds in slowest) or 'none')
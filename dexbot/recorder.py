@@ -0,0 +1,351 @@
+import collections
+import gzip
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+from bitshares import BitShares
+from bitshares.blockchainobject import BlockchainObject
+from bitshares.instance import set_shared_bitshares_instance
+from bitsharesapi.bitsharesnoderpc import BitSharesNodeRPC
+from grapheneapi.exceptions import RPCError
+
+from dexbot import storage
+from dexbot.backtest import UnsignedTransactionBuilder
+from dexbot.clock import SimulatedClock, get_clock, set_clock
+from dexbot.instrumentation import InstrumentedRPC
+from dexbot.worker import WorkerInfrastructure
+
+log = logging.getLogger(__name__)
+
+# Version of the recording format, written to the header
+FORMAT_VERSION = 1
+
+# Calls whose arguments contain transactions or times which differ on every run, replayed in the recorded order
+VOLATILE_METHODS = {
+    'broadcast_transaction',
+    'broadcast_transaction_synchronous',
+    'get_required_fees',
+    'get_potential_signatures',
+    'get_required_signatures',
+    'get_transaction_hex',
+    'verify_authority',
+}
+
+# Url of the replayed node, Notify needs one to build its websocket which is never opened
+REPLAY_URL = 'ws://replay'
+
+
+def open_recording(path, mode):
+    """ Open a recording, compressed when the file name ends with .gz
+
+        :param str path: File name
+        :param str mode: 'r' or 'w'
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def dumps(record):
+    # Compact separators, the recordings grow with every block
+    return json.dumps(record, separators=(',', ':'), default=str)
+
+
+def request_key(method, args, kwargs):
+    return dumps([method, args, kwargs or {}])
+
+
+class RecordingRPC(InstrumentedRPC):
+    """ Node connection which writes every RPC response to a :class:`Recorder`
+
+        Not instantiated, :meth:`Recorder.attach_rpc` switches the class of a connected instance to this one. Calls
+        made by the methods of the connection itself, e.g. get_account, are recorded as the underlying API calls.
+    """
+
+    def __getattr__(self, name):
+        func = super().__getattr__(name)
+
+        def call(*args, **kwargs):
+            try:
+                result = func(*args, **kwargs)
+            except Exception as exception:
+                self.recorder.write_rpc(name, args, kwargs, error=str(exception))
+                raise
+            self.recorder.write_rpc(name, args, kwargs, result=result)
+            return result
+        return call
+
+
+class Recorder:
+    """ Appends the notifications and the RPC responses a worker infrastructure receives to a file
+
+        The file is a compact JSON lines file, gzipped when the name ends with .gz. The first line is a header with
+        the config and the stored state of the workers, the other lines are records in the order they were
+        received::
+
+            {"t": 1546300800.1, "header": 1, "config": {...}, "storage": {...}}
+            {"t": 1546300800.2, "rpc": "get_objects", "args": [["2.1.0"]], "result": [...]}
+            {"t": 1546300803.0, "notice": {"method": "notice", "params": [...]}}
+
+        :param str path: File to write
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open_recording(path, 'w')
+        self.lock = threading.Lock()
+        self.records = 0
+        self.on_notify_message = None
+
+    def write(self, record, flush=False):
+        record['t'] = get_clock().time()
+        line = dumps(record)
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.write(line + '\n')
+            self.records += 1
+            if flush:
+                self.file.flush()
+
+    def write_header(self, config):
+        """ Write the config and the stored state of the workers, which the replay starts from
+
+            :param dict config: Config of the worker infrastructure
+        """
+        state = {}
+        for worker_name in config['workers']:
+            items = storage.Storage(worker_name).items()
+            state[worker_name] = {
+                'items': {key: json.loads(value) for key, value in items},
+                'orders': storage.Storage(worker_name).fetch_orders() or {},
+            }
+        self.write({'header': FORMAT_VERSION, 'config': config, 'storage': state}, flush=True)
+
+    def write_rpc(self, method, args, kwargs, result=None, error=None):
+        record = {'rpc': method, 'args': args}
+        if kwargs:
+            record['kwargs'] = kwargs
+        if error is not None:
+            record['error'] = error
+        else:
+            record['result'] = result
+        self.write(record)
+
+    def attach_rpc(self, bitshares_instance):
+        """ Record the RPC responses of the instance from now on
+
+            :param bitshares.BitShares bitshares_instance: Instance connected to a node
+        """
+        rpc = bitshares_instance.rpc
+        if type(rpc) not in (BitSharesNodeRPC, InstrumentedRPC):
+            raise ValueError('Unable to record RPC calls of {}'.format(type(rpc).__name__))
+        rpc.recorder = self
+        rpc.__class__ = RecordingRPC
+
+    def attach_notify(self, notify):
+        """ Record the notifications received by the Notify instance from now on
+
+            :param bitshares.notify.Notify notify: Notify instance which is not listening yet
+        """
+        self.on_notify_message = notify.websocket.on_message
+        # A bound method, websocket-client passes itself to plain functions
+        notify.websocket.on_message = self.on_message
+
+    def on_message(self, reply, *args, **kwargs):
+        try:
+            data = json.loads(reply)
+        except ValueError:
+            data = None
+        # Replies to the subscription calls don't reach the workers
+        if isinstance(data, dict) and data.get('method') == 'notice':
+            self.write({'notice': data}, flush=True)
+        return self.on_notify_message(reply, *args, **kwargs)
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def load_recording(path):
+    """ Read a recording written by :class:`Recorder`
+
+        :param str path: File to read
+        :return tuple: (header, records)
+    """
+    with open_recording(path, 'r') as file:
+        records = [json.loads(line) for line in file if line.strip()]
+    if not records or 'header' not in records[0]:
+        raise ValueError('{} is not a recording'.format(path))
+    if records[0]['header'] > FORMAT_VERSION:
+        raise ValueError('{} was recorded by a newer version'.format(path))
+    return records[0], records[1:]
+
+
+class ReplayRPC(BitSharesNodeRPC):
+    """ Node connection which answers the calls with the recorded responses
+
+        A call gets the next recorded response of the same call, the last one when they are used up. Calls of the
+        :data:`VOLATILE_METHODS` take the next response of the method whatever the arguments. Other calls, which
+        didn't happen during the recording, raise RPCError and are counted in ``misses``.
+
+        :param list records: RPC records of a recording
+    """
+
+    def __init__(self, records):
+        # Nothing to connect to, Notify reads the rest of the connection attributes
+        self.url = REPLAY_URL
+        self.urls = itertools.cycle([REPLAY_URL])
+        self.user = ''
+        self.password = ''
+        self.responses = collections.defaultdict(collections.deque)
+        self.method_responses = collections.defaultdict(collections.deque)
+        self.last_responses = {}
+        self.calls = 0
+        self.misses = 0
+
+        for record in records:
+            self.responses[request_key(record['rpc'], record['args'], record.get('kwargs'))].append(record)
+            if record['rpc'] in VOLATILE_METHODS:
+                self.method_responses[record['rpc']].append(record)
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            return self.reply(name, args, kwargs)
+        return call
+
+    @staticmethod
+    def next_response(responses):
+        # Responses are in two queues, skip the ones already taken from the other
+        while responses:
+            record = responses.popleft()
+            if not record.get('replayed'):
+                record['replayed'] = True
+                return record
+        return None
+
+    def reply(self, method, args, kwargs):
+        self.calls += 1
+        key = request_key(method, args, kwargs)
+        record = self.next_response(self.responses.get(key))
+        if record is None and method in VOLATILE_METHODS:
+            record = self.next_response(self.method_responses.get(method))
+        if record is None:
+            record = self.last_responses.get(key)
+        if record is None:
+            self.misses += 1
+            log.debug('Call was not recorded: {}'.format(key))
+            raise RPCError('{} was not recorded'.format(method))
+
+        self.last_responses[key] = record
+        if 'error' in record:
+            self.post_process_exception(RPCError(record['error']))
+        return record['result']
+
+
+class ReplayTransactionBuilder(UnsignedTransactionBuilder):
+    """ TransactionBuilder which doesn't need the keys of the accounts, the recorded node doesn't verify
+        signatures
+    """
+
+    def appendSigner(self, account, permission):
+        pass
+
+
+ReplayResult = namedtuple('ReplayResult', 'notices rpc_calls rpc_misses seconds')
+
+
+class Replay:
+    """ Feeds a recording back into a worker infrastructure as fast as possible
+
+        The workers start from the stored state of the header in a temporary database and read the time from a
+        simulated clock which follows the recorded times. Transactions are built but not signed, the recorded
+        responses are returned for their broadcasts.
+
+        :param dict header: Header of the recording
+        :param list records: Records of the recording
+        :param dict config: Config to replay with, the recorded one by default. Compare versions of a strategy
+            by replaying the same recording with different code or parameters
+    """
+
+    def __init__(self, header, records, config=None):
+        self.header = header
+        self.config = dict(config or header['config'])
+        # The replayed node is the only one and the pipelined connection would reach a real one
+        self.config.pop('node_check_interval', None)
+        self.config.pop('signing_processes', None)
+        # The port is taken by dexbot run or the previous replay of the process
+        self.config.pop('metrics_port', None)
+        self.config['rpc_pipelining'] = False
+        self.notices = [record for record in records if 'notice' in record]
+        self.rpc_records = [record for record in records if 'rpc' in record]
+        self.clock = None
+        self.rpc = None
+        self.infrastructure = None
+
+    @classmethod
+    def from_file(cls, path, config=None):
+        header, records = load_recording(path)
+        return cls(header, records, config=config)
+
+    def run(self):
+        """ Replay the whole recording
+
+            :return ReplayResult: Numbers of the run
+        """
+        self.clock = SimulatedClock(self.header['t'])
+        old_clock = set_clock(self.clock)
+        directory = tempfile.mkdtemp(prefix='dexbot-replay-')
+        old_db_worker = storage.set_db_worker(storage.DatabaseWorker(os.path.join(directory, 'replay.sqlite')))
+        BlockchainObject.clear_cache()
+        try:
+            self.restore_storage()
+            self.rpc = ReplayRPC(self.rpc_records)
+            bitshares = BitShares(offline=True)
+            bitshares.rpc = self.rpc
+            bitshares._txbuffers[0] = ReplayTransactionBuilder(bitshares_instance=bitshares)
+            set_shared_bitshares_instance(bitshares)
+            return self.replay(bitshares)
+        finally:
+            if self.infrastructure is not None:
+                self.infrastructure.stop_services()
+            storage.set_db_worker(old_db_worker).close()
+            set_clock(old_clock)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def restore_storage(self):
+        for worker_name, state in self.header.get('storage', {}).items():
+            worker_storage = storage.Storage(worker_name)
+            for key, value in state['items'].items():
+                worker_storage[key] = value
+            for order_id, order in state['orders'].items():
+                storage.get_db_worker().save_order(worker_name, order_id, order)
+
+    def replay(self, bitshares):
+        started = time.time()
+        self.infrastructure = WorkerInfrastructure(self.config, bitshares_instance=bitshares)
+        self.infrastructure.init_services()
+        self.infrastructure.init_workers(self.config)
+        self.infrastructure.update_notify()
+
+        websocket = self.infrastructure.notify.websocket
+        for record in self.notices:
+            # Records of several threads may be slightly out of order
+            self.clock.set(max(record['t'], self.clock.time()))
+            websocket.on_message(json.dumps(record['notice']))
+
+        return ReplayResult(
+            notices=len(self.notices),
+            rpc_calls=self.rpc.calls,
+            rpc_misses=self.rpc.misses,
+            seconds=time.time() - started,
+        )
@@ -0,0 +1,119 @@
+import json
+import logging
+import threading
+import weakref
+
+import websocket
+from grapheneapi.exceptions import RPCError
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for the replies
+RPC_TIMEOUT = 30
+
+# BitShares instance => RpcPipeline
+_pipelines = weakref.WeakKeyDictionary()
+_pipelines_lock = threading.Lock()
+
+
+class RpcPipeline:
+    """ JSON-RPC client which sends independent requests back-to-back over a single websocket
+
+        Replies are matched to the requests by id, so N calls cost one round trip instead of N. The connection
+        is separate from the one of the BitShares instance and is meant for reading only.
+
+        :param str url: Websocket url of the node
+        :param float timeout: Seconds to wait for the replies
+    """
+
+    def __init__(self, url, timeout=RPC_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+        self.connection = None
+        self.lock = threading.Lock()
+        self._request_id = 0
+
+    def connect(self):
+        log.debug('Opening pipelined connection to {}'.format(self.url))
+        self.connection = websocket.create_connection(self.url, timeout=self.timeout)
+
+    def close(self):
+        if self.connection:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+    def call(self, method, *args):
+        return self.call_many([(method, args)])[0]
+
+    def call_many(self, calls):
+        """ Execute the calls in one round trip
+
+            :param list calls: (method, args) tuples, calls to other than the database api as (api, method, args)
+            :return list: Results in the order of the calls
+            :raises RPCError: when the node returns an error for any of the calls
+        """
+        if not calls:
+            return []
+
+        with self.lock:
+            try:
+                replies = self._exchange(calls)
+            except (IOError, websocket.WebSocketException):
+                # Nodes drop idle connections, retry once on a fresh one
+                self.close()
+                replies = self._exchange(calls)
+
+        results = []
+        for reply in replies:
+            if 'error' in reply:
+                error = reply['error']
+                raise RPCError(error.get('detail') or error.get('message'))
+            results.append(reply['result'])
+        return results
+
+    def _exchange(self, calls):
+        if not self.connection:
+            self.connect()
+
+        request_ids = []
+        for call in calls:
+            if len(call) == 3:
+                api, method, args = call
+            else:
+                api = 0
+                method, args = call
+            self._request_id += 1
+            request_ids.append(self._request_id)
+            payload = {'id': self._request_id, 'jsonrpc': '2.0', 'method': 'call', 'params': [api, method, list(args)]}
+            self.connection.send(json.dumps(payload))
+
+        replies = {}
+        while len(replies) < len(request_ids):
+            reply = json.loads(self.connection.recv())
+            replies[reply.get('id')] = reply
+
+        return [replies[request_id] for request_id in request_ids]
+
+
+def get_pipeline(bitshares_instance):
+    """ Return the pipeline connected to the same node as the BitShares instance
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :return: RpcPipeline or None when the node is not a websocket node
+    """
+    url = getattr(bitshares_instance.rpc, 'url', None)
+    if not url or not url.startswith('ws'):
+        return None
+
+    with _pipelines_lock:
+        pipeline = _pipelines.get(bitshares_instance)
+        if pipeline is None or pipeline.url != url:
+            # Follow the instance when it moves to another node
+            if pipeline:
+                pipeline.close()
+            pipeline = RpcPipeline(url)
+            _pipelines[bitshares_instance] = pipeline
+    return pipeline
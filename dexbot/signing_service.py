@@ -0,0 +1,148 @@
+import logging
+import multiprocessing
+
+from bitshares.account import Account
+from bitshares.exceptions import MissingKeyError
+from bitshares.transactionbuilder import TransactionBuilder
+from bitsharesbase import operations
+from bitsharesbase.signedtransactions import Signed_Transaction
+
+log = logging.getLogger(__name__)
+
+# Seconds to wait for a signature before giving up
+SIGNING_TIMEOUT = 60
+
+# Private keys of the signing process, set once by the pool initializer
+_private_keys = {}
+
+
+def _initialize_process(private_keys):
+    """ Pool initializer, receives the private keys once when the pool is started
+    """
+    _private_keys.update(private_keys)
+
+
+def _sign(transaction, public_keys, chain_params):
+    """ Sign the transaction in the pool process
+
+        :param dict transaction: Constructed transaction in json format
+        :param list public_keys: Public keys whose private keys are used for signing
+        :param dict chain_params: Chain parameters containing chain_id and prefix
+        :return list: Signatures
+    """
+    operations.default_prefix = chain_params['prefix']
+    wifs = [_private_keys[key] for key in public_keys if key in _private_keys]
+    if not wifs:
+        raise MissingKeyError
+
+    signed_transaction = Signed_Transaction(**transaction)
+    signed_transaction.sign(wifs, chain=chain_params)
+    return signed_transaction.json().get('signatures')
+
+
+class SigningService:
+    """ Signs transactions in a pool of processes so ECDSA signing doesn't block the event dispatch thread
+
+        Private keys are loaded from the unlocked wallet and handed to the pool processes once when the service
+        is started. Each transaction is sent to the pool with the public keys it is signed with instead of the
+        private keys. The parent process still holds the private keys in its unlocked wallet.
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance with unlocked wallet
+        :param int processes: Number of signing processes
+    """
+
+    def __init__(self, bitshares_instance, processes=2):
+        self.bitshares = bitshares_instance
+        self.chain_params = None
+
+        private_keys = {}
+        # Private key => public key, the transaction builder collects the private keys to sign with
+        self.public_keys = {}
+        wallet = self.bitshares.wallet
+        for public_key in wallet.getPublicKeys():
+            try:
+                wif = wallet.getPrivateKeyForPublicKey(public_key)
+            except Exception:
+                continue
+            if wif:
+                private_keys[public_key] = wif
+                self.public_keys[wif] = public_key
+
+        # Spawn clean processes, forking a process with running websocket and database threads is unsafe
+        context = multiprocessing.get_context('spawn')
+        self.pool = context.Pool(processes, initializer=_initialize_process, initargs=(private_keys,))
+        log.info('Started {} transaction signing processes'.format(processes))
+
+    def sign_async(self, transaction, wifs):
+        """ Start signing the transaction
+
+            :param dict transaction: Constructed transaction in json format
+            :param set wifs: Private keys required to sign the transaction
+            :return: multiprocessing.pool.AsyncResult resolving to the list of signatures
+        """
+        public_keys = [self.public_keys[wif] for wif in wifs if wif in self.public_keys]
+        if not public_keys:
+            raise MissingKeyError
+        if not self.chain_params:
+            self.chain_params = self.bitshares.rpc.chain_params
+        return self.pool.apply_async(_sign, (transaction, public_keys, self.chain_params))
+
+    def attach(self):
+        """ Make the default transaction buffer of the BitShares instance sign through the service
+        """
+        builder = PooledTransactionBuilder(self, bitshares_instance=self.bitshares)
+        self.bitshares._txbuffers[0] = builder
+        return builder
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+class PooledTransactionBuilder(TransactionBuilder):
+    """ TransactionBuilder which signs through :class:`SigningService`
+
+        :meth:`sign_async` starts signing in the background, :meth:`sign` and :meth:`broadcast` wait for the result.
+        The transaction is not reconstructed while the signature is pending, so it stays valid.
+    """
+
+    def __init__(self, signing_service, *args, **kwargs):
+        self.signing_service = signing_service
+        self.pending_signature = None
+        super().__init__(*args, **kwargs)
+
+    def clear(self):
+        self.pending_signature = None
+        super().clear()
+
+    def sign_async(self):
+        """ Construct the transaction and start signing it in the signing service
+        """
+        self.constructTx()
+
+        if "operations" not in self or not self["operations"]:
+            return None
+
+        # Legacy compatibility with proposer mode, same as TransactionBuilder.sign()
+        if self.blockchain.proposer:
+            proposer = Account(self.blockchain.proposer, blockchain_instance=self.blockchain)
+            self.wifs = set()
+            self.signing_accounts = list()
+            self.appendSigner(proposer["id"], "active")
+
+        if not any(self.wifs):
+            raise MissingKeyError
+
+        self.pending_signature = self.signing_service.sign_async(self.json(), self.wifs)
+        return self.pending_signature
+
+    def sign(self):
+        if not self.pending_signature:
+            self.sign_async()
+        if not self.pending_signature:
+            return None
+
+        signatures = self.pending_signature.get(SIGNING_TIMEOUT)
+        self.pending_signature = None
+        self["signatures"].extend(signatures)
+        return signatures
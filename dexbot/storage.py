@@ -1,12 +1,14 @@
 import os
 import json
 import threading
+import time
 import queue
 import uuid
 from appdirs import user_data_dir
 
 from . import helper
 from dexbot import APP_NAME, AUTHOR
+from dexbot.instrumentation import get_instrumentation
 
 from sqlalchemy import create_engine, Column, String, Integer, Float
 from sqlalchemy.ext.declarative import declarative_base
@@ -81,51 +83,51 @@ class Storage(dict):
         self.category = category
 
     def __setitem__(self, key, value):
-        db_worker.set_item(self.category, key, value)
+        get_db_worker().set_item(self.category, key, value)
 
     def __getitem__(self, key):
-        return db_worker.get_item(self.category, key)
+        return get_db_worker().get_item(self.category, key)
 
     def __delitem__(self, key):
-        db_worker.del_item(self.category, key)
+        get_db_worker().del_item(self.category, key)
 
     def __contains__(self, key):
-        return db_worker.contains(self.category, key)
+        return get_db_worker().contains(self.category, key)
 
     def items(self):
-        return db_worker.get_items(self.category)
+        return get_db_worker().get_items(self.category)
 
     def clear(self):
-        db_worker.clear(self.category)
+        get_db_worker().clear(self.category)
 
     def save_order(self, order):
         """ Save the order to the database
         """
         order_id = order['id']
-        db_worker.save_order(self.category, order_id, order)
+        get_db_worker().save_order(self.category, order_id, order)
 
     def remove_order(self, order):
         """ Removes an order from the database
         """
         order_id = order['id']
-        db_worker.remove_order(self.category, order_id)
+        get_db_worker().remove_order(self.category, order_id)
 
     def clear_orders(self):
         """ Removes all worker's orders from the database
         """
-        db_worker.clear_orders(self.category)
+        get_db_worker().clear_orders(self.category)
 
     def fetch_orders(self, worker=None):
         """ Get all the orders (or just specific worker's orders) from the database
         """
         if not worker:
             worker = self.category
-        return db_worker.fetch_orders(worker)
+        return get_db_worker().fetch_orders(worker)
 
     @staticmethod
     def clear_worker_data(worker):
-        db_worker.clear_orders(worker)
-        db_worker.clear(worker)
+        get_db_worker().clear_orders(worker)
+        get_db_worker().clear(worker)
 
     @staticmethod
     def store_balance_entry(account, worker, base_total, base_symbol, quote_total, quote_symbol,
@@ -133,26 +135,32 @@ class Storage(dict):
         balance = Balances(account, worker, base_total, base_symbol,
                            quote_total, quote_symbol, center_price, timestamp)
         # Save balance to db
-        db_worker.save_balance(balance)
+        get_db_worker().save_balance(balance)
 
     @staticmethod
     def get_balance_history(account, worker, timestamp, base_asset, quote_asset):
-        return db_worker.get_balance(account, worker, timestamp, base_asset, quote_asset)
+        return get_db_worker().get_balance(account, worker, timestamp, base_asset, quote_asset)
 
     @staticmethod
     def get_recent_balance_entry(account, worker, base_asset, quote_asset):
-        return db_worker.get_recent_balance_entry(account, worker, base_asset, quote_asset)
+        return get_db_worker().get_recent_balance_entry(account, worker, base_asset, quote_asset)
+
+    @staticmethod
+    def get_balance_entries(account, worker):
+        return get_db_worker().get_balance_entries(account, worker)
 
 
 class DatabaseWorker(threading.Thread):
     """ Thread safe database worker
+
+        :param str database_file: Path of the sqlite file, the one in the user data directory by default
     """
 
-    def __init__(self):
+    def __init__(self, database_file=None):
         super().__init__()
 
         # Obtain engine and session
-        engine = create_engine('sqlite:///%s' % sqlDataBaseFile, echo=False)
+        engine = create_engine('sqlite:///%s' % (database_file or sqlDataBaseFile), echo=False)
         Session = sessionmaker(bind=engine)
         self.session = Session()
         Base.metadata.create_all(engine)
@@ -167,11 +175,21 @@ class DatabaseWorker(threading.Thread):
         self.start()
 
     def run(self):
-        for func, args, token in iter(self.task_queue.get, None):
+        instrumentation = get_instrumentation()
+        for func, args, token, queued in iter(self.task_queue.get, None):
+            # Time the task spent behind the others, the database is used by all the workers
+            instrumentation.observe_db_wait(time.perf_counter() - queued)
             if token is not None:
                 args = args+(token,)
             func(*args)
 
+    def close(self):
+        """ Finish the queued tasks and stop the thread
+        """
+        self.execute_noreturn(self.session.close)
+        self.task_queue.put(None)
+        self.join()
+
     def _get_result(self, token):
         while True:
             with self.lock:
@@ -190,11 +208,11 @@ class DatabaseWorker(threading.Thread):
 
     def execute(self, func, *args):
         token = str(uuid.uuid4)
-        self.task_queue.put((func, args, token))
+        self.task_queue.put((func, args, token, time.perf_counter()))
         return self._get_result(token)
 
     def execute_noreturn(self, func, *args):
-        self.task_queue.put((func, args, None))
+        self.task_queue.put((func, args, None, time.perf_counter()))
 
     def set_item(self, category, key, value):
         self.execute_noreturn(self._set_item, category, key, value)
@@ -358,11 +376,50 @@ class DatabaseWorker(threading.Thread):
 
         self._set_result(token, result)
 
+    def get_balance_entries(self, account, worker):
+        return self.execute(self._get_balance_entries, account, worker)
+
+    def _get_balance_entries(self, account, worker, token):
+        """ Get all balance history items of the worker, oldest first
+        """
+        result = self.session.query(Balances).filter(
+            Balances.account == account,
+            Balances.worker == worker,
+        ).order_by(Balances.timestamp, Balances.id).all()
+
+        self._set_result(token, result)
+
+
 # Derive sqlite file directory
 data_dir = user_data_dir(APP_NAME, AUTHOR)
 sqlDataBaseFile = os.path.join(data_dir, storageDatabase)
 
-# Create directory for sqlite file
-helper.mkdir(data_dir)
+_db_worker = None
+_db_worker_lock = threading.Lock()
+
+
+def get_db_worker():
+    """ Return the database worker of the process
 
-db_worker = DatabaseWorker()
+        The worker on the sqlite file of the user data directory is started on first use, commands which never
+        touch the database don't open it.
+    """
+    global _db_worker
+    with _db_worker_lock:
+        if _db_worker is None:
+            # Create directory for sqlite file
+            helper.mkdir(data_dir)
+            _db_worker = DatabaseWorker()
+        return _db_worker
+
+
+def set_db_worker(worker):
+    """ Use another database worker in the process, e.g. one on a temporary file in backtests
+
+        :param DatabaseWorker worker: New database worker, None to start the default one again on next use
+        :return DatabaseWorker: Database worker used before, None when none was started
+    """
+    global _db_worker
+    with _db_worker_lock:
+        old_worker, _db_worker = _db_worker, worker
+    return old_worker
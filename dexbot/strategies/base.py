@@ -1,14 +1,17 @@
-import datetime
 import copy
 import logging
 import math
-import time
 
+from dexbot.clock import get_clock
 from dexbot.config import Config
+from dexbot.rpc_pipeline import get_pipeline
 from dexbot.storage import Storage
 from dexbot.statemachine import StateMachine
 from dexbot.helper import truncate
-from dexbot.strategies.external_feeds.price_feed import PriceFeed
+from dexbot.lean_account import get_lean_account
+from dexbot.metadata_cache import load_assets, worker_symbols
+from dexbot.strategies.external_feeds.price_aggregator import PRICE_BUDGET
+from dexbot.strategies.external_feeds.price_feed_service import get_price_feed_service
 from dexbot.qt_queue.idle_queue import idle_add
 from .config_parts.base_config import BaseConfig
 
@@ -16,7 +19,8 @@ from events import Events
 import bitshares.exceptions
 import bitsharesapi
 import bitsharesapi.exceptions
-from bitshares.account import Account
+import websocket
+from grapheneapi.exceptions import RPCError
 from bitshares.amount import Amount, Asset
 from bitshares.dex import Dex
 from bitshares.instance import shared_bitshares_instance
@@ -46,7 +50,7 @@ class StrategyBase(Storage, StateMachine, Events):
             * ``worker.add_state``: Add a specific state
             * ``worker.set_state``: Set finite state machine
             * ``worker.get_state``: Change state of state machine
-            * ``worker.account``: The Account object of this worker
+            * ``worker.account``: The LeanAccount object of this worker
             * ``worker.market``: The market used by this worker
             * ``worker.orders``: List of open orders of the worker's account in the worker's market
             * ``worker.balance``: List of assets and amounts available in the worker's account
@@ -138,9 +142,11 @@ class StrategyBase(Storage, StateMachine, Events):
         # Get worker's parameters from the config
         self.worker = config["workers"][name]
 
-        # Get Bitshares account and market for this worker
-        self._account = Account(self.worker["account"], full=True, bitshares_instance=self.bitshares)
+        # Get Bitshares account and market for this worker, the workers of an account share its balances and orders
+        self._account = get_lean_account(self.worker["account"], self.bitshares)
 
+        # Assets of the market and the fee asset from the metadata cache, Market and Asset don't fetch them then
+        load_assets(self.bitshares, worker_symbols(self.worker))
         self._market = Market(config["workers"][name]["market"], bitshares_instance=self.bitshares)
 
         # Recheck flag - Tell the strategy to check for updated orders
@@ -170,9 +176,18 @@ class StrategyBase(Storage, StateMachine, Events):
         # Settings for bitshares instance
         self.bitshares.bundle = bool(self.worker.get("bundle", False))
 
+        # Optional TransactionAggregator which collects bundled operations of the workers sharing the account
+        self.aggregator = kwargs.get('aggregator')
+
+        # Send independent RPC requests back-to-back over a separate websocket
+        self.rpc_pipelining = bool(config.get('rpc_pipelining', False))
+
         # Disabled flag - this flag can be flipped to True by a worker and will be reset to False after reset only
         self.disabled = False
 
+        # Own orders in the market when the worker last looked, exposed by the metrics endpoint
+        self.own_orders_count = None
+
         # Order expiration time in seconds
         self.expiration = 60 * 60 * 24 * 365 * 5
 
@@ -234,28 +249,23 @@ class StrategyBase(Storage, StateMachine, Events):
         """
         total_value = 0
 
-        # Total balance calculation
-        for balance in self.balances:
-            if balance['symbol'] != return_asset:
-                # Convert to asset if different
-                total_value += self.convert_asset(balance['amount'], balance['symbol'], return_asset)
-            else:
-                total_value += balance['amount']
+        amounts = [(balance['amount'], balance['symbol']) for balance in self.balances]
+        for order in self.get_updated_orders(self.all_own_orders):
+            if order:
+                amounts.append((order['base']['amount'], order['base']['symbol']))
 
-        # Orders balance calculation
-        for order in self.all_own_orders:
-            updated_order = self.get_updated_order(order['id'])
+        # Latest prices of all the assets in one round trip
+        symbols = sorted({symbol for _, symbol in amounts if symbol != return_asset})
+        tickers = self.rpc_many([('get_ticker', [return_asset, symbol]) for symbol in symbols])
+        prices = {symbol: float(ticker['latest']) for symbol, ticker in zip(symbols, tickers)}
+        precision = Asset(return_asset, bitshares_instance=self.bitshares)['precision']
 
-            if not order:
-                continue
-            if updated_order['base']['symbol'] == return_asset:
-                total_value += updated_order['base']['amount']
+        for amount, symbol in amounts:
+            if symbol != return_asset:
+                # Convert to asset if different
+                total_value += truncate(amount * prices[symbol], precision)
             else:
-                total_value += self.convert_asset(
-                    updated_order['base']['amount'],
-                    updated_order['base']['symbol'],
-                    return_asset
-                )
+                total_value += amount
 
         return total_value
 
@@ -266,6 +276,7 @@ class StrategyBase(Storage, StateMachine, Events):
             :param float | fee_reservation: How much is saved in reserve for the fees
             :return: Balance of specific asset
         """
+        self.refresh_account()
         balance = self._account.balance(asset)
 
         if fee_reservation > 0:
@@ -364,16 +375,19 @@ class StrategyBase(Storage, StateMachine, Events):
         quote_asset = self.market['quote']['id']
         base_asset = self.market['base']['id']
 
+        # Balances and open orders come with the full account in a single call
+        self.refresh_account()
+
         # Total balance calculation
-        for balance in self.balances:
-            if balance.asset['id'] == quote_asset:
-                quote += balance['amount']
-            elif balance.asset['id'] == base_asset:
-                base += balance['amount']
+        for balance in self.account['balances']:
+            if balance['asset_type'] == quote_asset:
+                quote += int(balance['balance']) / 10 ** self.market['quote']['precision']
+            elif balance['asset_type'] == base_asset:
+                base += int(balance['balance']) / 10 ** self.market['base']['precision']
 
         if order_ids is None:
             # Get all orders from Blockchain
-            order_ids = [order['id'] for order in self.get_own_orders]
+            order_ids = [order['id'] for order in self.get_own_market_orders(refresh=False)]
         if order_ids:
             orders_balance = self.get_allocated_assets(order_ids)
             quote += orders_balance['quote']
@@ -402,8 +416,7 @@ class StrategyBase(Storage, StateMachine, Events):
         quote_asset = self.market['quote']['id']
         base_asset = self.market['base']['id']
 
-        for order_id in order_ids:
-            order = self.get_updated_order(order_id)
+        for order in self.get_updated_orders(order_ids):
             if not order:
                 continue
             asset_id = order['base']['asset']['id']
@@ -502,27 +515,40 @@ class StrategyBase(Storage, StateMachine, Events):
             return None
 
     def get_external_market_center_price(self, external_price_source):
-        """ Get center price from an external market for current market pair
+        """ Get center price from external markets for current market pair
+
+            Prices of the given source and the sources listed in ``external_price_sources`` option of the worker
+            are refreshed in the background and combined with ``external_price_method`` (median by default). Only
+            the first call for a pair waits for the prices to be fetched.
 
             :param external_price_source: External market name
-            :return: Center price as float
+            :return: Center price as float, None when no source has a recent price
         """
-        self.log.debug('inside get_external_mcp, exchange: {} '.format(external_price_source))
+        sources = self.get_external_price_sources(self.worker, external_price_source)
+        self.log.debug('inside get_external_mcp, exchanges: {} '.format(sources))
         market = self.market.get_string('/')
-        self.log.debug('market: {}  '.format(market))
-        price_feed = PriceFeed(external_price_source, market)
-        price_feed.filter_symbols()
-        center_price = price_feed.get_center_price(None)
-        self.log.debug('PriceFeed: {}'.format(center_price))
-
-        if center_price is None:  # Try USDT
-            center_price = price_feed.get_center_price("USDT")
-            self.log.debug('Substitute USD/USDT center price: {}'.format(center_price))
-            if center_price is None:  # Try consolidated
-                center_price = price_feed.get_consolidated_price()
-                self.log.debug('Consolidated center price: {}'.format(center_price))
+        service = get_price_feed_service()
+        service.subscribe(sources, market)
+        center_price = service.get_price(
+            sources, market, method=self.worker.get('external_price_method', 'median'), timeout=PRICE_BUDGET + 1)
+        self.log.debug('External center price of {}: {}'.format(market, center_price))
         return center_price
 
+    @staticmethod
+    def get_external_price_sources(worker, external_price_source):
+        """ Return the given price source followed by the ones of the ``external_price_sources`` option
+
+            :param dict worker: Config of the worker
+            :param str external_price_source: External market name
+            :return list: Price sources
+        """
+        sources = [external_price_source]
+        for source in worker.get('external_price_sources', '').split(','):
+            source = source.strip().lower()
+            if source and source not in sources:
+                sources.append(source)
+        return sources
+
     def get_market_center_price(self, base_amount=0, quote_amount=0, suppress_errors=False):
         """ Returns the center price of market including own orders.
 
@@ -532,10 +558,18 @@ class StrategyBase(Storage, StateMachine, Events):
             :return: Market center price as float
         """
         center_price = None
-        buy_price = self.get_market_buy_price(quote_amount=quote_amount,
-                                              base_amount=base_amount, exclude_own_orders=False)
-        sell_price = self.get_market_sell_price(quote_amount=quote_amount,
-                                                base_amount=base_amount, exclude_own_orders=False)
+        if quote_amount == 0 and base_amount == 0:
+            # Both prices come from the same ticker
+            ticker = self.ticker()
+            buy_price = float(ticker.get('highestBid'))
+            sell_price = float(ticker.get('lowestAsk'))
+        else:
+            # Both sides come from the same orderbook call
+            market_orders = self.get_market_orders(depth=self.fetch_depth)
+            buy_price = self.get_market_buy_price(quote_amount=quote_amount, base_amount=base_amount,
+                                                  exclude_own_orders=False, market_orders=market_orders)
+            sell_price = self.get_market_sell_price(quote_amount=quote_amount, base_amount=base_amount,
+                                                    exclude_own_orders=False, market_orders=market_orders)
         if buy_price is None or buy_price == 0.0:
             if not suppress_errors:
                 self.log.critical("Cannot estimate center price, there is no highest bid.")
@@ -553,20 +587,24 @@ class StrategyBase(Storage, StateMachine, Events):
             self.log.debug('Center price in get_market_center_price: {:.8f} '.format(center_price))
         return center_price
 
-    def get_market_buy_price(self, quote_amount=0, base_amount=0, exclude_own_orders=True):
+    def get_market_buy_price(self, quote_amount=0, base_amount=0, exclude_own_orders=True, market_orders=None):
         """ Returns the BASE/QUOTE price for which [depth] worth of QUOTE could be bought, enhanced with
             moving average or weighted moving average
 
             :param float | quote_amount:
             :param float | base_amount:
             :param bool | exclude_own_orders: Exclude own orders when calculating a price
+            :param list | market_orders: Already fetched market orders to use instead of fetching them
             :return: price as float
         """
         market_buy_orders = []
+        if market_orders is not None:
+            market_buy_orders = self.filter_buy_orders(market_orders)
 
         # Exclude own orders from orderbook if needed
         if exclude_own_orders:
-            market_buy_orders = self.get_market_buy_orders(depth=self.fetch_depth)
+            if market_orders is None:
+                market_buy_orders = self.get_market_buy_orders(depth=self.fetch_depth)
             own_buy_orders_ids = [o['id'] for o in self.get_own_buy_orders()]
             market_buy_orders = [o for o in market_buy_orders if o['id'] not in own_buy_orders_ids]
 
@@ -659,7 +697,7 @@ class StrategyBase(Storage, StateMachine, Events):
         """
         return self.market.orderbook(depth)
 
-    def get_market_sell_price(self, quote_amount=0, base_amount=0, exclude_own_orders=True):
+    def get_market_sell_price(self, quote_amount=0, base_amount=0, exclude_own_orders=True, market_orders=None):
         """ Returns the BASE/QUOTE price for which [quote_amount] worth of QUOTE could be bought,
             enhanced with moving average or weighted moving average.
 
@@ -668,13 +706,17 @@ class StrategyBase(Storage, StateMachine, Events):
             :param float | quote_amount:
             :param float | base_amount:
             :param bool | exclude_own_orders: Exclude own orders when calculating a price
+            :param list | market_orders: Already fetched market orders to use instead of fetching them
             :return:
         """
         market_sell_orders = []
+        if market_orders is not None:
+            market_sell_orders = self.filter_sell_orders(market_orders)
 
         # Exclude own orders from orderbook if needed
         if exclude_own_orders:
-            market_sell_orders = self.get_market_sell_orders(depth=self.fetch_depth)
+            if market_orders is None:
+                market_sell_orders = self.get_market_sell_orders(depth=self.fetch_depth)
             own_sell_orders_ids = [o['id'] for o in self.get_own_sell_orders()]
             market_sell_orders = [o for o in market_sell_orders if o['id'] not in own_sell_orders_ids]
 
@@ -832,6 +874,24 @@ class StrategyBase(Storage, StateMachine, Events):
 
         return self.filter_buy_orders(orders)
 
+    def get_own_market_orders(self, refresh=True):
+        """ Return the account's open orders in the current market
+
+            :param bool | refresh: Refresh the account first, otherwise use already fetched account data
+            :return: List of Order objects
+        """
+        if refresh:
+            self.refresh_account()
+
+        orders = []
+        for order in self.account['limit_orders']:
+            sell_price = order['sell_price']
+            if self.is_current_market(sell_price['base']['asset_id'], sell_price['quote']['asset_id']):
+                orders.append(Order(order, bitshares_instance=self.bitshares))
+
+        self.own_orders_count = len(orders)
+        return orders
+
     def get_own_sell_orders(self, orders=None):
         """ Get own sell orders from current market
 
@@ -885,16 +945,61 @@ class StrategyBase(Storage, StateMachine, Events):
         updated_order = self.get_updated_limit_order(order)
         return Order(updated_order, bitshares_instance=self.bitshares)
 
+    def get_updated_orders(self, order_ids):
+        """ Same as get_updated_order() for many orders, orders which are not own orders are fetched in one call
+
+            :param list order_ids: blockchain Order objects or ids of the orders
+            :return list: Order objects, None in place of the orders which don't exist
+        """
+        order_ids = [order_id['id'] if isinstance(order_id, dict) else order_id for order_id in order_ids]
+
+        own_orders = {limit_order['id']: limit_order for limit_order in self.account['limit_orders']}
+        missing_ids = [order_id for order_id in order_ids if order_id not in own_orders]
+        if missing_ids:
+            fetched_orders = self.rpc_many([('get_objects', [missing_ids])])[0]
+            own_orders.update(zip(missing_ids, fetched_orders))
+
+        orders = []
+        for order_id in order_ids:
+            order = own_orders.get(order_id)
+            if order:
+                order = Order(self.get_updated_limit_order(order), bitshares_instance=self.bitshares)
+            orders.append(order)
+        return orders
+
     def execute(self):
         """ Execute a bundle of operations
 
-            :return: dict: transaction
+            When the worker has an active transaction aggregator, the operations are handed over to it and
+            broadcasted together with other workers' operations at the end of the dispatch cycle. The result
+            is then delivered to :meth:`handle_aggregated_result`.
+
+            :return: dict: transaction, None if the operations were aggregated
         """
+        if self.aggregator:
+            txbuffer = self.bitshares.txbuffer
+            if self.aggregator.add(self, self.account.name, txbuffer.fee_asset_id, txbuffer.ops):
+                txbuffer.clear()
+                return None
+
         self.bitshares.blocking = "head"
         r = self.bitshares.txbuffer.broadcast()
         self.bitshares.blocking = False
+        self._account.invalidate()
         return r
 
+    def handle_aggregated_result(self, transaction, exception=None):
+        """ Receives the result of operations broadcasted by the transaction aggregator
+
+            :param dict | transaction: Broadcasted transaction, None on failure
+            :param Exception | exception: Exception raised during broadcast, if any
+        """
+        self._account.invalidate()
+        if exception:
+            self.log.error('Got exception during broadcasting aggregated trx: {}'.format(exception))
+        else:
+            self.log.debug('Aggregated operations were broadcasted')
+
     def is_buy_order(self, order):
         """ Check whether an order is buy order
 
@@ -1072,6 +1177,17 @@ class StrategyBase(Storage, StateMachine, Events):
         else:
             return True
 
+    def refresh_account(self):
+        """ Refresh the account data, including balances and open orders
+
+            The account is shared by the workers of the account, it is only fetched when it may have changed since
+            another worker fetched it.
+        """
+        if self._account.is_fresh:
+            return
+        full_account = self.rpc_many([('get_full_accounts', [[self.account['id']], False])])[0][0][1]
+        self._account.load(full_account)
+
     def retry_action(self, action, *args, **kwargs):
         """ Perform an action, and if certain suspected-to-be-spurious grapheme bugs occur,
             instead of bubbling the exception, it is quietly logged (level WARN), and try again
@@ -1083,7 +1199,11 @@ class StrategyBase(Storage, StateMachine, Events):
         tries = 0
         while True:
             try:
-                return action(*args, **kwargs)
+                result = action(*args, **kwargs)
+                if not self.bitshares.bundle:
+                    # Broadcasted, the balances and orders of the account changed
+                    self._account.invalidate()
+                return result
             except bitsharesapi.exceptions.UnhandledRPCError as exception:
                 if "Assert Exception: amount_to_sell.amount > 0" in str(exception):
                     if tries > MAX_TRIES:
@@ -1092,8 +1212,9 @@ class StrategyBase(Storage, StateMachine, Events):
                         tries += 1
                         self.log.warning("Ignoring: '{}'".format(str(exception)))
                         self.bitshares.txbuffer.clear()
-                        self.account.refresh()
-                        time.sleep(2)
+                        self._account.invalidate()
+                        self.refresh_account()
+                        self.clock.sleep(2)
                 elif "now <= trx.expiration" in str(exception):  # Usually loss of sync to blockchain
                     if tries > MAX_TRIES:
                         raise
@@ -1101,13 +1222,31 @@ class StrategyBase(Storage, StateMachine, Events):
                         tries += 1
                         self.log.warning("retrying on '{}'".format(str(exception)))
                         self.bitshares.txbuffer.clear()
-                        time.sleep(6)  # Wait at least a BitShares block
+                        self.clock.sleep(6)  # Wait at least a BitShares block
                 elif "Assert Exception: delta.amount > 0: Insufficient Balance" in str(exception):
                     self.log.critical('Insufficient balance of fee asset')
                     raise
                 else:
                     raise
 
+    def rpc_many(self, calls):
+        """ Execute independent RPC calls, pipelined in one round trip when rpc_pipelining is enabled
+
+            :param list calls: (method, args) tuples
+            :return list: Results in the order of the calls
+        """
+        pipeline = get_pipeline(self.bitshares) if self.rpc_pipelining else None
+        if pipeline:
+            try:
+                return pipeline.call_many(calls)
+            except RPCError as exception:
+                # Raise the same exceptions as the regular RPC connection
+                self.bitshares.rpc.post_process_exception(exception)
+            except (IOError, websocket.WebSocketException) as exception:
+                self.log.debug('Pipelined RPC failed, falling back to sequential calls: {}'.format(exception))
+
+        return [getattr(self.bitshares.rpc, method)(*args) for method, args in calls]
+
     def store_profit_estimation_data(self):
         """ Save total quote, total base, center_price, and datetime in to the database
         """
@@ -1118,7 +1257,7 @@ class StrategyBase(Storage, StateMachine, Events):
         quote_amount = assets['quote']
         quote_symbol = self.market['quote'].get('symbol')
         center_price = self.get_market_center_price()
-        timestamp = time.time()
+        timestamp = self.clock.time()
 
         self.store_balance_entry(account, self.worker_name, base_amount, base_symbol,
                                  quote_amount, quote_symbol, center_price, timestamp)
@@ -1136,7 +1275,7 @@ class StrategyBase(Storage, StateMachine, Events):
         """
         profit = 0
         time_range = 60 * 60 * 24 * 7  # 7 days
-        current_time = time.time()
+        current_time = self.clock.time()
         timestamp = current_time - time_range
 
         # Fetch the balance from history
@@ -1200,17 +1339,25 @@ class StrategyBase(Storage, StateMachine, Events):
             base_amount,
             quote_symbol,
             quote_amount,
-            datetime.datetime.now().isoformat()
+            self.clock.now().isoformat()
         )
 
         self.orders_log.info(message)
 
+    @property
+    def clock(self):
+        """ Clock of the process, simulated in backtests
+
+            :return: object | Clock
+        """
+        return get_clock()
+
     @property
     def account(self):
-        """ Return the full account as :class:`bitshares.account.Account` object!
-            Can be refreshed by using ``x.refresh()``
+        """ Return the account as :class:`dexbot.lean_account.LeanAccount` object, shared by the workers of the
+            account. Can be refreshed by using :meth:`refresh_account`
 
-            :return: object | Account
+            :return: object | LeanAccount
         """
         return self._account
 
@@ -1220,6 +1367,7 @@ class StrategyBase(Storage, StateMachine, Events):
 
             :return: Balances in list where each asset is in their own Amount object
         """
+        self.refresh_account()
         return self._account.balances
 
     @property
@@ -1239,7 +1387,7 @@ class StrategyBase(Storage, StateMachine, Events):
         """
         # Refresh account data
         if refresh:
-            self.account.refresh()
+            self.refresh_account()
 
         orders = []
         for order in self.account.openorders:
@@ -1253,16 +1401,7 @@ class StrategyBase(Storage, StateMachine, Events):
 
             :return: List of Order objects
         """
-        orders = []
-
-        # Refresh account data
-        self.account.refresh()
-
-        for order in self.account.openorders:
-            if self.worker["market"] == order.market and self.account.openorders:
-                orders.append(order)
-
-        return orders
+        return self.get_own_market_orders()
 
     @property
     def market(self):
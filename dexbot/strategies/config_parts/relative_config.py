@@ -32,6 +32,13 @@ class RelativeConfig(BaseConfig):
                           'Use external reference price instead of center price acquired from the market', None),
             ConfigElement('external_price_source', 'choice', EXCHANGES[0], 'External price source',
                           'The bot will try to get price information from this source', EXCHANGES),
+            ConfigElement('external_price_sources', 'string', '', 'Additional price sources',
+                          'Comma separated list of more sources, for example "kraken, binance". '
+                          'The prices of all the sources are fetched at once and combined',
+                          r'^[a-z0-9, ]*$'),
+            ConfigElement('external_price_method', 'choice', 'median', 'Price combination',
+                          'How the prices of several sources are combined, prices too far from the median are ignored',
+                          [('median', 'Median'), ('vwap', 'Volume weighted average')]),
             ConfigElement('amount', 'float', 1, 'Amount',
                           'Fixed order size, expressed in quote asset, unless "relative order size" selected',
                           (0, None, 8, '')),
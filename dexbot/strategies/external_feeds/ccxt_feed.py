@@ -1,9 +1,11 @@
-import asyncio
-
-import ccxt.async_support as accxt
+from dexbot.async_runtime import run_coroutine
+from dexbot.strategies.external_feeds.ccxt_pool import get_exchange_pool
 
 
 async def print_ticker(symbol, exchange_id):
+    # ccxt takes a while to import, it is only loaded when an exchange is used
+    import ccxt.async_support as accxt
+
     # Verbose mode will show the order of execution to verify concurrency
     exchange = getattr(accxt, exchange_id)({'verbose': True})
     await exchange.fetch_ticker(symbol)
@@ -11,13 +13,12 @@ async def print_ticker(symbol, exchange_id):
 
 
 async def get_ccxt_load_markets(exchange_id):
-    exchange = getattr(accxt, exchange_id)({'verbose': False})
-    symbols = await exchange.load_markets()
-    await exchange.close()
-    return symbols
+    return await get_exchange_pool().load_markets(exchange_id)
 
 
 async def fetch_ticker(exchange, symbol):
+    import ccxt.async_support as accxt
+
     ticker = None
     try:
         ticker = await exchange.fetch_ticker(symbol.upper())
@@ -34,14 +35,33 @@ async def fetch_ticker(exchange, symbol):
     return ticker
 
 
+async def fetch_ccxt_ticker(pair, exchange_id):
+    """ Fetch center price and 24h volume of the pair
+
+        :param list pair: [quote, base]
+        :param str exchange_id: ccxt exchange id
+        :return tuple: (price, volume in quote asset) or None
+    """
+    ticker = await get_exchange_pool().fetch_ticker(exchange_id, '/'.join(pair).upper())
+    if not ticker or not ticker.get('bid') or not ticker.get('ask'):
+        return None
+    return (ticker['bid'] + ticker['ask']) / 2, ticker.get('baseVolume')
+
+
+async def _fetch_pooled_ticker(exchange_id, symbol):
+    # The pool must be looked up on the loop which runs the request
+    return await get_exchange_pool().fetch_ticker(exchange_id, symbol)
+
+
 def get_ccxt_price(symbol, exchange_name):
     """ Get all tickers from multiple exchanges using async """
     center_price = None
 
-    async_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(async_loop)
-    exchange = getattr(accxt, exchange_name)({'verbose': False})
-    ticker = asyncio.get_event_loop().run_until_complete(fetch_ticker(exchange, symbol))
+    try:
+        ticker = run_coroutine(_fetch_pooled_ticker(exchange_name, symbol.upper()))
+    except Exception as exception:
+        print(type(exception).__name__, exception.args, 'Exchange Error (ignoring)')
+        ticker = None
     if ticker:
         center_price = (ticker['bid'] + ticker['ask']) / 2
     return center_price
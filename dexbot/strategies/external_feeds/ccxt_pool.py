@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+import weakref
+
+log = logging.getLogger(__name__)
+
+# Seconds after which the market metadata of an exchange is loaded again
+MARKETS_EXPIRY = 60 * 60
+
+# Event loop => ExchangePool
+_pools = weakref.WeakKeyDictionary()
+
+
+class ExchangePool:
+    """ Long-lived ccxt clients, one per exchange id, with their HTTP session and market metadata
+
+        Clients are created on first use and their markets are loaded once per ``MARKETS_EXPIRY``, so a pair
+        which the exchange doesn't list is answered without a request. Tickers requested at the same time, e.g.
+        by all the price feeds refreshed in one cycle, are fetched with a single ``fetch_tickers`` call on
+        exchanges which support it.
+
+        The clients are bound to the event loop which created the pool, use :func:`get_exchange_pool`.
+
+        :param dict options: Extra ccxt config per exchange id, e.g. {'kraken': {'urls': {...}}}
+    """
+
+    def __init__(self, options=None):
+        self.options = options or {}
+        self.exchanges = {}
+        self.markets_loaded_at = {}
+        # Exchange id => task loading the markets, concurrent callers wait for the same request
+        self.markets_loading = {}
+        # Exchange id => {symbol: [futures]} waiting for the next batch
+        self.pending = {}
+
+    def create_exchange(self, exchange_id):
+        # ccxt takes a while to import, it is only loaded when an exchange is used
+        import ccxt.async_support as accxt
+
+        config = {'verbose': False, 'enableRateLimit': True}
+        config.update(self.options.get(exchange_id, {}))
+        return getattr(accxt, exchange_id)(config)
+
+    async def get_exchange(self, exchange_id):
+        """ Return the client of the exchange with its markets loaded
+        """
+        exchange = self.exchanges.get(exchange_id)
+        if exchange is None:
+            exchange = self.exchanges[exchange_id] = self.create_exchange(exchange_id)
+
+        loaded_at = self.markets_loaded_at.get(exchange_id)
+        if loaded_at is None or time.time() - loaded_at > MARKETS_EXPIRY:
+            loading = self.markets_loading.get(exchange_id)
+            if loading is None:
+                loading = self.markets_loading[exchange_id] = asyncio.ensure_future(
+                    self._load_markets(exchange_id, exchange, reload=loaded_at is not None))
+            # A cancelled caller doesn't cancel the request of the others
+            await asyncio.shield(loading)
+        return exchange
+
+    async def _load_markets(self, exchange_id, exchange, reload):
+        try:
+            await exchange.load_markets(reload=reload)
+            self.markets_loaded_at[exchange_id] = time.time()
+        finally:
+            self.markets_loading.pop(exchange_id, None)
+
+    async def load_markets(self, exchange_id):
+        exchange = await self.get_exchange(exchange_id)
+        return exchange.markets
+
+    async def fetch_ticker(self, exchange_id, symbol):
+        """ Fetch the ticker of one symbol, batched with the other symbols requested in the same loop iteration
+
+            :param str exchange_id: ccxt exchange id
+            :param str symbol: Pair as QUOTE/BASE
+            :return dict: ccxt ticker or None when the exchange doesn't list the pair
+        """
+        exchange = await self.get_exchange(exchange_id)
+        if symbol not in exchange.markets:
+            return None
+
+        future = asyncio.get_event_loop().create_future()
+        pending = self.pending.setdefault(exchange_id, {})
+        if not pending:
+            asyncio.get_event_loop().call_soon(lambda: asyncio.ensure_future(self._flush(exchange_id)))
+        pending.setdefault(symbol, []).append(future)
+        return await future
+
+    async def _flush(self, exchange_id):
+        pending = self.pending.pop(exchange_id, {})
+        try:
+            tickers = await self.fetch_tickers(exchange_id, list(pending))
+        except Exception as exception:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(exception)
+            return
+
+        for symbol, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(tickers.get(symbol))
+
+    async def fetch_tickers(self, exchange_id, symbols):
+        """ Fetch the tickers of several symbols in as few requests as the exchange allows
+
+            :param str exchange_id: ccxt exchange id
+            :param list symbols: Pairs as QUOTE/BASE
+            :return dict: symbol => ccxt ticker, pairs which the exchange doesn't list are left out
+        """
+        exchange = await self.get_exchange(exchange_id)
+        symbols = [symbol for symbol in symbols if symbol in exchange.markets]
+        if not symbols:
+            return {}
+
+        if len(symbols) > 1 and exchange.has.get('fetchTickers'):
+            log.debug('Fetching {} tickers from {}'.format(len(symbols), exchange_id))
+            tickers = await exchange.fetch_tickers(symbols)
+            return {symbol: ticker for symbol, ticker in tickers.items() if symbol in symbols}
+
+        results = await asyncio.gather(*(exchange.fetch_ticker(symbol) for symbol in symbols),
+                                       return_exceptions=True)
+        tickers = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                log.debug('Unable to fetch {} from {}: {}'.format(symbol, exchange_id, result))
+            else:
+                tickers[symbol] = result
+        return tickers
+
+    async def close(self):
+        exchanges, self.exchanges = self.exchanges, {}
+        self.markets_loaded_at = {}
+        self.markets_loading = {}
+        for exchange in exchanges.values():
+            await exchange.close()
+
+
+def get_exchange_pool(loop=None):
+    """ Return the exchange pool of the event loop, the running loop by default
+    """
+    if loop is None:
+        loop = asyncio.get_event_loop()
+    pool = _pools.get(loop)
+    if pool is None:
+        pool = _pools[loop] = ExchangePool()
+    return pool
@@ -1,6 +1,13 @@
-import requests
 import asyncio
+import json
+import logging
+import os
+import time
 
+import aiohttp
+
+from dexbot.async_runtime import run_coroutine
+from dexbot.helper import get_user_data_directory, mkdir
 from dexbot.strategies.external_feeds.process_pair import split_pair, debug
 
 """ To use Gecko API, note that gecko does not provide pairs by default.
@@ -10,25 +17,146 @@ from dexbot.strategies.external_feeds.process_pair import split_pair, debug
 """
 GECKO_COINS_URL = 'https://api.coingecko.com/api/v3/coins/'
 
+# Seconds after which the coin list is downloaded again
+COIN_LIST_EXPIRY = 24 * 60 * 60
 
-async def get_json(url):
-    r = requests.get(url)
-    json_obj = r.json()
-    return json_obj
+log = logging.getLogger(__name__)
 
 
-def _get_market_price(base, quote):
-    try:
-        async_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(async_loop)
+async def get_json(url, session=None):
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await get_json(url, session)
+    async with session.get(url) as response:
+        return await response.json()
+
+
+class CoinIndex:
+    """ Symbol to coin id index of the gecko coin list, persisted in the user data directory
+
+        The coin list has thousands of entries, so it is downloaded at most once per ``expiry``. An expired index
+        keeps being used while the new list is downloaded in the background.
+
+        :param str path: File to persist the index in
+        :param float expiry: Seconds after which the index is refreshed
+    """
+
+    def __init__(self, path=None, expiry=COIN_LIST_EXPIRY):
+        if path is None:
+            path = os.path.join(get_user_data_directory(), 'data', 'gecko_coins.json')
+        self.path = path
+        self.expiry = expiry
+        self.coins = None
+        self.updated_at = 0
+        self.refreshing = None
+        self.refreshing_loop = None
+
+    @property
+    def expired(self):
+        return time.time() - self.updated_at > self.expiry
+
+    async def get_coin_id(self, symbol):
+        """ Return the gecko id of the coin or None when the symbol is unknown
+        """
+        if self.coins is None:
+            self.load()
+        if self.coins is None:
+            await self.refresh()
+        elif self.expired:
+            self._start_refresh()
+        return (self.coins or {}).get(symbol.lower())
+
+    def load(self):
+        try:
+            with open(self.path) as file:
+                data = json.load(file)
+            self.coins = data['coins']
+            self.updated_at = data['updated_at']
+        except (OSError, ValueError, KeyError):
+            pass
+
+    def save(self):
+        try:
+            mkdir(os.path.dirname(self.path))
+            # Write to a temporary file first, another process may be reading the index
+            temp_path = '{}.{}'.format(self.path, os.getpid())
+            with open(temp_path, 'w') as file:
+                json.dump({'updated_at': self.updated_at, 'coins': self.coins}, file)
+            os.replace(temp_path, self.path)
+        except OSError as exception:
+            log.warning('Unable to save gecko coin list: {}'.format(exception))
+
+    def _start_refresh(self):
+        loop = asyncio.get_event_loop()
+        if self.refreshing is None or self.refreshing.done() or self.refreshing_loop is not loop:
+            self.refreshing = asyncio.ensure_future(self.download())
+            self.refreshing_loop = loop
+
+    async def refresh(self):
+        self._start_refresh()
+        # Another request may be downloading the list already, wait for it instead of downloading again
+        await asyncio.shield(self.refreshing)
 
-        coin_list = asyncio.get_event_loop().run_until_complete(get_json(GECKO_COINS_URL + 'list'))
+    async def download(self):
+        try:
+            coin_list = await get_json(GECKO_COINS_URL + 'list')
+        except Exception as exception:
+            log.warning('Unable to download gecko coin list: {}'.format(exception))
+            return
 
-        quote_name = check_gecko_symbol_exists(coin_list, quote.lower())
+        coins = {}
+        for coin in coin_list:
+            # The first coin of a symbol wins, same as in check_gecko_symbol_exists()
+            coins.setdefault(coin['symbol'], coin['id'])
+        self.coins = coins
+        self.updated_at = time.time()
+        self.save()
+
+
+coin_index = CoinIndex()
+
+
+async def _fetch_market(session, base, quote):
+    """ Returns (price, volume in base) of the quote coin priced in base currency or None
+    """
+    quote_name = await coin_index.get_coin_id(quote)
+    if not quote_name:
+        return None
+    lookup_pair = "?vs_currency=" + base.lower() + "&ids=" + quote_name
+    ticker = await get_json(GECKO_COINS_URL + 'markets' + lookup_pair, session)
+    for entry in ticker:
+        if entry.get('current_price'):
+            return entry['current_price'], entry.get('total_volume') or 0
+    return None
+
+
+async def fetch_gecko_ticker(pair, session=None):
+    """ Fetch price and 24h volume of the pair, the inverted pair is tried if the pair is not found
+
+        :param list pair: [quote, base]
+        :param aiohttp.ClientSession session: Session to use
+        :return tuple: (price, volume in quote asset) or None
+    """
+    quote, base = pair
+    market = await _fetch_market(session, base, quote)
+    if market:
+        price, volume = market
+        return price, volume / price
+
+    market = await _fetch_market(session, quote, base)
+    if market:
+        price, volume = market
+        return 1 / price, volume
+    return None
+
+
+def _get_market_price(base, quote):
+    try:
+        quote_name = run_coroutine(coin_index.get_coin_id(quote))
         lookup_pair = "?vs_currency=" + base.lower() + "&ids=" + quote_name
         market_url = GECKO_COINS_URL + 'markets' + lookup_pair
         debug(market_url)
-        ticker = asyncio.get_event_loop().run_until_complete(get_json(market_url))
+        ticker = run_coroutine(get_json(market_url))
         current_price = None
         for entry in ticker:
             current_price = entry['current_price']
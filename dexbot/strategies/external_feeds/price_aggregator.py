@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import statistics
+
+import aiohttp
+
+from dexbot.async_runtime import run_coroutine
+from dexbot.strategies.external_feeds.ccxt_feed import fetch_ccxt_ticker
+from dexbot.strategies.external_feeds.gecko_feed import fetch_gecko_ticker
+from dexbot.strategies.external_feeds.waves_feed import fetch_waves_ticker
+from dexbot.strategies.external_feeds.stream_feed import get_ticker_stream
+from dexbot.strategies.external_feeds.process_pair import ALT_USD_SYMBOLS, USD_PATTERN, normalize_pair, \
+    normalize_symbol, get_consolidated_pair, get_alt_usd_pair
+
+log = logging.getLogger(__name__)
+
+# Seconds allowed for fetching one price from all the sources
+PRICE_BUDGET = 10
+
+# Prices deviating from the median more than this are rejected as outliers
+MAX_DEVIATION = 0.05
+
+
+class PriceAggregator:
+    """ Fetches the price of a pair from several sources at once and combines the results
+
+        For every source the direct pair, the pairs with USD replaced by each of the dollar tokens in ALT_USD_SYMBOLS
+        and the pair consolidated through USD are fetched concurrently. The first leg available in that order is used,
+        same as in :meth:`StrategyBase.get_external_market_center_price` before.
+
+        :param list exchanges: Price sources, 'gecko', 'waves' or ccxt exchange ids
+        :param str method: 'median' or 'vwap'
+        :param float budget: Seconds allowed for one price, sources which don't answer in time are ignored
+        :param float max_deviation: Ratio of deviation from the median above which a price is rejected
+        :param bool streaming: Use the live ticker websockets of the exchanges which publish them
+    """
+
+    def __init__(self, exchanges, method='median', budget=PRICE_BUDGET, max_deviation=MAX_DEVIATION,
+                 streaming=False):
+        self.exchanges = list(exchanges)
+        self.method = method
+        self.budget = budget
+        self.max_deviation = max_deviation
+        self.streaming = streaming
+
+    def get_price(self, symbol):
+        """ Blocking version of :meth:`fetch_price`
+
+            :param str symbol: Pair as QUOTE/BASE
+            :return float: Price or None
+        """
+        try:
+            return run_coroutine(self.fetch_price(symbol), timeout=self.budget + 1)
+        except Exception as exception:
+            log.warning('Unable to get external price of {}: {}'.format(symbol, exception))
+            return None
+
+    async def fetch_price(self, symbol):
+        """ Fetch the price from all the sources and combine them
+
+            :param str symbol: Pair as QUOTE/BASE
+            :return float: Price or None
+        """
+        return self.combine(await self.fetch_quotes(symbol))
+
+    async def fetch_quotes(self, symbol):
+        """ Fetch the price from all the sources
+
+            :param str symbol: Pair as QUOTE/BASE
+            :return list: (price, volume) of every source which answered in time
+        """
+        legs = self.get_legs(self.filter_pair(symbol))
+
+        async with aiohttp.ClientSession() as session:
+            tasks = {}
+            for exchange in self.exchanges:
+                for leg in legs:
+                    for leg_pair in leg:
+                        key = (exchange, tuple(leg_pair))
+                        if key not in tasks:
+                            tasks[key] = asyncio.ensure_future(self.fetch_ticker(exchange, leg_pair, session))
+
+            done, pending = await asyncio.wait(list(tasks.values()), timeout=self.budget)
+            for task in pending:
+                task.cancel()
+
+        tickers = {}
+        for key, task in tasks.items():
+            if task not in done:
+                log.debug('{} {} did not answer in time'.format(*key))
+            elif task.exception():
+                log.debug('{} {} failed: {}'.format(key[0], key[1], task.exception()))
+            elif task.result():
+                tickers[key] = task.result()
+
+        quotes = []
+        for exchange in self.exchanges:
+            for leg in legs:
+                leg_tickers = [tickers.get((exchange, tuple(leg_pair))) for leg_pair in leg]
+                if not all(leg_tickers):
+                    continue
+                price = 1
+                for ticker_price, _ in leg_tickers:
+                    price *= ticker_price
+                # Volume of a consolidated leg is not in the units of the pair
+                volume = leg_tickers[0][1] if len(leg) == 1 else None
+                quotes.append((price, volume))
+                log.debug('{} price of {}: {}'.format(exchange, symbol, price))
+                break
+
+        return quotes
+
+    def get_streamed_quotes(self, symbol):
+        """ Prices of the sources which stream all the pairs of a leg, without any network request
+
+            The pairs are subscribed by :meth:`fetch_quotes`, until then no price is returned.
+
+            :param str symbol: Pair as QUOTE/BASE
+            :return list: (price, volume) of every streamed source
+        """
+        legs = self.get_legs(self.filter_pair(symbol))
+        quotes = []
+        for exchange in self.exchanges:
+            stream = get_ticker_stream(exchange)
+            if stream is None:
+                continue
+            for leg in legs:
+                leg_quotes = [
+                    stream.get_quote('/'.join(normalize_symbol(asset, exchange) for asset in leg_pair).upper())
+                    for leg_pair in leg
+                ]
+                if not all(leg_quotes):
+                    continue
+                price = 1
+                for quote in leg_quotes:
+                    price *= quote.price
+                quotes.append((price, leg_quotes[0].volume if len(leg) == 1 else None))
+                break
+        return quotes
+
+    @staticmethod
+    def filter_pair(symbol):
+        return normalize_pair(symbol)
+
+    @staticmethod
+    def get_legs(pair):
+        """ Pairs to fetch for one source in the order of preference, each leg is a list of pairs to multiply
+
+            :param list pair: [quote, base]
+            :return list: legs
+        """
+        legs = [[pair]]
+        if any(USD_PATTERN.match(asset) for asset in pair):
+            legs.extend([get_alt_usd_pair(pair, alt_usd)] for alt_usd in ALT_USD_SYMBOLS)
+        else:
+            pair1, pair2 = get_consolidated_pair(pair[0], pair[1])
+            legs.append([pair1, pair2])
+        return legs
+
+    async def fetch_ticker(self, exchange, pair, session):
+        """ Fetch (price, volume) of the pair from one source, from its ticker stream if it has a recent quote
+        """
+        pair = [normalize_symbol(asset, exchange) for asset in pair]
+        stream = get_ticker_stream(exchange) if self.streaming else None
+        if stream is not None:
+            symbol = '/'.join(pair).upper()
+            stream.subscribe(symbol)
+            quote = stream.get_quote(symbol)
+            if quote:
+                return quote.price, quote.volume
+
+        if exchange == 'gecko':
+            return await fetch_gecko_ticker(pair, session)
+        elif exchange == 'waves':
+            return await fetch_waves_ticker(pair, session)
+        return await fetch_ccxt_ticker(pair, exchange)
+
+    def combine(self, quotes):
+        """ Combine the prices of the sources after rejecting outliers
+
+            :param list quotes: (price, volume) tuples
+            :return float: Price or None
+        """
+        quotes = [(price, volume) for price, volume in quotes if price and price > 0]
+        if not quotes:
+            return None
+
+        median = statistics.median(price for price, _ in quotes)
+        accepted = [(price, volume) for price, volume in quotes if abs(price / median - 1) <= self.max_deviation]
+        if not accepted:
+            log.warning('External price sources disagree: {}'.format([price for price, _ in quotes]))
+            return None
+
+        if self.method == 'vwap':
+            weighted = [(price, volume) for price, volume in accepted if volume]
+            if weighted:
+                return sum(price * volume for price, volume in weighted) / sum(volume for _, volume in weighted)
+
+        return statistics.median(price for price, _ in accepted)
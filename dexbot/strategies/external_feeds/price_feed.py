@@ -1,10 +1,8 @@
-import re
-
 from dexbot.strategies.external_feeds.ccxt_feed import get_ccxt_price
 from dexbot.strategies.external_feeds.gecko_feed import get_gecko_price
 from dexbot.strategies.external_feeds.waves_feed import get_waves_price
-from dexbot.strategies.external_feeds.process_pair import split_pair, join_pair, filter_prefix_symbol, \
-    filter_bit_symbol, get_consolidated_pair, debug
+from dexbot.strategies.external_feeds.process_pair import split_pair, join_pair, normalize_symbol, \
+    get_consolidated_pair, get_alt_usd_pair, debug
 
 
 class PriceFeed:
@@ -45,8 +43,7 @@ class PriceFeed:
         self._exchange = exchange
 
     def filter_symbols(self):
-        raw_pair = self._pair
-        self._pair = [filter_bit_symbol(j) for j in [filter_prefix_symbol(i) for i in raw_pair]]
+        self._pair = [normalize_symbol(asset) for asset in self._pair]
         debug(self._pair)
 
     def get_consolidated_price(self):
@@ -74,13 +71,7 @@ class PriceFeed:
         get center price by search and replace for USD with USDT only
         todo: extend in PriceFeed or base.py for other alts, e.g. USDC, TUSD,etc
         """
-        alt_usd_pair = self._pair
-        i = 0
-        while i < 2:
-            if re.match(r'^USD$', self._pair[i], re.I):
-                alt_usd_pair[i] = re.sub(r'USD', type, self._pair[i])
-            i = i + 1
-        self._pair = alt_usd_pair
+        self._pair = get_alt_usd_pair(self._pair, type)
         self._symbol = join_pair(self._pair)
 
     def _get_center_price(self):
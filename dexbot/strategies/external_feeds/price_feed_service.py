@@ -0,0 +1,199 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import namedtuple
+
+from dexbot.async_runtime import get_event_loop
+from dexbot.instrumentation import get_instrumentation
+from dexbot.strategies.external_feeds.price_aggregator import PriceAggregator, PRICE_BUDGET
+
+log = logging.getLogger(__name__)
+
+# Seconds between refreshes of the prices
+REFRESH_INTERVAL = 60
+
+# Prices older than this are not served
+MAX_AGE = 600
+
+# Feeds which nobody has read for this many seconds are no longer refreshed
+IDLE_TIMEOUT = 1800
+
+_service = None
+_service_lock = threading.Lock()
+
+
+class FeedQuote(namedtuple('FeedQuote', 'price volume updated_at error')):
+    """ Last good quote of one source, with the error of the latest refresh if it failed
+
+        :param float price: Price or None when never fetched successfully
+        :param float volume: Volume in the quote asset or None
+        :param float updated_at: Time of the last successful refresh
+        :param str error: Error of the latest refresh, None when it succeeded
+    """
+
+    @property
+    def age(self):
+        if self.updated_at is None:
+            return None
+        return time.time() - self.updated_at
+
+
+class Feed:
+    """ Price of one pair from one source, refreshed by :class:`PriceFeedService`
+    """
+
+    def __init__(self, source, symbol, aggregator):
+        self.source = source
+        self.symbol = symbol
+        self.quote = FeedQuote(None, None, None, None)
+        self.last_read = time.time()
+        # Set after the first refresh, whether it succeeded or not
+        self.ready = threading.Event()
+        self.aggregator = aggregator
+
+
+class PriceFeedService:
+    """ Refreshes the external prices in the background on the shared event loop
+
+        Feeds are keyed by (source, pair), so workers using the same pair share the requests. Readers get the
+        last good price immediately, only the very first read of a feed waits for its first refresh.
+
+        :param float interval: Seconds between refreshes
+        :param float max_age: Seconds after which a price is considered stale and is not served
+        :param bool streaming: Serve the live quotes of the exchanges which stream their tickers
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL, max_age=MAX_AGE, streaming=False):
+        self.interval = interval
+        self.max_age = max_age
+        self.streaming = streaming
+        self.feeds = {}
+        self.lock = threading.Lock()
+        self.loop = None
+        self.task = None
+
+    def subscribe(self, sources, symbol):
+        """ Start refreshing the price of the pair from the sources
+
+            :param list sources: Price sources, 'gecko', 'waves' or ccxt exchange ids
+            :param str symbol: Pair as QUOTE/BASE
+        """
+        new_feeds = []
+        with self.lock:
+            for source in sources:
+                key = (source, symbol)
+                if key not in self.feeds:
+                    self.feeds[key] = Feed(source, symbol, self.create_aggregator(source))
+                    new_feeds.append(self.feeds[key])
+        self.start()
+        for feed in new_feeds:
+            asyncio.run_coroutine_threadsafe(self.refresh(feed), self.loop)
+
+    def create_aggregator(self, source):
+        return PriceAggregator([source], streaming=self.streaming)
+
+    def get_quote(self, source, symbol):
+        """ Return the cached quote of one source
+
+            :return FeedQuote: Quote or None when the feed is not subscribed
+        """
+        feed = self.feeds.get((source, symbol))
+        if feed is None:
+            return None
+        feed.last_read = time.time()
+        return feed.quote
+
+    def get_price(self, sources, symbol, method='median', timeout=0):
+        """ Combine the cached prices of the sources, never waits for the network once the feeds are ready
+
+            :param list sources: Price sources, subscribed with :meth:`subscribe` before
+            :param str symbol: Pair as QUOTE/BASE
+            :param str method: 'median' or 'vwap'
+            :param float timeout: Seconds to wait for feeds which were not refreshed yet
+            :return float: Price or None when no source has a recent price
+        """
+        deadline = time.time() + timeout
+        quotes = []
+        for source in sources:
+            feed = self.feeds.get((source, symbol))
+            if feed is None:
+                continue
+            feed.ready.wait(max(deadline - time.time(), 0))
+
+            quote = self.get_quote(source, symbol)
+            streamed = feed.aggregator.get_streamed_quotes(symbol) if self.streaming else None
+            if streamed:
+                quotes.extend(streamed)
+            elif quote.price is None:
+                log.debug('No price of {} from {} yet: {}'.format(symbol, source, quote.error))
+            elif quote.age > self.max_age:
+                log.warning('Price of {} from {} is {:.0f} seconds old, ignoring it'.format(
+                    symbol, source, quote.age))
+            else:
+                quotes.append((quote.price, quote.volume))
+
+        return PriceAggregator(sources, method=method).combine(quotes)
+
+    def status(self):
+        """ Quotes of all the feeds, keyed by (source, pair)
+        """
+        return {key: feed.quote for key, feed in list(self.feeds.items())}
+
+    def start(self):
+        loop = get_event_loop()
+        with self.lock:
+            if self.task is not None and self.loop is loop and not self.task.done():
+                return
+            self.loop = loop
+            self.task = asyncio.run_coroutine_threadsafe(self.run(), loop)
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            now = time.time()
+            with self.lock:
+                for key, feed in list(self.feeds.items()):
+                    if now - feed.last_read > IDLE_TIMEOUT:
+                        log.debug('Nobody reads the price of {} from {}, stopping the refresh'.format(
+                            feed.symbol, feed.source))
+                        del self.feeds[key]
+                feeds = list(self.feeds.values())
+            if feeds:
+                await asyncio.gather(*(self.refresh(feed) for feed in feeds))
+
+    async def refresh(self, feed):
+        """ Fetch the price of one feed, keeping the last good quote on failure
+        """
+        started = time.perf_counter()
+        try:
+            quotes = await asyncio.wait_for(feed.aggregator.fetch_quotes(feed.symbol), PRICE_BUDGET + 1)
+        except Exception as exception:
+            quotes = []
+            error = str(exception) or type(exception).__name__
+        else:
+            error = None if quotes else 'no price'
+        get_instrumentation().observe_feed(feed.source, time.perf_counter() - started, error=bool(error))
+
+        if quotes:
+            price, volume = quotes[0]
+            feed.quote = FeedQuote(price, volume, time.time(), None)
+        else:
+            log.debug('Unable to refresh the price of {} from {}: {}'.format(feed.symbol, feed.source, error))
+            feed.quote = feed.quote._replace(error=error)
+        feed.ready.set()
+
+
+def get_price_feed_service():
+    """ Return the price feed service shared by all the workers of the process
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = PriceFeedService()
+        return _service
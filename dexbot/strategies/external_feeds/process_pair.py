@@ -1,7 +1,28 @@
+import functools
 import re
 
 isDebug = False
 
+# Rules are compiled once, the filters run for every price request
+PREFIX_PATTERN = re.compile(r'^[a-zA-Z](.*)\.(.*)')
+PREFIX_SUB_PATTERN = re.compile(r'(.*)\.')
+BIT_PATTERN = re.compile(r'bit[a-zA-Z]{3}')
+SPLIT_PATTERN = re.compile(':|/')
+USD_PATTERN = re.compile(r'^USD$', re.I)
+
+# Dollar tokens which stand in for USD on exchanges without USD markets
+ALT_USD_SYMBOLS = ['USDT', 'USDC', 'TUSD', 'GUSD']
+
+# Exchange => {normalized symbol: symbol on the exchange}, '*' applies to all the exchanges. The rules are applied
+# after the bridge prefix and the bit prefix are removed, e.g. OPEN.BTC => BTC and bitGOLD => GOLD => XAU
+SYMBOL_MAP = {
+    '*': {
+        # Bitassets named differently than the ISO codes used by the exchanges
+        'GOLD': 'XAU',
+        'SILVER': 'XAG',
+    },
+}
+
 
 def debug(*args):
     if isDebug:
@@ -12,29 +33,82 @@ def print_args(*args):
     print(' '.join([str(arg) for arg in args]))
 
 
+@functools.lru_cache(maxsize=1024)
 def filter_prefix_symbol(symbol):
     # Example open.USD or bridge.USD, remove leading bit up to .
     base = ''
-    if re.match(r'^[a-zA-Z](.*)\.(.*)', symbol):
-        base = re.sub('(.*)\.', '', symbol)
+    if PREFIX_PATTERN.match(symbol):
+        base = PREFIX_SUB_PATTERN.sub('', symbol)
     else:
         base = symbol
     return base
 
 
+@functools.lru_cache(maxsize=1024)
 def filter_bit_symbol(symbol):
     # if matches bitUSD or bitusd any bit prefix, strip
     base = ''
-    if re.match(r'bit[a-zA-Z]{3}', symbol):
-        base = re.sub("bit", "", symbol)
+    if BIT_PATTERN.match(symbol):
+        base = symbol.replace('bit', '')
     else:
         base = symbol
     return base
 
 
 def split_pair(symbol):
-    pair = re.split(':|/', symbol)
-    return pair
+    # A new list every time, callers modify the pair
+    return list(_split_pair(symbol))
+
+
+@functools.lru_cache(maxsize=1024)
+def _split_pair(symbol):
+    return tuple(SPLIT_PATTERN.split(symbol))
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_symbol(symbol, exchange=None):
+    """ Map a BitShares asset symbol to the symbol used by the exchange, e.g. OPEN.BTC => BTC, bitUSD => USD
+
+        :param str symbol: BitShares asset symbol
+        :param str exchange: Exchange id, only the rules for all the exchanges are applied when None
+        :return str: Symbol on the exchange
+    """
+    symbol = filter_bit_symbol(filter_prefix_symbol(symbol))
+    for rules in (SYMBOL_MAP.get(exchange, {}), SYMBOL_MAP['*']):
+        if symbol.upper() in rules:
+            return rules[symbol.upper()]
+    return symbol
+
+
+def normalize_pair(symbol, exchange=None):
+    """ Split the market and normalize both assets, see :func:`normalize_symbol`
+
+        :param str symbol: Market as QUOTE/BASE or QUOTE:BASE
+        :param str exchange: Exchange id
+        :return list: [quote, base]
+    """
+    return [normalize_symbol(asset, exchange) for asset in _split_pair(symbol)]
+
+
+def add_symbol_mapping(exchange, symbol, external_symbol):
+    """ Add a rule to the mapping table, e.g. add_symbol_mapping('somex', 'USD', 'USDT')
+
+        :param str exchange: Exchange id or '*' for all the exchanges
+        :param str symbol: Normalized symbol
+        :param str external_symbol: Symbol on the exchange
+    """
+    SYMBOL_MAP.setdefault(exchange, {})[symbol.upper()] = external_symbol
+    normalize_symbol.cache_clear()
+
+
+def get_alt_usd_pair(pair, alt_usd):
+    """ Replace USD in the pair with a dollar token
+
+        :param list pair: [quote, base]
+        :param str alt_usd: Symbol to use instead of USD, e.g. USDT
+        :return list: New pair, the given one is not modified
+    """
+    return [USD_PATTERN.sub(alt_usd, asset) for asset in pair]
 
 
 def join_pair(pair):
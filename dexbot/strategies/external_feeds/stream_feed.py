@@ -0,0 +1,210 @@
+import abc
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import aiohttp
+
+log = logging.getLogger(__name__)
+
+# Seconds after which a streamed quote is not trusted anymore, REST polling is used instead
+STREAM_MAX_AGE = 30
+
+# Seconds between websocket pings
+KEEP_ALIVE = 25
+
+# Exchange id => TickerStream
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+class StreamQuote(namedtuple('StreamQuote', 'bid ask volume updated_at')):
+    """ Best bid and ask of a pair as last published by the exchange
+
+        :param float bid: Best bid
+        :param float ask: Best ask
+        :param float volume: 24h volume in the quote asset or None when the stream doesn't publish it
+        :param float updated_at: Time the quote was received
+    """
+
+    @property
+    def price(self):
+        return (self.bid + self.ask) / 2
+
+
+class TickerStream(abc.ABC):
+    """ Keeps the best bid and ask of the subscribed pairs up to date from the ticker websocket of an exchange
+
+        The stream runs on the event loop which subscribed first and reconnects when the connection drops.
+        Quotes can be read from any thread with :meth:`get_quote`.
+
+        :param str url: Websocket url, the public url of the exchange by default
+    """
+
+    url = None
+
+    def __init__(self, url=None):
+        if url:
+            self.url = url
+        self.symbols = set()
+        self.quotes = {}
+        self.loop = None
+        self.connection = None
+        self.task = None
+
+    def subscribe(self, symbol):
+        """ Start streaming the pair, must be called on the event loop
+
+            :param str symbol: Pair as QUOTE/BASE
+        """
+        if self.task is None or self.task.done():
+            self.loop = asyncio.get_event_loop()
+            self.task = asyncio.ensure_future(self.run())
+        if symbol in self.symbols:
+            return
+        self.symbols.add(symbol)
+        if self.connection is not None and not self.connection.closed:
+            asyncio.ensure_future(self.send_subscribe([symbol]))
+
+    def get_quote(self, symbol, max_age=STREAM_MAX_AGE):
+        """ Return the last quote of the pair or None when it is missing or too old
+        """
+        quote = self.quotes.get(symbol)
+        if quote is None or time.time() - quote.updated_at > max_age:
+            return None
+        return quote
+
+    async def run(self):
+        attempts = 0
+        while True:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.ws_connect(self.url, heartbeat=KEEP_ALIVE) as connection:
+                        log.debug('Streaming tickers from {}'.format(self.url))
+                        self.connection = connection
+                        attempts = 0
+                        if self.symbols:
+                            await self.send_subscribe(list(self.symbols))
+                        async for message in connection:
+                            if message.type != aiohttp.WSMsgType.TEXT:
+                                break
+                            self.on_message(message.data)
+            except (aiohttp.ClientError, OSError) as exception:
+                log.debug('Ticker stream {} failed: {}'.format(self.url, exception))
+            finally:
+                self.connection = None
+
+            attempts += 1
+            await asyncio.sleep(min((attempts - 1) * 2, 30))
+
+    def on_message(self, message):
+        try:
+            data = json.loads(message)
+            tickers = self.parse(data)
+        except (ValueError, KeyError, IndexError, TypeError) as exception:
+            log.debug('Unable to parse ticker message {}: {}'.format(message, exception))
+            return
+
+        now = time.time()
+        for symbol, bid, ask, volume in tickers:
+            if bid and ask:
+                self.quotes[symbol] = StreamQuote(bid, ask, volume, now)
+
+    @abc.abstractmethod
+    async def send_subscribe(self, symbols):
+        """ Subscribe to the tickers of the pairs on the open connection
+        """
+
+    @abc.abstractmethod
+    def parse(self, data):
+        """ Return (symbol, bid, ask, volume) tuples of the tickers in the message
+        """
+
+    def stop(self):
+        if self.task is not None:
+            if not self.loop.is_closed():
+                self.loop.call_soon_threadsafe(self.task.cancel)
+            self.task = None
+
+
+class BinanceTickerStream(TickerStream):
+    """ Best bid and ask from the bookTicker streams of Binance
+    """
+
+    url = 'wss://stream.binance.com:9443/ws'
+
+    def __init__(self, url=None):
+        super().__init__(url)
+        self.stream_symbols = {}
+        self.request_id = 0
+
+    async def send_subscribe(self, symbols):
+        streams = []
+        for symbol in symbols:
+            stream_symbol = symbol.replace('/', '').upper()
+            self.stream_symbols[stream_symbol] = symbol
+            streams.append('{}@bookTicker'.format(stream_symbol.lower()))
+        self.request_id += 1
+        await self.connection.send_str(json.dumps({'method': 'SUBSCRIBE', 'params': streams, 'id': self.request_id}))
+
+    def parse(self, data):
+        if 's' not in data:
+            # Reply to a subscription
+            return []
+        symbol = self.stream_symbols.get(data['s'])
+        if symbol is None:
+            return []
+        return [(symbol, float(data['b']), float(data['a']), None)]
+
+
+class KrakenTickerStream(TickerStream):
+    """ Best bid, ask and 24h volume from the ticker channel of Kraken
+    """
+
+    url = 'wss://ws.kraken.com'
+
+    async def send_subscribe(self, symbols):
+        # Kraken calls bitcoin XBT
+        pairs = ['/'.join('XBT' if asset == 'BTC' else asset for asset in symbol.split('/')) for symbol in symbols]
+        await self.connection.send_str(json.dumps({
+            'event': 'subscribe', 'pair': pairs, 'subscription': {'name': 'ticker'}
+        }))
+
+    def parse(self, data):
+        if not isinstance(data, list) or data[-2] != 'ticker':
+            # Heartbeats and subscription status
+            return []
+        ticker = data[1]
+        symbol = '/'.join('BTC' if asset == 'XBT' else asset for asset in data[-1].split('/'))
+        return [(symbol, float(ticker['b'][0]), float(ticker['a'][0]), float(ticker['v'][1]))]
+
+
+STREAMS = {
+    'binance': BinanceTickerStream,
+    'kraken': KrakenTickerStream,
+}
+
+
+def get_ticker_stream(exchange_id):
+    """ Return the ticker stream of the exchange or None when the exchange is not streamed
+
+        :param str exchange_id: ccxt exchange id
+    """
+    with _streams_lock:
+        stream = _streams.get(exchange_id)
+        if stream is None and exchange_id in STREAMS:
+            stream = _streams[exchange_id] = STREAMS[exchange_id]()
+        return stream
+
+
+def set_ticker_stream(exchange_id, stream):
+    """ Use another stream for the exchange, e.g. one connected to a local replay server
+    """
+    with _streams_lock:
+        old_stream = _streams.get(exchange_id)
+        if old_stream is not None and old_stream is not stream:
+            old_stream.stop()
+        _streams[exchange_id] = stream
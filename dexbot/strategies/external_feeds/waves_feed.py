@@ -1,24 +1,48 @@
 import dexbot.strategies.external_feeds.process_pair
-import requests
-import asyncio
+import aiohttp
+
+from dexbot.async_runtime import run_coroutine
 
 WAVES_URL = 'https://marketdata.wavesplatform.com/api/'
 SYMBOLS_URL = "/symbols"
 MARKET_URL = "/ticker/"
 
 
-async def get_json(url):
-    response = requests.get(url)
-    return response.json()
+async def get_json(url, session=None):
+    if session is None:
+        async with aiohttp.ClientSession() as session:
+            return await get_json(url, session)
+    async with session.get(url) as response:
+        return await response.json()
+
+
+async def fetch_waves_ticker(pair, session=None):
+    """ Fetch price and 24h volume of the pair, the inverted pair is tried if the pair is not found
+
+        :param list pair: [quote, base]
+        :param aiohttp.ClientSession session: Session to use
+        :return tuple: (price, volume in quote asset) or None
+    """
+    for quote, base, inverted in ((pair[0], pair[1], False), (pair[1], pair[0], True)):
+        try:
+            ticker = await get_json(WAVES_URL + MARKET_URL + quote + '/' + base, session)
+            price = float(ticker['24h_close'])
+        except Exception:
+            continue  # No pair found on waves dex
+        if not price:
+            continue
+        volume = float(ticker.get('24h_volume') or 0)
+        if inverted:
+            return 1 / price, volume * price
+        return price, volume
+    return None
 
 
 def get_last_price(base, quote):
     current_price = None
     try:
         market_bq = MARKET_URL + quote + '/' + base  # external exchange format
-        async_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(async_loop)
-        ticker = asyncio.get_event_loop().run_until_complete(get_json(WAVES_URL + market_bq))
+        ticker = run_coroutine(get_json(WAVES_URL + market_bq))
         current_price = ticker['24h_close']
     except Exception as exeption:
         pass  # No pair found on waves dex for external price. 
@@ -26,9 +50,7 @@ def get_last_price(base, quote):
 
 
 def get_waves_symbols():
-    async_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(async_loop)
-    symbol_list = asyncio.get_event_loop().run_until_complete(get_json(WAVES_URL + SYMBOLS_URL))
+    symbol_list = run_coroutine(get_json(WAVES_URL + SYMBOLS_URL))
     return symbol_list
 
 
@@ -1,5 +1,5 @@
 import math
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from .base import StrategyBase
 from .config_parts.relative_config import RelativeConfig
@@ -81,7 +81,7 @@ class Strategy(StrategyBase):
         if self.is_custom_expiration:
             self.expiration = self.worker.get('expiration_time', self.expiration)
 
-        self.last_check = datetime.now()
+        self.last_check = self.clock.now()
         self.min_check_interval = 8
 
         self.buy_price = None
@@ -228,6 +228,7 @@ class Strategy(StrategyBase):
             expected_num_orders += 1
 
         self['order_ids'] = order_ids
+        self.own_orders_count = len(order_ids)
 
         self.log.info("Done placing orders")
 
@@ -332,7 +333,7 @@ class Strategy(StrategyBase):
     def check_orders(self, *args, **kwargs):
         """ Tests if the orders need updating
         """
-        delta = datetime.now() - self.last_check
+        delta = self.clock.now() - self.last_check
 
         # Store current available balance and balance in orders to the database for profit calculation purpose
         self.store_profit_estimation_data()
@@ -349,9 +350,12 @@ class Strategy(StrategyBase):
         if not orders:
             need_update = True
         else:
+            self.own_orders_count = 0
             # Loop trough the orders and look for changes
             for order_id, order in orders.items():
                 current_order = self.get_order(order_id)
+                if current_order:
+                    self.own_orders_count += 1
 
                 if not current_order:
                     need_update = True
@@ -406,4 +410,4 @@ class Strategy(StrategyBase):
             self.update_gui_slider()
             self.update_gui_profit()
 
-        self.last_check = datetime.now()
+        self.last_check = self.clock.now()
@@ -1,7 +1,6 @@
-import time
 import math
 import bitsharesapi.exceptions
-from datetime import datetime, timedelta
+from datetime import timedelta
 from functools import reduce
 from bitshares.dex import Dex
 from bitshares.amount import Amount
@@ -96,8 +95,8 @@ class Strategy(StrategyBase):
 
         # Order expiration time
         self.expiration = 60 * 60 * 24 * 365 * 5
-        self.start = datetime.now()
-        self.last_check = datetime.now()
+        self.start = self.clock.now()
+        self.last_check = self.clock.now()
 
         # We do not waiting for order ids to be able to bundle operations
         self.returnOrderId = None
@@ -120,7 +119,7 @@ class Strategy(StrategyBase):
             :param args:
             :param kwargs:
         """
-        self.start = datetime.now()
+        self.start = self.clock.now()
         delta = self.start - self.last_check
 
         # Only allow to maintain whether minimal time passed.
@@ -273,7 +272,7 @@ class Strategy(StrategyBase):
                 self.base_balance_history[0] != self.base_balance_history[2] or
                 self.quote_balance_history[0] != self.quote_balance_history[2] or
                 trx_executed):
-            self.last_check = datetime.now()
+            self.last_check = self.clock.now()
             self.log_maintenance_time()
             return
 
@@ -296,7 +295,7 @@ class Strategy(StrategyBase):
             self.actual_spread = (lowest_sell_price / highest_buy_price) - 1
             if self.actual_spread < self.target_spread + self.increment:
                 # Target spread is reached, no need to cancel anything
-                self.last_check = datetime.now()
+                self.last_check = self.clock.now()
                 self.log_maintenance_time()
                 return
             elif self.buy_orders:
@@ -305,7 +304,7 @@ class Strategy(StrategyBase):
                               'Cancelling lowest buy order as a fallback')
                 self.cancel_orders_wrapper(self.buy_orders[-1])
 
-        self.last_check = datetime.now()
+        self.last_check = self.clock.now()
         self.log_maintenance_time()
 
         # Update profit estimate
@@ -315,7 +314,7 @@ class Strategy(StrategyBase):
     def log_maintenance_time(self):
         """ Measure time from self.start and print a log message
         """
-        delta = datetime.now() - self.start
+        delta = self.clock.now() - self.start
         self.log.debug('Maintenance execution took: {:.2f} seconds'.format(delta.total_seconds()))
 
     def calculate_min_amounts(self):
@@ -381,7 +380,8 @@ class Strategy(StrategyBase):
         if use_cached_orders and self.cached_orders:
             orders = self.cached_orders
         else:
-            orders = self.get_own_orders
+            # Account was refreshed by count_asset() above
+            orders = self.get_own_market_orders(refresh=False)
         order_ids = [order['id'] for order in orders]
         orders_balance = self.get_allocated_assets(order_ids)
 
@@ -559,7 +559,7 @@ class Strategy(StrategyBase):
                 need_store = True
 
         if need_store and self.market_center_price:
-            timestamp = time.time()
+            timestamp = self.clock.time()
             self.log.debug('Storing balance data at center price {:.8f}'.format(self.market_center_price))
             self.store_balance_entry(account, self.worker_name, self.base_total_balance, self.base_asset,
                                      self.quote_total_balance, self.quote_asset, self.market_center_price, timestamp)
@@ -1839,6 +1839,15 @@ class Strategy(StrategyBase):
     def error(self, *args, **kwargs):
         self.disabled = True
 
+    def handle_aggregated_result(self, transaction, exception=None):
+        """ Override handle_aggregated_result()
+
+            Aggregated operations are broadcasted after maintenance pass, so the balances seen by the pass didn't
+            change yet. Return to the fast check interval to allocate the rest of the funds quickly.
+        """
+        super().handle_aggregated_result(transaction, exception)
+        self.current_check_interval = self.min_check_interval
+
     def pause(self):
         """ Override pause() """
         pass
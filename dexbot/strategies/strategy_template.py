@@ -20,24 +20,17 @@ class Strategy(StrategyBase):
         This is a template strategy which can be used to create custom strategies easier. The base for the strategy is
         ready. It is recommended comment the strategy and functions to help other developers to make changes.
 
-        Adding strategy to GUI
-        In dexbot.controller.worker_controller add new strategy inside strategies() as show below:
+        Adding strategy to GUI and CLI
+        In dexbot.strategy_registry add new strategy in to the BUILTIN_STRATEGIES as show below:
 
-            strategies['dexbot.strategies.strategy_template'] = {
-                'name': '<strategy_name>',
-                'form_module': ''
-            }
+            StrategyEntry('dexbot.strategies.strategy_template', '<strategy_name>', 'strategy_temp', ''),
 
-            key: Strategy location in the project
+            module: Strategy location in the project
             name: The name that is shown in the GUI for user
+            tag: Unique short name used by the CLI configurator
             form_module: If there is custom form module created with QTDesigner
 
-        Adding strategy to CLI
-        In dexbot.cli_conf add strategy in to the STRATEGIES list
-
-            {'tag': 'strategy_temp',
-             'class': 'dexbot.strategies.strategy_template',
-             'name': 'Template Strategy'},
+        Strategies of other packages are found through the "dexbot.strategy" entry point instead.
 
         NOTE: Change this comment section to describe the strategy.
     """
@@ -0,0 +1,216 @@
+import collections
+import importlib
+import json
+import logging
+import os
+import site
+import sys
+import threading
+
+from dexbot.helper import get_user_data_directory, mkdir
+
+log = logging.getLogger(__name__)
+
+# Version of the index file, files of other versions are ignored
+FORMAT_VERSION = 1
+
+# Name of the index file in the user data directory
+INDEX_FILE = 'strategy-index.json'
+
+# Entry point group of the third-party strategies
+ENTRY_POINT_GROUP = 'dexbot.strategy'
+
+# Entries of a directory packages are installed in
+PACKAGE_SUFFIXES = ('.dist-info', '.egg-info', '.egg-link', '.pth')
+
+# module: Strategy location, the module has a class called Strategy
+# name: The name shown to the user
+# tag: Unique short name used by the text-based configurator
+# form_module: Module with a QTDesigner form, the form is generated from the strategy config when empty
+StrategyEntry = collections.namedtuple('StrategyEntry', 'module name tag form_module')
+
+BUILTIN_STRATEGIES = (
+    StrategyEntry('dexbot.strategies.relative_orders', 'Relative Orders', 'relative',
+                  'dexbot.views.ui.forms.relative_orders_widget_ui'),
+    StrategyEntry('dexbot.strategies.staggered_orders', 'Staggered Orders', 'stagger', ''),
+)
+
+
+def is_site_directory(directory):
+    try:
+        return any(name.endswith(PACKAGE_SUFFIXES) for name in os.listdir(directory))
+    except OSError:
+        return False
+
+
+def site_directories():
+    """ Return the directories packages are installed in, their modification time changes when a package is
+        installed or removed. The current directory and the source directories of the import path are left out.
+
+        :return list: Directories
+    """
+    directories = list(getattr(site, 'getsitepackages', lambda: [])())
+    if site.ENABLE_USER_SITE:
+        directories.append(site.getusersitepackages())
+    # Other directories of the import path holding packages, e.g. installed with pip install --target
+    for directory in sys.path:
+        if directory and directory not in directories and is_site_directory(directory):
+            directories.append(directory)
+    return directories
+
+
+def scan_entry_points(group=ENTRY_POINT_GROUP):
+    """ Return the entry points of the group in the installed packages
+
+        :param str group: Entry point group
+        :return list: (name, module name) pairs
+    """
+    try:
+        from importlib import metadata
+    except ImportError:
+        metadata = None
+    if metadata is not None:
+        entry_points = metadata.entry_points()
+        if hasattr(entry_points, 'select'):
+            entry_points = entry_points.select(group=group)
+        else:
+            entry_points = entry_points.get(group, [])
+        return [(entry_point.name, entry_point.value.split(':')[0].strip()) for entry_point in entry_points]
+
+    try:
+        # Unfortunately setuptools is only "kinda-sorta" a standard module
+        # it's available on pretty much any modern Python system, but some embedded Pythons may not have it
+        # so we make it a soft-dependency
+        import pkg_resources
+    except ImportError:
+        # Our system doesn't have setuptools, so no way to find external strategies
+        return []
+    return [(entry_point.name, entry_point.module_name) for entry_point in pkg_resources.iter_entry_points(group)]
+
+
+class StrategyRegistry:
+    """ The strategies which can be configured, the built-in ones and the ones of the installed packages
+
+        The installed packages are scanned once per process. The result is kept in the index file and reused by the
+        next processes until a directory of the import path changes, e.g. when a package is installed or removed.
+        Nothing is imported until :meth:`load` is called for a strategy a worker uses.
+
+        :param str path: Index file, the packages are scanned in every process when None
+        :param list search_paths: Directories whose modification times invalidate the index, the site directories
+            by default, see :func:`site_directories`
+    """
+
+    def __init__(self, path=None, search_paths=None):
+        self.path = path
+        self.search_paths = search_paths
+        self.lock = threading.Lock()
+        self._strategies = None
+        # Module name => Strategy class
+        self.classes = {}
+
+    def signature(self):
+        """ Modification times of the directories the packages are installed in
+        """
+        signature = {}
+        for directory in (site_directories() if self.search_paths is None else self.search_paths):
+            try:
+                signature[os.path.abspath(directory)] = os.stat(directory).st_mtime
+            except OSError:
+                continue
+        return signature
+
+    def read_index(self, signature):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path) as file:
+                document = json.load(file)
+        except (IOError, ValueError) as exception:
+            log.warning('Ignoring the strategy index {}: {}'.format(self.path, exception))
+            return None
+        if document.get('version') != FORMAT_VERSION or document.get('signature') != signature:
+            return None
+        return [tuple(pair) for pair in document['strategies']]
+
+    def write_index(self, signature, external):
+        if not self.path:
+            return
+        temporary_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            mkdir(os.path.dirname(self.path))
+            with open(temporary_path, 'w') as file:
+                json.dump({'version': FORMAT_VERSION, 'signature': signature, 'strategies': external}, file)
+            os.replace(temporary_path, self.path)
+        except IOError as exception:
+            log.warning('Unable to save the strategy index {}: {}'.format(self.path, exception))
+
+    def external_strategies(self):
+        """ Return the third-party strategies from the index file, the installed packages are only scanned when it
+            is out of date
+
+            :return list: (description, module name) pairs
+        """
+        signature = self.signature()
+        external = self.read_index(signature)
+        if external is None:
+            external = scan_entry_points()
+            self.write_index(signature, external)
+        return external
+
+    def strategies(self):
+        """ Return the strategies, the built-in ones first
+
+            :return collections.OrderedDict: StrategyEntry by module name
+        """
+        with self.lock:
+            if self._strategies is None:
+                strategies = collections.OrderedDict((entry.module, entry) for entry in BUILTIN_STRATEGIES)
+                tags_so_far = {entry.tag for entry in BUILTIN_STRATEGIES}
+                for desc, module in self.external_strategies():
+                    tag = desc.split()[0].lower()
+                    # make sure tag is unique
+                    i = 1
+                    while tag in tags_so_far:
+                        tag = tag + str(i)
+                        i += 1
+                    tags_so_far.add(tag)
+                    # if there is no UI form in the module then GUI will gracefully revert to auto-ui
+                    strategies[module] = StrategyEntry(module, desc, tag, module)
+                self._strategies = strategies
+            return self._strategies
+
+    def get(self, module):
+        """ Return the StrategyEntry of the module, None when it is not a known strategy
+        """
+        return self.strategies().get(module)
+
+    def find_by_tag(self, tag):
+        for entry in self.strategies().values():
+            if entry.tag == tag:
+                return entry
+        return None
+
+    def load(self, module):
+        """ Import the strategy module, once per process
+
+            :param str module: Module name of the strategy, it doesn't need to be registered
+            :return: Strategy class of the module
+        """
+        strategy_class = self.classes.get(module)
+        if strategy_class is None:
+            strategy_class = self.classes[module] = getattr(importlib.import_module(module), 'Strategy')
+        return strategy_class
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_strategy_registry():
+    """ Return the registry of the process, on the index file of the user data directory
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = StrategyRegistry(os.path.join(get_user_data_directory(), INDEX_FILE))
+        return _registry
@@ -0,0 +1,199 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+import bitsharesapi.exceptions
+from bitshares.transactionbuilder import TransactionBuilder
+from grapheneapi.exceptions import RPCError
+
+from dexbot.signing_service import PooledTransactionBuilder
+
+log = logging.getLogger(__name__)
+
+# Errors of a transaction which the node rejected, it is in no block so its operations can be sent again
+REJECTED_ERRORS = (RPCError, bitsharesapi.exceptions.RPCError)
+
+# Limits of a single aggregated transaction. Node's maximum_transaction_size is bigger, but smaller transactions
+# reduce the amount of operations which get rejected together when one of them fails
+MAX_OPERATIONS = 100
+MAX_SIZE = 32 * 1024
+
+
+class TransactionAggregator:
+    """ Collects operations of the workers during one dispatch cycle and broadcasts them as one transaction
+        per account
+
+        Workers sharing an account would otherwise broadcast separate transactions in the same block, each one
+        paying for signing and a network round trip.
+
+        :param bitshares.BitShares bitshares_instance: BitShares instance
+        :param int max_operations: Maximum number of operations in one transaction
+        :param int max_size: Maximum estimated size of one transaction in bytes
+        :param SigningService signing_service: Optional service to sign the transactions in parallel
+    """
+
+    def __init__(self, bitshares_instance, max_operations=MAX_OPERATIONS, max_size=MAX_SIZE, signing_service=None):
+        self.bitshares = bitshares_instance
+        self.signing_service = signing_service
+        self.max_operations = max_operations
+        self.max_size = max_size
+        self.collecting = False
+        self.lock = threading.RLock()
+
+        # (account, fee_asset_id) => list of (worker, operations)
+        self.pending = OrderedDict()
+
+    def start(self):
+        """ Start collecting operations
+        """
+        with self.lock:
+            self.collecting = True
+
+    def add(self, worker, account, fee_asset_id, operations):
+        """ Queue operations of a worker to be broadcasted on the next flush
+
+            Operations of one call are never split into separate transactions.
+
+            :param StrategyBase worker: Worker which created the operations, receives the result
+            :param str account: Name of the account which signs the operations
+            :param str fee_asset_id: Id of the asset used to pay the fees
+            :param list operations: Operations to be broadcasted
+            :return bool: False when the aggregator is not collecting and the caller must broadcast by itself
+        """
+        if not operations:
+            return True
+
+        with self.lock:
+            if not self.collecting:
+                return False
+            self.pending.setdefault((account, fee_asset_id), []).append((worker, list(operations)))
+        return True
+
+    def flush(self):
+        """ Stop collecting, sign and broadcast all collected operations
+        """
+        with self.lock:
+            self.collecting = False
+            pending, self.pending = self.pending, OrderedDict()
+
+        chunks = [(account, fee_asset_id, chunk)
+                  for (account, fee_asset_id), batches in pending.items()
+                  for chunk in self.split_batches(batches)]
+        transactions = [None] * len(chunks)
+
+        if self.signing_service:
+            # Start signing all transactions of the cycle in parallel, failures are reported on broadcast
+            for index, (account, fee_asset_id, chunk) in enumerate(chunks):
+                try:
+                    transactions[index] = self.build_transaction(account, fee_asset_id, self.chunk_operations(chunk))
+                except Exception:
+                    log.debug('Unable to prepare aggregated transaction of {}'.format(account))
+
+        for (account, fee_asset_id, chunk), transaction in zip(chunks, transactions):
+            self._broadcast_chunk(account, fee_asset_id, chunk, transaction)
+
+    def split_batches(self, batches):
+        """ Split workers' batches into chunks fitting into a single transaction
+
+            :param list batches: list of (worker, operations)
+            :return list: list of chunks, each chunk is a list of (worker, operations)
+        """
+        chunks = []
+        chunk = []
+        chunk_operations = 0
+        chunk_size = 0
+
+        for worker, operations in batches:
+            size = self.estimate_size(operations)
+            if chunk and (chunk_operations + len(operations) > self.max_operations or
+                          chunk_size + size > self.max_size):
+                chunks.append(chunk)
+                chunk = []
+                chunk_operations = 0
+                chunk_size = 0
+            chunk.append((worker, operations))
+            chunk_operations += len(operations)
+            chunk_size += size
+
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    @staticmethod
+    def estimate_size(operations):
+        """ Rough size of the operations in bytes, the serialized size is smaller than json
+        """
+        return sum(len(json.dumps(op.json() if hasattr(op, 'json') else op, default=str)) for op in operations)
+
+    @staticmethod
+    def chunk_operations(chunk):
+        return [op for _, operations in chunk for op in operations]
+
+    def build_transaction(self, account, fee_asset_id, operations):
+        """ Create a separate transaction for the operations, the shared txbuffer is not touched
+
+            :return: TransactionBuilder
+        """
+        if self.signing_service:
+            transaction = PooledTransactionBuilder(
+                self.signing_service, bitshares_instance=self.bitshares, fee_asset=fee_asset_id)
+        else:
+            transaction = TransactionBuilder(bitshares_instance=self.bitshares, fee_asset=fee_asset_id)
+        transaction.appendOps(operations)
+        transaction.appendSigner(account, 'active')
+
+        if self.signing_service:
+            transaction.sign_async()
+        return transaction
+
+    def broadcast(self, transaction):
+        """ Sign and broadcast the transaction and wait until it is included in a block
+
+            :return dict: transaction
+        """
+        previous_blocking = self.bitshares.blocking
+        self.bitshares.blocking = 'head'
+        try:
+            return transaction.broadcast()
+        finally:
+            self.bitshares.blocking = previous_blocking
+
+    def _broadcast_chunk(self, account, fee_asset_id, chunk, transaction=None):
+        operations = self.chunk_operations(chunk)
+        try:
+            if transaction is None:
+                transaction = self.build_transaction(account, fee_asset_id, operations)
+        except Exception as exception:
+            # Nothing was sent, the batches can be tried one by one
+            self._report_failure(account, fee_asset_id, chunk, exception, split=True)
+            return
+        try:
+            result = self.broadcast(transaction)
+        except Exception as exception:
+            # A timeout or a dropped connection doesn't tell whether the transaction made it into a block, sending
+            # the operations again could place or cancel the orders twice
+            self._report_failure(account, fee_asset_id, chunk, exception,
+                                 split=isinstance(exception, REJECTED_ERRORS))
+            return
+
+        log.debug('Broadcasted {} operations of {} workers for {}'.format(len(operations), len(chunk), account))
+        for worker, _ in chunk:
+            worker.handle_aggregated_result(result)
+
+    def _report_failure(self, account, fee_asset_id, chunk, exception, split):
+        """ Report a failed transaction to its workers, the workers refresh their orders on their next run
+
+            :param bool split: Broadcast the batches one by one so the failure is reported only to the worker which
+                caused it, only when the transaction surely wasn't included in a block
+        """
+        if len(chunk) == 1 or not split:
+            if len(chunk) > 1:
+                log.warning('Aggregated transaction of {} failed, not sent again: {}'.format(account, exception))
+            for worker, _ in chunk:
+                worker.handle_aggregated_result(None, exception)
+            return
+
+        log.warning('Aggregated transaction of {} failed, broadcasting operations separately'.format(account))
+        for batch in chunk:
+            self._broadcast_chunk(account, fee_asset_id, [batch])
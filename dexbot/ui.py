@@ -6,7 +6,6 @@ import logging.config
 from functools import update_wrapper
 
 import click
-from ruamel import yaml
 from bitshares import BitShares
 from bitshares.instance import set_shared_bitshares_instance
 from bitshares.exceptions import WrongMasterPasswordException
@@ -136,7 +135,7 @@ def configfile(f):
     def new_func(ctx, *args, **kwargs):
         if not os.path.isfile(ctx.obj["configfile"]):
             Config(path=ctx.obj['configfile'])
-        ctx.config = yaml.safe_load(open(ctx.obj["configfile"]))
+        ctx.config = Config.load_config(ctx.obj["configfile"])
         return ctx.invoke(f, *args, **kwargs)
     return update_wrapper(new_func, f)
 
@@ -1,6 +1,7 @@
 import importlib
 
 import dexbot.controllers.strategy_controller
+from dexbot.strategy_registry import get_strategy_registry
 
 from PyQt5 import QtWidgets, QtCore, QtGui
 
@@ -12,10 +13,7 @@ class StrategyFormWidget(QtWidgets.QWidget):
         self.controller = controller
         self.module_name = strategy_module.split('.')[-1]
 
-        strategy_class = getattr(
-            importlib.import_module(strategy_module),
-            'Strategy'
-        )
+        strategy_class = get_strategy_registry().load(strategy_module)
         # For strategies uses autogeneration, we need the strategy configs without the defaults
         configure = strategy_class.configure(return_base_config=False)
         form_module = controller.strategies[strategy_module].get('form_module')
@@ -1,5 +1,6 @@
 from dexbot.controllers.worker_details_controller import WorkerDetailsController
 from dexbot.helper import *
+from dexbot.strategy_registry import get_strategy_registry
 from dexbot.views.ui.worker_details_window_ui import Ui_details_dialog
 from dexbot.views.ui.tabs.graph_tab_ui import Ui_Graph_Tab
 from dexbot.views.ui.tabs.table_tab_ui import Ui_Table_Tab
@@ -8,8 +9,6 @@ from dexbot.views.ui.tabs.text_tab_ui import Ui_Text_Tab
 from PyQt5 import QtCore, QtGui, QtWidgets
 from PyQt5.QtWidgets import QWidget
 
-import importlib
-
 
 class WorkerDetailsView(QtWidgets.QDialog, Ui_details_dialog, Ui_Graph_Tab, Ui_Table_Tab, Ui_Text_Tab):
 
@@ -27,7 +26,7 @@ class WorkerDetailsView(QtWidgets.QDialog, Ui_details_dialog, Ui_Graph_Tab, Ui_T
         self.setWindowTitle("DEXBot - {} details".format(worker_name))
 
         # Get strategy class from the config
-        strategy_class = getattr(importlib.import_module(self.config.get('module')), 'Strategy')
+        strategy_class = get_strategy_registry().load(self.config.get('module'))
 
         # DetailElements that are used to configure worker's detail view
         details = strategy_class.configure_details()
@@ -36,6 +36,7 @@ class MainView(QtWidgets.QMainWindow, Ui_MainWindow):
         self.add_worker_button.clicked.connect(lambda: self.handle_add_worker())
         self.settings_button.clicked.connect(lambda: self.handle_open_settings())
         self.help_button.clicked.connect(lambda: self.handle_open_documentation())
+        QtWidgets.QShortcut(QtGui.QKeySequence('F5'), self, self.handle_reload_config)
 
         # Load worker widgets from config file
         workers = self.config.workers_data
@@ -95,6 +96,24 @@ class MainView(QtWidgets.QMainWindow, Ui_MainWindow):
             self.config.add_worker_config(worker_name, create_worker_dialog.worker_data)
             self.add_worker_widget(worker_name)
 
+    @gui_error
+    def handle_reload_config(self):
+        """ Read the config file again, the running workers which were changed or removed in it are restarted or
+            stopped
+        """
+        self.main_ctrl.reload_config()
+        workers = self.config.workers_data
+        for worker_name, widget in list(self.worker_widgets.items()):
+            if worker_name in workers:
+                widget.worker_config = self.config.get_worker_config(worker_name)
+                widget.setup_ui_data(widget.worker_config)
+            else:
+                self.remove_worker_widget(worker_name)
+                widget.deleteLater()
+        for worker_name in workers:
+            if worker_name not in self.worker_widgets and self.num_of_workers < self.max_workers:
+                self.add_worker_widget(worker_name)
+
     @gui_error
     def handle_open_settings(self):
         settings_dialog = SettingsView()
@@ -0,0 +1,134 @@
+import contextlib
+import threading
+import time
+
+# Strikes after which a worker is degraded, a callback over the budget adds one and one within it takes one away
+STRIKES = 3
+
+# Blocks between the runs of a degraded worker
+DEGRADED_INTERVAL = 10
+
+# Runs within the budget after which a degraded worker is back on the normal schedule
+RECOVERY_RUNS = 3
+
+
+class Watchdog:
+    """ Measures the callbacks of the workers against a time budget and isolates the slow ones
+
+        A callback over the budget adds a strike to its worker, one within the budget takes one away. A worker
+        reaching ``strikes`` is degraded: it only ticks every ``interval`` blocks and its market and account
+        events wait for that tick, only the latest event of each kind is delivered. After ``recovery_runs``
+        runs within the budget it is back on the normal schedule. This keeps one slow worker from delaying the
+        events of all the others, as they are dispatched one after another under the config lock.
+
+        :param float budget: Seconds a callback may take, 0 disables the watchdog
+        :param int strikes: Strikes after which a worker is degraded
+        :param int interval: Blocks between the runs of a degraded worker
+        :param int recovery_runs: Runs within the budget after which a worker recovers
+    """
+
+    def __init__(self, budget=0, strikes=STRIKES, interval=DEGRADED_INTERVAL, recovery_runs=RECOVERY_RUNS):
+        self.budget = budget
+        self.strikes = strikes
+        self.interval = interval
+        self.recovery_runs = recovery_runs
+        self.lock = threading.Lock()
+        self.block_number = 0
+        # Worker name => strikes of a healthy worker
+        self.worker_strikes = {}
+        # Worker name => {'last_run': block number, 'good_runs': int, 'pending': {callback name: data}}
+        self.degraded = {}
+
+    @property
+    def enabled(self):
+        return self.budget > 0
+
+    def is_degraded(self, worker_name):
+        return worker_name in self.degraded
+
+    def block(self):
+        """ Count a block, called before the block is dispatched
+        """
+        self.block_number += 1
+
+    def allow(self, worker_name, callback_name, data):
+        """ Whether a callback of the worker should run now, the events of degraded workers are kept for later
+
+            :param str worker_name: Name of the worker
+            :param str callback_name: ontick, onMarketUpdate or onAccount
+            :param data: Argument of the callback
+            :return bool: True to run the callback
+        """
+        with self.lock:
+            state = self.degraded.get(worker_name)
+            if state is None:
+                return True
+            if callback_name == 'ontick' and self.block_number - state['last_run'] >= self.interval:
+                state['last_run'] = self.block_number
+                return True
+            if callback_name != 'ontick':
+                state['pending'][callback_name] = data
+            return False
+
+    def take_pending(self, worker_name):
+        """ Return the events the worker missed while waiting for its tick
+
+            :return list: (callback name, data) tuples
+        """
+        with self.lock:
+            state = self.degraded.get(worker_name)
+            if state is None or not state['pending']:
+                return []
+            pending, state['pending'] = state['pending'], {}
+        return list(pending.items())
+
+    @contextlib.contextmanager
+    def watch(self, worker_name, log):
+        """ Time a callback of the worker and move the worker between the schedules
+
+            :param str worker_name: Name of the worker
+            :param logging.LoggerAdapter log: Logger of the worker, the messages also reach the GUI
+        """
+        if not self.enabled:
+            yield
+            return
+
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(worker_name, time.perf_counter() - started, log)
+
+    def observe(self, worker_name, seconds, log):
+        over_budget = seconds > self.budget
+        with self.lock:
+            state = self.degraded.get(worker_name)
+            if state is None:
+                strikes = self.worker_strikes.get(worker_name, 0)
+                strikes = strikes + 1 if over_budget else max(strikes - 1, 0)
+                self.worker_strikes[worker_name] = strikes
+                if strikes < self.strikes:
+                    return
+                self.worker_strikes.pop(worker_name)
+                self.degraded[worker_name] = {'last_run': self.block_number, 'good_runs': 0, 'pending': {}}
+                degraded = True
+            else:
+                state['good_runs'] = 0 if over_budget else state['good_runs'] + 1
+                if state['good_runs'] < self.recovery_runs:
+                    return
+                del self.degraded[worker_name]
+                degraded = False
+
+        if degraded:
+            log.warning('Worker took {:.2f}s, over the budget of {:.2f}s for {} times, running it every {} blocks so '
+                        'the other workers are not delayed'.format(seconds, self.budget, self.strikes, self.interval))
+        else:
+            log.info('Worker is within the budget of {:.2f}s again, back to running on every event'.format(
+                self.budget))
+
+    def forget(self, worker_name):
+        """ Drop the state of a removed worker
+        """
+        with self.lock:
+            self.worker_strikes.pop(worker_name, None)
+            self.degraded.pop(worker_name, None)
@@ -1,12 +1,23 @@
-import importlib
 import sys
 import logging
 import os.path
 import threading
+import time
 import copy
 
 import dexbot.errors as errors
+from dexbot.config import Config
+from dexbot.instrumentation import get_instrumentation, instrument_rpc
+from dexbot.lean_account import find_lean_account
+from dexbot.metrics import DEFAULT_HOST, MetricsServer
+from dexbot.node_manager import NodePool
+from dexbot.prefetch import format_startup_report, prefetch
 from dexbot.strategies.base import StrategyBase
+from dexbot.strategies.external_feeds.price_feed_service import get_price_feed_service
+from dexbot.signing_service import SigningService
+from dexbot.strategy_registry import get_strategy_registry
+from dexbot.transaction_aggregator import TransactionAggregator
+from dexbot.watchdog import DEGRADED_INTERVAL, STRIKES, Watchdog
 
 from bitshares import BitShares
 from bitshares.notify import Notify
@@ -20,6 +31,13 @@ log_workers = logging.getLogger('dexbot.per_worker')
 # GUIs can add a handler to this logger to get a stream of events of the running workers.
 
 
+def _settings(config):
+    """ Return a copy of the settings of the infrastructure in the config, everything but the workers
+    """
+    config = config.dict() if isinstance(config, Config) else config
+    return copy.deepcopy({key: value for key, value in config.items() if key != 'workers'})
+
+
 class WorkerInfrastructure(threading.Thread):
 
     def __init__(
@@ -33,6 +51,8 @@ class WorkerInfrastructure(threading.Thread):
         # BitShares instance
         self.bitshares = bitshares_instance or shared_bitshares_instance()
         self.config = copy.deepcopy(config)
+        # Settings as loaded, the services change some of them in self.config, e.g. rpc_pipelining when recording
+        self.loaded_settings = _settings(self.config)
         self.view = view
         self.jobs = set()
         self.notify = None
@@ -42,16 +62,105 @@ class WorkerInfrastructure(threading.Thread):
         self.accounts = set()
         self.markets = set()
 
+        self.signing_service = None
+        self.aggregator = None
+        self.node_pool = None
+        self.metrics_server = None
+        # Optional Recorder of the notifications and RPC responses
+        self.recorder = None
+        self.instrumentation = get_instrumentation()
+        self.watchdog = Watchdog()
+
         # Set the module search path
         user_worker_path = os.path.expanduser("~/bots")
         if os.path.exists(user_worker_path):
             sys.path.append(user_worker_path)
 
-    def init_workers(self, config):
+    def init_services(self):
+        """ Start the optional services shared by the workers
+        """
+        # Time the callbacks of the workers and the RPC calls
+        self.instrumentation.enabled = self.config.get('instrumentation', True)
+        if self.instrumentation.enabled:
+            instrument_rpc(self.bitshares)
+
+        # Move the workers with callbacks over the budget to a slower schedule
+        self.watchdog.budget = self.config.get('watchdog_budget', 0)
+        self.watchdog.strikes = self.config.get('watchdog_strikes', STRIKES)
+        self.watchdog.interval = self.config.get('watchdog_interval', DEGRADED_INTERVAL)
+
+        # Expose the timings and the state of the workers to a local scraper
+        metrics_port = self.config.get('metrics_port')
+        if metrics_port and not self.metrics_server:
+            self.metrics_server = MetricsServer(self, metrics_port, host=self.config.get('metrics_host', DEFAULT_HOST))
+            self.metrics_server.start()
+
+        # Record the traffic from the start, the workers read their state and the markets when initialized
+        if self.recorder and not self.recorder.records:
+            # Pipelined calls don't go through the recorded connection
+            self.config['rpc_pipelining'] = False
+            self.recorder.write_header(self.config)
+            self.recorder.attach_rpc(self.bitshares)
+
+        # Sign transactions in separate processes, the wallet must be unlocked at this point
+        signing_processes = self.config.get('signing_processes', 0)
+        if signing_processes and not self.signing_service:
+            self.signing_service = SigningService(self.bitshares, signing_processes)
+            self.signing_service.attach()
+
+        # Bundled operations of the workers sharing an account are broadcasted in one transaction per cycle
+        if self.config.get('aggregate_transactions', False) and not self.aggregator:
+            self.aggregator = TransactionAggregator(self.bitshares, signing_service=self.signing_service)
+
+        # Measure the configured nodes in the background and move to the fastest synced one
+        node_check_interval = self.config.get('node_check_interval', 0)
+        nodes = self.config.get('node')
+        if node_check_interval and isinstance(nodes, list) and len(nodes) > 1 and not self.node_pool:
+            self.node_pool = NodePool(nodes, interval=node_check_interval, on_change=self.on_node_check)
+            self.node_pool.start()
+
+        # External prices are refreshed in the background, shared by all the workers
+        price_feed_service = get_price_feed_service()
+        price_feed_service.interval = self.config.get('external_price_interval', price_feed_service.interval)
+        price_feed_service.streaming = self.config.get('external_price_streaming', price_feed_service.streaming)
+
+    def on_node_check(self):
+        """ Called from the node pool thread after the nodes were measured
+        """
+        if self.notify:
+            # A stalled notification node doesn't deliver blocks, so it can't wait for the next tick
+            self.node_pool.switch_notify(self.notify)
+        self.do_next_tick(self.switch_node)
+
+    def switch_node(self):
+        self.node_pool.switch_rpc(self.bitshares.rpc)
+
+    def init_workers(self, config, worker_names=None):
         """ Initialize the workers
+
+            The accounts and assets of all the workers are prefetched in batched calls first. The workers don't
+            fetch the prefetched accounts again during the startup unless they broadcast.
+
+            :param dict config: Config of the workers
+            :param list worker_names: Workers to initialize, all the workers of the config by default
         """
+        workers = {worker_name: worker for worker_name, worker in config["workers"].items()
+                   if worker_names is None or worker_name in worker_names}
         self.config_lock.acquire()
-        for worker_name, worker in config["workers"].items():
+        started = time.perf_counter()
+        accounts = []
+        try:
+            accounts = prefetch(self.bitshares, workers, bool(config.get('rpc_pipelining', False)))
+        except Exception:
+            log.exception('Prefetching the workers failed, they fetch their data themselves')
+        prefetch_seconds = time.perf_counter() - started
+        # Hold the prefetched accounts like notified ones during the startup, back to their state afterwards
+        untracked = [account for account in accounts if not account.tracked]
+        for account in untracked:
+            account.tracked = True
+
+        timings = {}
+        for worker_name, worker in workers.items():
             if "account" not in worker:
                 log_workers.critical("Worker has no account", extra={
                     'worker_name': worker_name, 'account': 'unknown',
@@ -64,16 +173,15 @@ class WorkerInfrastructure(threading.Thread):
                     'market': 'unknown', 'is_disabled': (lambda: True)
                 })
                 continue
+            worker_started = time.perf_counter()
             try:
-                strategy_class = getattr(
-                    importlib.import_module(worker["module"]),
-                    'Strategy'
-                )
+                strategy_class = get_strategy_registry().load(worker['module'])
                 self.workers[worker_name] = strategy_class(
                     config=config,
                     name=worker_name,
                     bitshares_instance=self.bitshares,
-                    view=self.view
+                    view=self.view,
+                    aggregator=self.aggregator
                 )
                 self.markets.add(worker['market'])
                 self.accounts.add(worker['account'])
@@ -82,6 +190,12 @@ class WorkerInfrastructure(threading.Thread):
                     'worker_name': worker_name, 'account': worker['account'],
                     'market': 'unknown', 'is_disabled': (lambda: True)
                 })
+            timings[worker_name] = time.perf_counter() - worker_started
+
+        for account in untracked:
+            account.tracked = False
+            account.invalidate()
+        log.info(format_startup_report(timings, prefetch_seconds, time.perf_counter() - started))
         self.config_lock.release()
 
     def update_notify(self):
@@ -104,75 +218,176 @@ class WorkerInfrastructure(threading.Thread):
                 on_block=self.on_block,
                 bitshares_instance=self.bitshares
             )
+            if self.recorder:
+                self.recorder.attach_notify(self.notify)
+
+        # Changes of the accounts are notified from now on, the workers don't need to fetch them every time
+        for worker in self.workers.values():
+            worker.account.tracked = True
 
     # Events
-    def on_block(self, data):
-        if self.jobs:
-            try:
-                for job in self.jobs:
-                    job()
-            finally:
-                self.jobs = set()
+    def call_worker(self, worker_name, callback_name, data):
+        """ Run a callback of a worker, reporting its errors to the worker
 
-        self.config_lock.acquire()
-        for worker_name, worker in self.config["workers"].items():
-            if worker_name not in self.workers or self.workers[worker_name].disabled:
-                continue
+            :param str worker_name: Name of the worker
+            :param str callback_name: ontick, onMarketUpdate or onAccount
+            :param data: Argument of the callback
+        """
+        worker = self.workers[worker_name]
+        try:
+            with self.watchdog.watch(worker_name, worker.log), \
+                    self.instrumentation.callback(worker_name, callback_name):
+                getattr(worker, callback_name)(data)
+        except Exception as e:
+            worker.log.exception("in {}()".format(callback_name))
             try:
-                self.workers[worker_name].ontick(data)
-            except Exception as e:
-                self.workers[worker_name].log.exception("in ontick()")
+                getattr(worker, 'error_' + callback_name)(e)
+            except Exception:
+                worker.log.exception("in error_{}()".format(callback_name))
+
+    def on_block(self, data):
+        # Blocks dispatched late mean the workers need more than the block interval
+        with self.instrumentation.block():
+            if self.jobs:
                 try:
-                    self.workers[worker_name].error_ontick(e)
-                except Exception:
-                    self.workers[worker_name].log.exception("in error_ontick()")
-        self.config_lock.release()
+                    for job in self.jobs:
+                        job()
+                finally:
+                    self.jobs = set()
+
+            self.watchdog.block()
+            self.config_lock.acquire()
+            self.start_aggregation()
+            for worker_name, worker in self.config["workers"].items():
+                if worker_name not in self.workers or self.workers[worker_name].disabled:
+                    continue
+                if not self.watchdog.allow(worker_name, 'ontick', data):
+                    continue
+                # A degraded worker gets the latest of the events it missed before its tick
+                for callback_name, pending_data in self.watchdog.take_pending(worker_name):
+                    self.call_worker(worker_name, callback_name, pending_data)
+                self.call_worker(worker_name, 'ontick', data)
+            self.flush_aggregation()
+            self.config_lock.release()
 
     def on_market(self, data):
         if data.get("deleted", False):  # No info available on deleted orders
             return
 
+        # Fills and updates of own orders change the account, its notification may come later
+        account = find_lean_account(data.get('account_id') or data.get('seller'), self.bitshares)
+        if account:
+            account.invalidate()
+
         self.config_lock.acquire()
+        self.start_aggregation()
         for worker_name, worker in self.config["workers"].items():
+            if worker_name not in self.workers:
+                continue
             if self.workers[worker_name].disabled:
                 self.workers[worker_name].log.debug('Worker "{}" is disabled'.format(worker_name))
                 continue
-            if worker["market"] == data.market:
-                try:
-                    self.workers[worker_name].onMarketUpdate(data)
-                except Exception as e:
-                    self.workers[worker_name].log.exception("in onMarketUpdate()")
-                    try:
-                        self.workers[worker_name].error_onMarketUpdate(e)
-                    except Exception:
-                        self.workers[worker_name].log.exception("in error_onMarketUpdate()")
+            if worker["market"] == data.market and self.watchdog.allow(worker_name, 'onMarketUpdate', data):
+                self.call_worker(worker_name, 'onMarketUpdate', data)
+        self.flush_aggregation()
         self.config_lock.release()
 
     def on_account(self, account_update):
+        # The shared account of the workers knows its name, AccountUpdate.account would fetch it twice
+        account = find_lean_account(account_update['owner'], self.bitshares)
+        if account:
+            account.invalidate()
+        else:
+            account = account_update.account
+
         self.config_lock.acquire()
-        account = account_update.account
+        self.start_aggregation()
         for worker_name, worker in self.config["workers"].items():
+            if worker_name not in self.workers:
+                continue
             if self.workers[worker_name].disabled:
                 self.workers[worker_name].log.info('Worker "{}" is disabled'.format(worker_name))
                 continue
-            if worker["account"] == account["name"]:
-                try:
-                    self.workers[worker_name].onAccount(account_update)
-                except Exception as e:
-                    self.workers[worker_name].log.exception("in onAccountUpdate()")
-                    try:
-                        self.workers[worker_name].error_onAccount(e)
-                    except Exception:
-                        self.workers[worker_name].log.exception("in error_onAccountUpdate()")
+            if worker["account"] == account["name"] and self.watchdog.allow(worker_name, 'onAccount', account_update):
+                self.call_worker(worker_name, 'onAccount', account_update)
+        self.flush_aggregation()
         self.config_lock.release()
 
+    def start_aggregation(self):
+        """ Start collecting the bundled operations of the workers if aggregation is enabled
+        """
+        if self.aggregator:
+            self.aggregator.start()
+
+    def flush_aggregation(self):
+        """ Broadcast operations collected during the dispatch cycle
+        """
+        if not self.aggregator:
+            return
+        try:
+            self.aggregator.flush()
+        except Exception:
+            log.exception("Unable to broadcast aggregated transactions")
+
     def add_worker(self, worker_name, config):
         with self.config_lock:
             self.config['workers'][worker_name] = config['workers'][worker_name]
             self.init_workers(config)
         self.update_notify()
 
+    def reload_config(self, config):
+        """ Apply a changed config to the running workers, e.g. the config file read again on SIGUSR1
+
+            Only the workers which were added, removed or changed are started, stopped or initialized again, the
+            subscriptions are reset once for all of them. The other workers keep running with their state and
+            caches. Run it between the events, see :meth:`do_next_tick`.
+
+            :param dict config: New config
+            :return tuple: Names of the added, removed and changed workers
+        """
+        config = copy.deepcopy(config.dict() if isinstance(config, Config) else config)
+        with self.config_lock:
+            current = self.config.dict() if isinstance(self.config, Config) else self.config
+            old_workers = current['workers']
+            new_workers = config['workers']
+            added = sorted(set(new_workers) - set(old_workers))
+            removed = sorted(set(old_workers) - set(new_workers))
+            changed = sorted(worker_name for worker_name in set(old_workers) & set(new_workers)
+                             if old_workers[worker_name] != new_workers[worker_name])
+            settings = _settings(config)
+            ignored = sorted(key for key in set(self.loaded_settings) | set(settings)
+                             if self.loaded_settings.get(key) != settings.get(key))
+            if ignored:
+                log.warning('Changes of {} take effect after a restart'.format(', '.join(ignored)))
+
+            for worker_name in removed + changed:
+                self.watchdog.forget(worker_name)
+                worker = self.workers.pop(worker_name, None)
+                if worker is None:
+                    continue
+                try:
+                    worker.pause()
+                except Exception:
+                    worker.log.exception('Unable to stop the worker')
+
+            # Settings of the infrastructure itself stay as they were started
+            config = dict(current, workers=config['workers'])
+            self.config = config
+            if added or changed:
+                self.init_workers(config, added + changed)
+            self.accounts = {config['workers'][worker_name]['account'] for worker_name in self.workers}
+            self.markets = {config['workers'][worker_name]['market'] for worker_name in self.workers}
+
+        log.info('Reloaded the config, added: {}, removed: {}, changed: {}'.format(
+            ', '.join(added) or 'none', ', '.join(removed) or 'none', ', '.join(changed) or 'none'))
+        if not self.workers:
+            log.critical('No workers running after reloading the config')
+        elif added or removed or changed:
+            self.update_notify()
+        return added, removed, changed
+
     def run(self):
+        self.init_services()
         self.init_workers(self.config)
         self.update_notify()
         self.notify.listen()
@@ -196,6 +411,7 @@ class WorkerInfrastructure(threading.Thread):
                 self.config['workers'].pop(worker_name)
 
             self.accounts.remove(account)
+            self.watchdog.forget(worker_name)
             if pause:
                 self.workers[worker_name].pause()
             self.workers.pop(worker_name, None)
@@ -212,6 +428,20 @@ class WorkerInfrastructure(threading.Thread):
         else:
             # No workers left, close websocket
             self.notify.websocket.close()
+            self.stop_services()
+
+    def stop_services(self):
+        """ Stop the services started by :meth:`init_services`
+        """
+        if self.node_pool:
+            self.node_pool.stop()
+            self.node_pool = None
+        if self.metrics_server:
+            self.metrics_server.stop()
+            self.metrics_server = None
+        if self.signing_service:
+            self.signing_service.close()
+            self.signing_service = None
 
     def remove_worker(self, worker_name=None):
         if worker_name:
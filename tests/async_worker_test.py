@@ -0,0 +1,88 @@
+import asyncio
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+from aiohttp import web
+from bitsharesapi.websocket import BitSharesWebsocket
+
+from dexbot.async_runtime import run_coroutine
+from dexbot.async_worker import AsyncWorkerInfrastructure, BLOCK_NOTICE
+
+""" This is the unit test for the asyncio runtime. The stub node sends a burst of block notices when
+    the block callback is subscribed, blocks arriving while a slow worker is busy must be coalesced.
+"""
+
+BLOCKS = 10
+
+
+class StubNode:
+
+    def __init__(self):
+        self.port = None
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        threading.Thread(target=self._run, args=(started,), daemon=True).start()
+        started.wait(5)
+
+    @property
+    def url(self):
+        return 'ws://127.0.0.1:{}'.format(self.port)
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            payload = json.loads(message.data)
+            await ws.send_str(json.dumps({'id': payload['id'], 'jsonrpc': '2.0', 'result': None}))
+            if payload['params'][1] == 'set_block_applied_callback':
+                for block in range(BLOCKS):
+                    notice = {'method': 'notice', 'params': [BLOCK_NOTICE, ['block{}'.format(block)]]}
+                    await ws.send_str(json.dumps(notice))
+        return ws
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/', self.handle)
+        runner = web.AppRunner(app)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self.loop.run_forever()
+
+
+def test_block_coalescing():
+    node = StubNode()
+    blocks = []
+
+    def on_block(block):
+        blocks.append(block)
+        time.sleep(0.1)
+        if block == 'block{}'.format(BLOCKS - 1):
+            websocket.close()
+
+    websocket = BitSharesWebsocket(node.url, on_block=on_block)
+    infrastructure = AsyncWorkerInfrastructure({'workers': {}}, bitshares_instance=object())
+    infrastructure.notify = SimpleNamespace(websocket=websocket)
+    infrastructure.loop = asyncio.new_event_loop()
+    infrastructure.loop.run_until_complete(asyncio.wait_for(infrastructure.serve(), 10))
+
+    assert blocks[-1] == 'block{}'.format(BLOCKS - 1)
+    assert len(blocks) < BLOCKS
+
+
+def test_run_coroutine():
+    async def add(a, b):
+        await asyncio.sleep(0)
+        return a + b
+
+    assert run_coroutine(add(1, 2), timeout=5) == 3
+
+
+if __name__ == '__main__':
+    test_block_coalescing()
+    test_run_coroutine()
@@ -0,0 +1,81 @@
+import math
+import random
+import threading
+
+import pytest
+
+from dexbot.backtest import Backtest, parameter_grid, run_backtests
+from dexbot.clock import SimulatedClock
+
+""" This is the unit test for the backtests. A relative orders worker trades against a random walk.
+"""
+
+CONFIG = {'workers': {'backtest-test': {
+    'account': 'trader', 'market': 'USD/BTS', 'module': 'dexbot.strategies.relative_orders',
+    'amount': 5, 'center_price': 20, 'center_price_dynamic': True, 'center_price_depth': 0, 'spread': 1.5,
+    'fee_asset': 'BTS', 'reset_on_partial_fill': True, 'partial_fill_threshold': 30}}}
+
+BALANCES = {'BTS': 2000, 'USD': 100}
+
+
+def random_walk(events=40, start=1546300800):
+    generator = random.Random(1)
+    history = []
+    price = 20.0
+    for number in range(events):
+        time = start + number * 30
+        price *= math.exp(generator.gauss(0, 0.003))
+        if number % 10 == 0:
+            history.append({'time': time, 'type': 'book',
+                            'bids': [[price * (1 - 0.01 * level), 50] for level in range(1, 4)],
+                            'asks': [[price * (1 + 0.01 * level), 50] for level in range(1, 4)]})
+        else:
+            side = generator.choice(['buy', 'sell'])
+            history.append({'time': time, 'type': 'trade', 'side': side, 'amount': 3,
+                            'price': price * (1.012 if side == 'buy' else 0.988)})
+    return history
+
+
+def test_clock():
+    clock = SimulatedClock(100)
+    clock.sleep(5)
+    assert clock.time() == 105
+    assert clock.now().timestamp() == 105
+    with pytest.raises(ValueError):
+        clock.set(50)
+
+
+def test_backtest():
+    history = random_walk()
+    result = Backtest(CONFIG, history, BALANCES, market_fees={'USD': 10}).run()
+    assert not result.disabled
+    assert result.fills > 0
+    assert result.operation_fees > 0
+    # The worker stored its balances at the simulated times
+    timestamps = [entry[0] for entry in result.balance_history]
+    assert timestamps and history[0]['time'] <= min(timestamps) and max(timestamps) <= history[-1]['time']
+
+
+def test_backtests_with_metrics_port():
+    # The port is not served by backtests, which run one after another in the pool processes
+    config = dict(CONFIG, metrics_port=9209)
+    for _ in range(2):
+        Backtest(config, random_walk(events=10), BALANCES).run()
+    assert 'metrics' not in [thread.name for thread in threading.enumerate()]
+
+
+def test_parameter_grid():
+    grid = {'spread': [1, 3], 'amount': [5]}
+    assert parameter_grid(grid) == [{'amount': 5, 'spread': 1}, {'amount': 5, 'spread': 3}]
+
+    results = run_backtests(CONFIG, random_walk(), BALANCES, grid, processes=2)
+    assert [result.params for result in results] == parameter_grid(grid)
+    # The narrow spread is filled more often
+    assert results[0].fills > results[1].fills
+
+
+if __name__ == '__main__':
+    test_clock()
+    test_backtest()
+    test_backtests_with_metrics_port()
+    test_parameter_grid()
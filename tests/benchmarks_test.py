@@ -0,0 +1,25 @@
+from benchmarks.cases import CASES
+from benchmarks.runner import compare, run_cases
+
+""" This is the test of the benchmark suite, the smallest size of a few cases is run once.
+"""
+
+
+def test_run_cases():
+    cases = [case for case in CASES if case.name in ('staggered_maintain_strategy[width=10]',
+                                                     'relative_on_market[workers=1]')]
+    document = run_cases(cases, rounds=1)
+    assert sorted(document['results']) == sorted(case.name for case in cases)
+    for result in document['results'].values():
+        assert 0 < result['min'] <= result['median'] <= result['max']
+
+
+def test_compare():
+    baseline = {'results': {'fast': {'median': 1.0}, 'slow': {'median': 1.0}, 'removed': {'median': 1.0}}}
+    document = {'results': {'fast': {'median': 1.1}, 'slow': {'median': 1.5}, 'new': {'median': 1.0}}}
+    assert compare(document, baseline, tolerance=0.25) == [('slow', 1.0, 1.5)]
+
+
+if __name__ == '__main__':
+    test_run_cases()
+    test_compare()
@@ -0,0 +1,117 @@
+import asyncio
+import collections
+
+import ccxt.async_support as accxt
+from aiohttp import web
+
+from dexbot.strategies.external_feeds.ccxt_pool import ExchangePool
+
+""" This is the unit test for the pooled ccxt clients. The exchange is a local HTTP server which
+    counts the requests, so the test shows how many requests a round of price lookups costs.
+"""
+
+MARKETS = ['BTC/USDT', 'ETH/USDT', 'ETH/BTC']
+TICKERS = {'BTC/USDT': (9990, 10010), 'ETH/USDT': (199, 201), 'ETH/BTC': (0.0199, 0.0201)}
+
+
+class FakeExchange(accxt.Exchange):
+
+    def describe(self):
+        return self.deep_extend(super().describe(), {
+            'id': 'fake',
+            'name': 'Fake',
+            'has': {'fetchTickers': True, 'fetchCurrencies': False},
+        })
+
+    async def load_markets(self, reload=False, params={}):
+        # Like the pinned ccxt version, every concurrent caller loads the markets
+        if reload or not self.markets:
+            self.set_markets(await self.fetch_markets())
+        return self.markets
+
+    async def fetch_markets(self, params={}):
+        markets = await self.fetch(self.urls['api'] + '/markets')
+        return [self.safe_market_structure({
+            'id': symbol.replace('/', ''), 'symbol': symbol, 'base': symbol.split('/')[0],
+            'quote': symbol.split('/')[1], 'active': True, 'type': 'spot', 'spot': True,
+        }) for symbol in markets]
+
+    def parse_fake_ticker(self, symbol, bid_ask):
+        return self.safe_ticker({'symbol': symbol, 'bid': bid_ask[0], 'ask': bid_ask[1], 'baseVolume': 10})
+
+    async def fetch_ticker(self, symbol, params={}):
+        tickers = await self.fetch(self.urls['api'] + '/tickers?symbols=' + symbol)
+        return self.parse_fake_ticker(symbol, tickers[symbol])
+
+    async def fetch_tickers(self, symbols=None, params={}):
+        tickers = await self.fetch(self.urls['api'] + '/tickers?symbols=' + ','.join(symbols))
+        return {symbol: self.parse_fake_ticker(symbol, bid_ask) for symbol, bid_ask in tickers.items()}
+
+
+class FakeExchangeServer:
+
+    def __init__(self):
+        self.requests = collections.Counter()
+        self.runner = None
+        self.url = None
+
+    async def markets(self, request):
+        self.requests['markets'] += 1
+        return web.json_response(MARKETS)
+
+    async def tickers(self, request):
+        self.requests['tickers'] += 1
+        symbols = request.query['symbols'].split(',')
+        return web.json_response({symbol: TICKERS[symbol] for symbol in symbols})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/markets', self.markets)
+        app.router.add_get('/tickers', self.tickers)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = 'http://127.0.0.1:{}'.format(site._server.sockets[0].getsockname()[1])
+
+
+class FakePool(ExchangePool):
+
+    def __init__(self, server):
+        super().__init__()
+        self.server = server
+
+    def create_exchange(self, exchange_id):
+        return FakeExchange({'urls': {'api': self.server.url}})
+
+
+async def lookup_prices():
+    server = FakeExchangeServer()
+    await server.start()
+    pool = FakePool(server)
+    try:
+        symbols = ['BTC/USDT', 'ETH/USDT', 'ETH/BTC', 'BTS/USDT']
+        tickers = await asyncio.gather(*(pool.fetch_ticker('fake', symbol) for symbol in symbols))
+        assert [ticker and ticker['bid'] for ticker in tickers] == [9990, 199, 0.0199, None]
+        # Markets loaded once, the listed symbols fetched in one batch, the unlisted one not requested
+        assert server.requests == {'markets': 1, 'tickers': 1}
+
+        ticker = await pool.fetch_ticker('fake', 'ETH/BTC')
+        assert ticker['ask'] == 0.0201
+        assert server.requests == {'markets': 1, 'tickers': 2}
+
+        # Expired markets are loaded again once for all the callers
+        pool.markets_loaded_at['fake'] = 0
+        await asyncio.gather(*(pool.fetch_ticker('fake', symbol) for symbol in symbols))
+        assert server.requests == {'markets': 2, 'tickers': 3}
+    finally:
+        await pool.close()
+        await server.runner.cleanup()
+
+
+def test_exchange_pool():
+    asyncio.get_event_loop().run_until_complete(lookup_prices())
+
+
+if __name__ == '__main__':
+    test_exchange_pool()
@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+from dexbot.config import Config, parse_config
+
+""" This is the test of the parsed config cache. The file is parsed once until it is written, the callers get copies
+    of what they may modify.
+"""
+
+
+def test_parse_config():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'config.yml')
+        workers = {'worker-{}'.format(number): {'account': 'account-{}'.format(number), 'market': 'USD/BTS'}
+                   for number in range(100)}
+        config = Config({'node': ['wss://localhost/ws'], 'workers': workers}, path=path)
+
+        parsed = parse_config(path)
+        assert parse_config(path) is parsed
+        worker_config = Config.get_worker_config_file('worker-7', path)
+        assert list(worker_config['workers']) == ['worker-7']
+        worker_config['workers']['worker-7']['market'] = 'BTC/BTS'
+        assert parse_config(path)['workers']['worker-7']['market'] == 'USD/BTS'
+        assert len(Config.get_workers_data_file(path)) == 100
+
+        config.remove_worker_config('worker-0')
+        assert parse_config(path) is not parsed
+        assert 'worker-0' not in Config(path=path).workers_data
+
+
+if __name__ == '__main__':
+    test_parse_config()
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import time
+import uuid
+
+from bitshares import BitShares
+from bitshares.instance import set_shared_bitshares_instance
+from bitshares.market import Market
+from bitsharesbase.account import PrivateKey
+
+from dexbot import storage
+from dexbot.fake_node import FakeChain, FakeNode
+from dexbot.worker import WorkerInfrastructure
+
+""" This is the integration test of the fake node. The bitshares library and a relative orders worker
+    trade against an in-memory chain served from a local websocket.
+"""
+
+
+def create_chain(key):
+    chain = FakeChain()
+    chain.create_asset('USD', 4)
+    for name in ['maker', 'taker']:
+        chain.create_account(name, str(key.pubkey), {'BTS': 10 ** 12, 'USD': 10 ** 9})
+    return chain
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('Timed out')
+        time.sleep(0.05)
+
+
+def test_matching():
+    chain = create_chain(PrivateKey())
+    maker = chain.resolve_account('maker')
+    taker = chain.resolve_account('taker')
+    bts = chain.resolve_asset('BTS')
+    usd = chain.resolve_asset('USD')
+
+    def order(account, sell_asset, sell_amount, receive_asset, receive_amount):
+        chain.push_transaction({'operations': [[1, {
+            'fee': {'amount': 0, 'asset_id': bts}, 'seller': account,
+            'amount_to_sell': {'amount': sell_amount, 'asset_id': sell_asset},
+            'min_to_receive': {'amount': receive_amount, 'asset_id': receive_asset},
+            'expiration': '2030-01-01T00:00:00', 'fill_or_kill': False, 'extensions': []}]]})
+
+    # Sell 1 USD for 20 BTS, then sell 11 BTS for at least 0.5 USD: filled at the maker price
+    order(maker, usd, 10000, bts, 2000000)
+    order(taker, bts, 1100000, usd, 5000)
+    assert chain.balances[taker][usd] == 10 ** 9 + 5500
+    assert chain.balances[taker][bts] == 10 ** 12 - 1100000 - 100
+    orders = chain.get_account_orders(maker)
+    assert len(orders) == 1 and orders[0]['for_sale'] == 4500
+    assert not chain.get_account_orders(taker)
+
+
+def test_node():
+    key = PrivateKey()
+    chain = create_chain(key)
+    node = FakeNode(chain)
+    worker = None
+    # The worker keeps its orders in the database, a temporary one leaves the user's database alone
+    directory = tempfile.TemporaryDirectory()
+    old_db_worker = storage.set_db_worker(storage.DatabaseWorker(os.path.join(directory.name, 'test.sqlite')))
+    try:
+        bitshares = BitShares(node=node.url, keys=[str(key)])
+        set_shared_bitshares_instance(bitshares)
+
+        # The worker needs both sides of the book to find the center price
+        market = Market('USD/BTS', blockchain_instance=bitshares)
+        market.buy(19, 1, account='taker')
+        market.sell(21, 1, account='taker')
+
+        worker_name = 'fake-node-test-{}'.format(uuid.uuid4().hex[:8])
+        config = {'node': node.url, 'workers': {worker_name: {
+            'account': 'maker', 'market': 'USD/BTS', 'module': 'dexbot.strategies.relative_orders',
+            'amount': 10, 'center_price': 20, 'center_price_dynamic': False, 'spread': 2, 'fee_asset': 'BTS',
+            'reset_on_partial_fill': False}}}
+        worker = WorkerInfrastructure(config, bitshares_instance=bitshares)
+        worker.daemon = True
+        worker.start()
+
+        maker = chain.resolve_account('maker')
+        wait_for(lambda: len(chain.get_account_orders(maker)) == 2)
+        wait_for(lambda: worker.notify is not None)
+
+        # A taker order is matched against the sell order of the worker, which is notified
+        filled = []
+        worker.workers[worker_name].onMarketUpdate += lambda data: filled.append(type(data).__name__)
+        market.buy(20.5, 5, account='taker')
+        wait_for(lambda: 'FilledOrder' in filled)
+        node.produce_block()
+        usd = chain.resolve_asset('USD')
+        sell_orders = [order for order in chain.get_account_orders(maker)
+                       if order['sell_price']['base']['asset_id'] == usd]
+        assert len(sell_orders) == 1 and 40000 < sell_orders[0]['for_sale'] < 50000
+    finally:
+        if worker is not None and worker.notify is not None:
+            worker.stop(pause=True)
+        node.close()
+        storage.set_db_worker(old_db_worker).close()
+        directory.cleanup()
+
+
+if __name__ == '__main__':
+    test_matching()
+    test_node()
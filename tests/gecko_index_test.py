@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from dexbot.strategies.external_feeds import gecko_feed
+from dexbot.strategies.external_feeds.gecko_feed import CoinIndex
+
+""" This is the unit test for the persistent gecko coin index. The coin list download is simulated
+    and counted, so the test shows how often the list is downloaded.
+"""
+
+COIN_LIST = [
+    {'id': 'bitcoin', 'symbol': 'btc', 'name': 'Bitcoin'},
+    {'id': 'bitshares', 'symbol': 'bts', 'name': 'BitShares'},
+    {'id': 'bitshares-fork', 'symbol': 'bts', 'name': 'BitShares Fork'},
+]
+
+
+def test_coin_index(tmpdir, monkeypatch):
+    downloads = []
+
+    async def get_json(url, session=None):
+        downloads.append(url)
+        await asyncio.sleep(0.05)
+        return COIN_LIST
+
+    monkeypatch.setattr(gecko_feed, 'get_json', get_json)
+    path = str(tmpdir.join('gecko_coins.json'))
+    loop = asyncio.get_event_loop()
+
+    # Concurrent lookups share one download
+    index = CoinIndex(path)
+    ids = loop.run_until_complete(asyncio.gather(index.get_coin_id('BTS'), index.get_coin_id('btc')))
+    assert ids == ['bitshares', 'bitcoin']
+    assert len(downloads) == 1
+
+    # The index is loaded from disk by the next process
+    index = CoinIndex(path)
+    assert loop.run_until_complete(index.get_coin_id('btc')) == 'bitcoin'
+    assert loop.run_until_complete(index.get_coin_id('xyz')) is None
+    assert len(downloads) == 1
+
+    # An expired index answers right away and is refreshed in the background
+    with open(path, 'w') as file:
+        json.dump({'updated_at': 0, 'coins': {'btc': 'old-bitcoin'}}, file)
+    index = CoinIndex(path)
+    assert loop.run_until_complete(index.get_coin_id('btc')) == 'old-bitcoin'
+    loop.run_until_complete(index.refreshing)
+    assert len(downloads) == 2
+    assert loop.run_until_complete(index.get_coin_id('btc')) == 'bitcoin'
+
+
+if __name__ == '__main__':
+    import pytest
+    pytest.main([__file__])
@@ -0,0 +1,34 @@
+import json
+import subprocess
+import sys
+
+""" This is the test of the import of the command line. Short-lived commands like dexbot --help must not pay for
+    the workers, the price feeds, the database or the plugin discovery, the import is checked in a fresh interpreter.
+    The import time itself is measured by the cli_import benchmark case.
+"""
+
+MEASURE = '''
+import json, sys, threading
+import dexbot.cli
+import dexbot.storage
+print(json.dumps({
+    'modules': sorted(name for name in ('ccxt', 'pkg_resources', 'aiohttp', 'dexbot.worker') if name in sys.modules),
+    'db_workers': [thread.name for thread in threading.enumerate()
+                   if isinstance(thread, dexbot.storage.DatabaseWorker)],
+}))
+'''
+
+
+def measure():
+    output = subprocess.check_output([sys.executable, '-c', MEASURE])
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def test_lazy_import():
+    result = measure()
+    assert result['modules'] == []
+    assert result['db_workers'] == []
+
+
+if __name__ == '__main__':
+    test_lazy_import()
@@ -0,0 +1,49 @@
+import tempfile
+import time
+
+import pytest
+
+from dexbot.instrumentation import BUCKETS, Histogram, Instrumentation
+
+""" This is the unit test of the instrumentation. Callbacks of fake workers are timed and profiled.
+"""
+
+
+def test_histogram():
+    histogram = Histogram()
+    for _ in range(99):
+        histogram.observe(0.001)
+    histogram.observe(2)
+    assert histogram.count == 100
+    assert histogram.total == pytest.approx(2.099)
+    assert histogram.percentile(0.5) == min(bucket for bucket in BUCKETS if bucket >= 0.001)
+    assert histogram.percentile(1) == 2
+
+
+def test_callbacks_and_profile():
+    instrumentation = Instrumentation()
+    with instrumentation.callback('fast', 'ontick'):
+        pass
+    for _ in range(2):
+        with instrumentation.callback('slow', 'onMarketUpdate'):
+            time.sleep(0.01)
+            instrumentation.observe_rpc('get_objects', 0.005)
+    snapshot = instrumentation.snapshot()
+    assert snapshot['callbacks']['slow']['onMarketUpdate']['count'] == 2
+    assert snapshot['worker_rpc']['slow']['count'] == 2 and 'fast' not in snapshot['worker_rpc']
+    assert snapshot['rpc']['get_objects']['count'] == 2
+    assert 'slow onMarketUpdate' in instrumentation.format_report()
+
+    # The busiest worker is profiled by default, only during its own callbacks
+    instrumentation.toggle_profile()
+    assert instrumentation.profiled_worker == 'slow'
+    with instrumentation.callback('slow', 'ontick'):
+        sorted(range(1000))
+    path = instrumentation.stop_profile(directory=tempfile.mkdtemp())
+    assert path and path.endswith('.prof')
+    assert instrumentation.profiler is None
+
+
+if __name__ == '__main__':
+    test_histogram()
+    test_callbacks_and_profile()
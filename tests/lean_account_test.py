@@ -0,0 +1,53 @@
+from bitshares.account import AccountUpdate
+
+from benchmarks.cases import relative_worker
+from benchmarks.environment import Environment
+from dexbot.instrumentation import get_instrumentation
+
+""" This is the test of the account shared by the workers. Two relative orders workers of one account run on a fake
+    chain, the account is fetched again only when a change is notified.
+"""
+
+
+def full_account_calls():
+    return get_instrumentation().snapshot()['rpc'].get('get_full_accounts', {}).get('count', 0)
+
+
+def test_shared_account():
+    with Environment() as env:
+        env.place_book(20, 5)
+        configs = {'first': relative_worker(env, 'lean', 5), 'second': relative_worker(env, 'lean', 5)}
+        infrastructure = env.create_workers(configs)
+        first, second = infrastructure.workers['first'], infrastructure.workers['second']
+        account = first.account
+        assert account is second.account
+        assert 'votes' not in account and 'limit_orders' in account
+
+        # Not tracked, every worker fetches
+        calls = full_account_calls()
+        first.refresh_account()
+        second.refresh_account()
+        assert full_account_calls() == calls + 2
+
+        # Tracked, the workers share a fetch until a change is notified
+        account.tracked = True
+        account.invalidate()
+        usd = first.balance('USD')['amount']
+        env.deposit('lean', 'USD', 10 ** 4)
+        calls = full_account_calls()
+        assert second.balance('USD')['amount'] == usd
+        assert full_account_calls() == calls
+
+        statistics = env.node.call(env.chain.account_notice, account['id'])
+        infrastructure.on_account(AccountUpdate(statistics, bitshares_instance=env.bitshares))
+        assert second.balance('USD')['amount'] == usd + 1
+
+        # Methods of Account which need the full account fetch it once
+        assert account.callpositions == {}
+        assert 'votes' in account
+        account.refresh()
+        assert 'votes' not in account
+
+
+if __name__ == '__main__':
+    test_shared_account()
@@ -0,0 +1,51 @@
+import os
+import tempfile
+
+from bitshares.blockchainobject import BlockchainObject
+
+from benchmarks.environment import Environment
+from dexbot.instrumentation import get_instrumentation, instrument_rpc
+from dexbot.metadata_cache import MetadataCache, load_assets, set_metadata_cache
+
+""" This is the test of the metadata cache. Assets of a fake chain are saved to a file and read back by another
+    cache, as by the next process.
+"""
+
+
+def lookups():
+    return get_instrumentation().snapshot()['rpc'].get('lookup_asset_symbols', {}).get('count', 0)
+
+
+def load_with_cache(cache, bitshares_instance, symbols):
+    # The object cache of the bitshares library is empty in a new process
+    BlockchainObject.clear_cache()
+    old_cache = set_metadata_cache(cache)
+    try:
+        return load_assets(bitshares_instance, symbols)
+    finally:
+        set_metadata_cache(old_cache)
+
+
+def test_metadata_cache():
+    with Environment() as env, tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'metadata-cache.json')
+        instrument_rpc(env.bitshares)
+        calls = lookups()
+        assets = load_with_cache(MetadataCache(path), env.bitshares, ['USD', '1.3.0', 'MISSING'])
+        assert assets['USD']['precision'] == 4
+        assert assets['1.3.0']['symbol'] == 'BTS'
+        assert assets['MISSING'] is None
+        assert lookups() == calls + 1
+
+        # The next process reads the file, by symbol or by id
+        usd_id = assets['USD']['id']
+        assets = load_with_cache(MetadataCache(path), env.bitshares, ['USD', usd_id, 'BTS'])
+        assert assets['USD']['id'] == assets[usd_id]['id'] == usd_id
+        assert lookups() == calls + 1
+
+        load_with_cache(MetadataCache(path, expiration=0), env.bitshares, ['USD'])
+        assert lookups() == calls + 2
+
+
+if __name__ == '__main__':
+    test_metadata_cache()
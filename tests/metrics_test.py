@@ -0,0 +1,46 @@
+import time
+import urllib.request
+from types import SimpleNamespace
+
+from dexbot.instrumentation import get_instrumentation
+from dexbot.metrics import MetricsServer
+from dexbot.watchdog import Watchdog
+
+""" This is the test of the metrics endpoint. The page of a stand-in infrastructure is scraped over HTTP.
+"""
+
+
+def test_metrics_server():
+    instrumentation = get_instrumentation()
+    with instrumentation.block():
+        with instrumentation.callback('metrics-test "worker"', 'ontick'):
+            instrumentation.observe_rpc('get_objects', 0.002)
+            instrumentation.observe_rpc('get_objects', 0.002, error=True)
+    infrastructure = SimpleNamespace(workers={
+        'metrics-test "worker"': SimpleNamespace(own_orders_count=3, disabled=False)}, watchdog=Watchdog())
+
+    server = MetricsServer(infrastructure, 0)
+    server.start()
+    try:
+        started = time.time()
+        with urllib.request.urlopen(server.url, timeout=5) as response:
+            assert response.headers['Content-Type'].startswith('text/plain')
+            page = response.read().decode('utf-8')
+        assert time.time() - started < 5
+    finally:
+        server.stop()
+
+    lines = page.splitlines()
+    worker_label = 'worker="metrics-test \\"worker\\""'
+    assert 'dexbot_worker_orders{{{}}} 3.0'.format(worker_label) in lines
+    assert 'dexbot_worker_degraded{{{}}} 0.0'.format(worker_label) in lines
+    assert any(line.startswith('dexbot_callback_duration_seconds_count{{{},callback="ontick"}}'.format(
+        worker_label)) for line in lines)
+    assert any(line.startswith('dexbot_rpc_errors_total{method="get_objects"}') for line in lines)
+    assert any(line.startswith('dexbot_rpc_duration_seconds_bucket{method="get_objects",le="+Inf"}') for line in lines)
+    assert any(line.startswith('dexbot_db_queue_depth ') for line in lines)
+    assert '# TYPE dexbot_block_lag_seconds histogram' in lines
+
+
+if __name__ == '__main__':
+    test_metrics_server()
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import threading
+
+from aiohttp import web
+
+from dexbot.node_manager import NodePool
+
+""" This is the unit test for the node pool. The nodes are local websocket servers answering
+    get_dynamic_global_properties with a configurable delay and head block.
+"""
+
+
+class StubNode:
+
+    def __init__(self, head_block, delay=0):
+        self.head_block = head_block
+        self.delay = delay
+        self.port = None
+        self.loop = asyncio.new_event_loop()
+        self.runner = None
+        started = threading.Event()
+        threading.Thread(target=self._run, args=(started,), daemon=True).start()
+        started.wait(5)
+
+    @property
+    def url(self):
+        return 'ws://127.0.0.1:{}'.format(self.port)
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            payload = json.loads(message.data)
+            await asyncio.sleep(self.delay)
+            result = {'head_block_number': self.head_block, 'time': '2019-01-01T00:00:00'}
+            await ws.send_str(json.dumps({'id': payload['id'], 'jsonrpc': '2.0', 'result': result}))
+        return ws
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/', self.handle)
+        self.runner = web.AppRunner(app)
+        self.loop.run_until_complete(self.runner.setup())
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self.loop.run_forever()
+
+    def close(self):
+        future = asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop)
+        future.result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+
+class FakeRpc:
+
+    def __init__(self, url):
+        self.url = url
+        self.connections = 0
+
+    @property
+    def connection(self):
+        return self
+
+    def connect(self):
+        self.connections += 1
+
+    def disconnect(self):
+        pass
+
+
+def test_ranking():
+    fast = StubNode(100)
+    slow = StubNode(100, delay=0.2)
+    stalled = StubNode(50)
+    try:
+        pool = NodePool([slow.url, stalled.url, fast.url, 'ws://127.0.0.1:1'], timeout=1)
+        ranked = pool.check()
+    finally:
+        for node in (fast, slow, stalled):
+            node.close()
+
+    assert ranked == [fast.url, slow.url, stalled.url, 'ws://127.0.0.1:1']
+    assert pool.best() == fast.url
+    assert pool.stats[stalled.url].lag == 50
+    assert not pool.stats['ws://127.0.0.1:1'].reachable
+
+
+def test_failover():
+    first = StubNode(100)
+    second = StubNode(100, delay=0.05)
+    try:
+        pool = NodePool([first.url, second.url], timeout=1)
+        pool.check()
+        rpc = FakeRpc(first.url)
+        pool.switch_rpc(rpc)
+        assert rpc.url == first.url
+
+        # The active node stops producing blocks
+        second.head_block = 110
+        pool.check()
+        pool.switch_rpc(rpc)
+    finally:
+        first.close()
+        second.close()
+
+    assert rpc.url == second.url
+    assert rpc.connections == 1
+    assert next(rpc.urls) == second.url
+
+
+if __name__ == '__main__':
+    test_ranking()
+    test_failover()
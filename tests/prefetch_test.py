@@ -0,0 +1,52 @@
+from benchmarks.cases import relative_worker
+from benchmarks.environment import Environment
+from bitshares.blockchainobject import BlockchainObject
+
+from dexbot.instrumentation import get_instrumentation, instrument_rpc
+from dexbot.prefetch import prefetch
+
+""" This is the test of the startup prefetch. Relative orders workers of two accounts are initialized on a fake chain,
+    the assets are looked up in a single call.
+"""
+
+
+def rpc_counts():
+    return {method: summary['count'] for method, summary in get_instrumentation().snapshot()['rpc'].items()}
+
+
+def test_prefetch():
+    with Environment() as env:
+        env.place_book(20, 5)
+        configs = {'worker-{}'.format(number): relative_worker(env, 'prefetch-{}'.format(number % 2), 5)
+                   for number in range(4)}
+        before = rpc_counts()
+        infrastructure = env.create_workers(configs)
+        after = rpc_counts()
+
+        assert after['lookup_asset_symbols'] - before.get('lookup_asset_symbols', 0) == 1
+        workers = infrastructure.workers
+        assert workers['worker-0'].account is workers['worker-2'].account
+        # Back to fetching on every refresh once started, nothing notifies the changes here
+        assert not workers['worker-0'].account.tracked
+
+
+def test_pipelined_prefetch():
+    with Environment() as env:
+        env.place_book(20, 5)
+        configs = {'worker-{}'.format(number): relative_worker(env, 'pipelined-{}'.format(number), 5)
+                   for number in range(2)}
+        instrument_rpc(env.bitshares)
+        BlockchainObject.clear_cache()
+        before = rpc_counts()
+        accounts = prefetch(env.bitshares, configs, pipelining=True)
+        after = rpc_counts()
+
+        # The accounts and the assets came in one round trip over the pipeline
+        assert sorted(account['name'] for account in accounts) == ['pipelined-0', 'pipelined-1']
+        for method in ('get_full_accounts', 'lookup_asset_symbols'):
+            assert after.get(method, 0) == before.get(method, 0)
+
+
+if __name__ == '__main__':
+    test_prefetch()
+    test_pipelined_prefetch()
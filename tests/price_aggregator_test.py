@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from dexbot.strategies.external_feeds.price_aggregator import PriceAggregator
+
+""" This is the unit test for combining external prices. The sources are simulated, every leg
+    answers after a delay so the total time shows whether the legs were fetched concurrently.
+"""
+
+DELAY = 0.2
+
+
+class FakeAggregator(PriceAggregator):
+
+    def __init__(self, prices, **kwargs):
+        super().__init__(list(prices), **kwargs)
+        self.prices = prices
+
+    async def fetch_ticker(self, exchange, pair, session):
+        delay, tickers = self.prices[exchange]
+        await asyncio.sleep(delay)
+        return tickers.get('/'.join(pair))
+
+
+def test_legs():
+    assert PriceAggregator.get_legs(['BTC', 'USD']) == [[['BTC', 'USD']], [['BTC', 'USDT']], [['BTC', 'USDC']],
+                                                        [['BTC', 'TUSD']], [['BTC', 'GUSD']]]
+    assert PriceAggregator.get_legs(['STEEM', 'BTS']) == [[['STEEM', 'BTS']], [['STEEM', 'USD'], ['USD', 'BTS']]]
+
+
+def test_combine():
+    aggregator = PriceAggregator([], method='median')
+    # 20 is an outlier
+    assert aggregator.combine([(10, 1), (10.2, 1), (20, 1), (9.9, 1)]) == 10
+    assert aggregator.combine([]) is None
+
+    aggregator = PriceAggregator([], method='vwap')
+    assert aggregator.combine([(10, 3), (10.4, 1), (20, 100)]) == 10.1
+
+
+def test_fetch_price():
+    prices = {
+        'direct': (DELAY, {'STEEM/BTS': (2.0, 100)}),
+        'consolidated': (DELAY, {'STEEM/USD': (0.2, 10), 'USD/BTS': (10.2, 10)}),
+        'slow': (DELAY * 10, {'STEEM/BTS': (2.1, 100)}),
+    }
+    aggregator = FakeAggregator(prices, budget=DELAY * 3)
+
+    start = time.time()
+    price = asyncio.get_event_loop().run_until_complete(aggregator.fetch_price('STEEM/BTS'))
+    elapsed = time.time() - start
+
+    # Slow source is cut off by the budget, the others are combined
+    assert elapsed < DELAY * 5
+    assert round(price, 6) == 2.02
+
+
+if __name__ == '__main__':
+    test_legs()
+    test_combine()
+    test_fetch_price()
@@ -0,0 +1,72 @@
+import asyncio
+import time
+
+from dexbot.strategies.external_feeds.price_aggregator import PriceAggregator
+from dexbot.strategies.external_feeds.price_feed_service import PriceFeedService
+
+""" This is the unit test for the background price refresher. The sources are simulated and count their
+    requests, so the test shows whether reads wait for the network and whether fetches are shared.
+"""
+
+DELAY = 0.2
+
+
+class FakeSource(PriceAggregator):
+
+    def __init__(self, source, prices):
+        super().__init__([source])
+        self.prices = prices
+        self.requests = 0
+
+    async def fetch_quotes(self, symbol):
+        self.requests += 1
+        await asyncio.sleep(DELAY)
+        price = self.prices.get(self.exchanges[0])
+        if price is None:
+            raise IOError('source is down')
+        return [(price, 1)]
+
+
+class FakeService(PriceFeedService):
+
+    def __init__(self, prices, **kwargs):
+        super().__init__(**kwargs)
+        self.prices = prices
+        self.sources = {}
+
+    def create_aggregator(self, source):
+        self.sources[source] = FakeSource(source, self.prices)
+        return self.sources[source]
+
+
+def test_price_feed_service():
+    prices = {'gecko': 2.0, 'waves': 2.02}
+    service = FakeService(prices, interval=DELAY * 2, max_age=DELAY * 8)
+    try:
+        # Two workers of the same pair share the feeds, the first read waits for the first refresh
+        service.subscribe(['gecko', 'waves'], 'STEEM/BTS')
+        service.subscribe(['gecko'], 'STEEM/BTS')
+        assert service.get_price(['gecko', 'waves'], 'STEEM/BTS', timeout=DELAY * 5) == 2.01
+        assert service.sources['gecko'].requests == 1
+
+        # Later reads return the cached price without waiting
+        start = time.time()
+        assert service.get_price(['gecko'], 'STEEM/BTS') == 2.0
+        assert time.time() - start < DELAY / 2
+
+        # A failing source keeps serving its last good price until it is too old
+        prices['waves'] = None
+        time.sleep(DELAY * 3)
+        assert service.sources['gecko'].requests > 1
+        quote = service.get_quote('waves', 'STEEM/BTS')
+        assert quote.price == 2.02 and quote.error == 'source is down'
+        assert service.get_price(['gecko', 'waves'], 'STEEM/BTS') == 2.01
+
+        time.sleep(DELAY * 8)
+        assert service.get_price(['gecko', 'waves'], 'STEEM/BTS') == 2.0
+    finally:
+        service.stop()
+
+
+if __name__ == '__main__':
+    test_price_feed_service()
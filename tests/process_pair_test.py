@@ -1,5 +1,8 @@
+import re
+
+from dexbot.strategies.external_feeds.price_feed import PriceFeed
 from dexbot.strategies.external_feeds.process_pair import split_pair, get_consolidated_pair, filter_prefix_symbol, \
-    filter_bit_symbol
+    filter_bit_symbol, normalize_pair, normalize_symbol, add_symbol_mapping, SYMBOL_MAP
 
 """
 This is the unit test for filters in process_pair module.
@@ -34,6 +37,49 @@ def test_filters():
     print("Apply to result, Filter bit symbol", r2, sep=":")
 
 
+def test_normalize():
+    assert normalize_pair('OPEN.BTC/bitUSD') == ['BTC', 'USD']
+    assert normalize_pair('BRIDGE.BTC:CNY') == ['BTC', 'CNY']
+    assert normalize_pair('bitGOLD/bitUSD') == ['XAU', 'USD']
+
+    add_symbol_mapping('somex', 'USD', 'USDT')
+    try:
+        assert normalize_pair('OPEN.BTC/bitUSD', 'somex') == ['BTC', 'USDT']
+        assert normalize_pair('OPEN.BTC/bitUSD') == ['BTC', 'USD']
+    finally:
+        SYMBOL_MAP.pop('somex')
+
+    # The pair is replaced, not modified in place
+    price_feed = PriceFeed('gecko', 'BTC/USD')
+    pair = price_feed.pair
+    price_feed.set_alt_usd_pair('USDT')
+    assert pair == ['BTC', 'USD']
+    assert price_feed.symbol == 'BTC/USDT'
+
+
+def normalize_uncompiled(symbol):
+    # The filters before the rules were compiled and memoized
+    pair = re.split(':|/', symbol)
+    result = []
+    for asset in pair:
+        if re.match(r'^[a-zA-Z](.*)\.(.*)', asset):
+            asset = re.sub(r'(.*)\.', '', asset)
+        if re.match(r'bit[a-zA-Z]{3}', asset):
+            asset = re.sub('bit', '', asset)
+        result.append(asset)
+    return result
+
+
+def test_normalize_cache():
+    symbols = ['OPEN.BTC/bitUSD', 'BRIDGE.ETH/BTS', 'RUDEX.STEEM:bitCNY', 'BTS/USD']
+    assert [normalize_pair(symbol) for symbol in symbols] == [normalize_uncompiled(symbol) for symbol in symbols]
+
+    # Every asset of the pairs was normalized above, it comes from the cache now
+    hits = normalize_symbol.cache_info().hits
+    assert [normalize_pair(symbol) for symbol in symbols] == [normalize_uncompiled(symbol) for symbol in symbols]
+    assert normalize_symbol.cache_info().hits == hits + 2 * len(symbols)
+
+
 if __name__ == '__main__':
     print("testing consolidate pair")
     test_consolidated_pair()
@@ -41,3 +87,6 @@ if __name__ == '__main__':
     test_split_symbol()
     print("\ntesting filters")
     test_filters()
+    print("\ntesting normalization")
+    test_normalize()
+    test_normalize_cache()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import time
+import uuid
+
+from bitshares import BitShares
+from bitshares.instance import set_shared_bitshares_instance
+from bitshares.market import Market
+from bitsharesbase.account import PrivateKey
+
+from dexbot import storage
+from dexbot.fake_node import FakeChain, FakeNode
+from dexbot.recorder import Recorder, Replay, load_recording
+from dexbot.worker import WorkerInfrastructure
+
+""" This is the test of the record and replay harness. A session of a relative orders worker on the fake node
+    is recorded and replayed without a node.
+"""
+
+
+def wait_for(condition, timeout=10):
+    deadline = time.time() + timeout
+    while not condition():
+        if time.time() > deadline:
+            raise AssertionError('Timed out')
+        time.sleep(0.05)
+
+
+def record_session(path):
+    key = PrivateKey()
+    chain = FakeChain()
+    chain.create_asset('USD', 4)
+    for name in ['maker', 'taker']:
+        chain.create_account(name, str(key.pubkey), {'BTS': 10 ** 12, 'USD': 10 ** 9})
+    node = FakeNode(chain)
+    worker = None
+    # The session is recorded on a temporary database like it is replayed, the user's database is left alone
+    old_db_worker = storage.set_db_worker(storage.DatabaseWorker(os.path.join(os.path.dirname(path), 'record.sqlite')))
+    try:
+        bitshares = BitShares(node=node.url, keys=[str(key)])
+        set_shared_bitshares_instance(bitshares)
+        market = Market('USD/BTS', blockchain_instance=bitshares)
+        market.buy(19, 1, account='taker')
+        market.sell(21, 1, account='taker')
+
+        worker_name = 'recorder-test-{}'.format(uuid.uuid4().hex[:8])
+        config = {'node': node.url, 'workers': {worker_name: {
+            'account': 'maker', 'market': 'USD/BTS', 'module': 'dexbot.strategies.relative_orders',
+            'amount': 10, 'center_price': 20, 'center_price_dynamic': False, 'spread': 2, 'fee_asset': 'BTS',
+            'reset_on_partial_fill': False}}}
+        worker = WorkerInfrastructure(config, bitshares_instance=bitshares)
+        worker.recorder = Recorder(path)
+        worker.daemon = True
+        worker.start()
+
+        maker = chain.resolve_account('maker')
+        wait_for(lambda: len(chain.get_account_orders(maker)) == 2)
+        wait_for(lambda: worker.notify is not None)
+
+        filled = []
+        worker.workers[worker_name].onMarketUpdate += lambda data: filled.append(type(data).__name__)
+        market.buy(20.5, 5, account='taker')
+        wait_for(lambda: 'FilledOrder' in filled)
+        for _ in range(3):
+            node.produce_block()
+        wait_for(lambda: worker.workers[worker_name].counter >= 3)
+        return worker_name
+    finally:
+        if worker is not None and worker.notify is not None:
+            worker.stop(pause=True)
+        if worker is not None and worker.recorder is not None:
+            worker.recorder.close()
+        node.close()
+        storage.set_db_worker(old_db_worker).close()
+
+
+def test_record_and_replay():
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'session.jsonl.gz')
+    worker_name = record_session(path)
+
+    header, records = load_recording(path)
+    assert worker_name in header['config']['workers']
+    notices = [record for record in records if 'notice' in record]
+    assert notices and any(record['rpc'] == 'broadcast_transaction_synchronous'
+                           for record in records if 'rpc' in record)
+
+    replay = Replay(header, records)
+    result = replay.run()
+    assert result.notices == len(notices)
+    assert result.rpc_calls > 0
+    # The worker did the same as during the recording
+    strategy = replay.infrastructure.workers[worker_name]
+    assert strategy.counter >= 3
+    assert not strategy.disabled
+
+
+if __name__ == '__main__':
+    test_record_and_replay()
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import threading
+import time
+
+from aiohttp import web
+
+from dexbot.rpc_pipeline import RpcPipeline
+
+""" This is the unit test for pipelined RPC calls. The stub node answers every request after a delay,
+    newest request first, so the replies must be matched by id and the delays must overlap.
+"""
+
+DELAY = 0.2
+
+
+class StubNode:
+
+    def __init__(self):
+        self.port = None
+        self.loop = asyncio.new_event_loop()
+        started = threading.Event()
+        threading.Thread(target=self._run, args=(started,), daemon=True).start()
+        started.wait(5)
+
+    @property
+    def url(self):
+        return 'ws://127.0.0.1:{}'.format(self.port)
+
+    async def reply(self, ws, payload, delay):
+        await asyncio.sleep(delay)
+        _, method, args = payload['params']
+        if method == 'fail':
+            reply = {'id': payload['id'], 'jsonrpc': '2.0', 'error': {'message': 'failed'}}
+        else:
+            reply = {'id': payload['id'], 'jsonrpc': '2.0', 'result': [method] + args}
+        await ws.send_str(json.dumps(reply))
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        received = 0
+        async for message in ws:
+            received += 1
+            # Later requests are answered sooner
+            asyncio.ensure_future(self.reply(ws, json.loads(message.data), DELAY + 0.1 / received))
+        return ws
+
+    def _run(self, started):
+        asyncio.set_event_loop(self.loop)
+        app = web.Application()
+        app.router.add_get('/', self.handle)
+        runner = web.AppRunner(app)
+        self.loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, '127.0.0.1', 0)
+        self.loop.run_until_complete(site.start())
+        self.port = site._server.sockets[0].getsockname()[1]
+        started.set()
+        self.loop.run_forever()
+
+
+def test_call_many():
+    node = StubNode()
+    pipeline = RpcPipeline(node.url, timeout=5)
+    calls = [('get_objects', [['1.7.{}'.format(i)]]) for i in range(5)]
+
+    start = time.time()
+    results = pipeline.call_many(calls)
+    elapsed = time.time() - start
+    pipeline.close()
+
+    assert results == [['get_objects', ['1.7.{}'.format(i)]] for i in range(5)]
+    # All requests are in flight at once
+    assert elapsed < DELAY * 3
+
+
+def test_error():
+    node = StubNode()
+    pipeline = RpcPipeline(node.url, timeout=5)
+    try:
+        pipeline.call_many([('get_objects', [[]]), ('fail', [])])
+    except Exception as exception:
+        assert str(exception) == 'failed'
+    else:
+        assert False, 'RPC error was not raised'
+    finally:
+        pipeline.close()
+
+
+if __name__ == '__main__':
+    test_call_many()
+    test_error()
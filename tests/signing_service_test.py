@@ -0,0 +1,71 @@
+from bitsharesbase import operations
+from bitsharesbase.account import PrivateKey
+from bitsharesbase.signedtransactions import Signed_Transaction
+
+from dexbot.signing_service import SigningService
+
+""" This is the unit test for signing transactions in the process pool.
+    Signatures made by the pool must be valid for the key of the wallet.
+"""
+
+WIF = '5KQwrPbwdL6PhXujxW37FSSQZ1JiwsST4cqQzDeyXtP79zkvFD3'
+CHAIN = {
+    'chain_id': '4018d7844c78f6a6c41c6a552b898022310fc5dec06da467ee7905a8dad512c8',
+    'core_symbol': 'BTS',
+    'prefix': 'BTS'
+}
+
+
+class FakeWallet:
+
+    def __init__(self, wif):
+        self.keys = {str(PrivateKey(wif).pubkey): wif}
+
+    def getPublicKeys(self):
+        return list(self.keys)
+
+    def getPrivateKeyForPublicKey(self, public_key):
+        return self.keys[public_key]
+
+
+class FakeBitShares:
+
+    def __init__(self):
+        self.wallet = FakeWallet(WIF)
+
+
+def get_transaction():
+    operation = operations.Transfer(**{
+        'fee': {'amount': 100, 'asset_id': '1.3.0'},
+        'from': '1.2.100',
+        'to': '1.2.101',
+        'amount': {'amount': 1000000, 'asset_id': '1.3.0'},
+        'extensions': []
+    })
+    transaction = Signed_Transaction(
+        ref_block_num=34294,
+        ref_block_prefix=3707022213,
+        expiration='2016-04-06T08:29:27',
+        operations=[operations.Operation(operation)]
+    )
+    return transaction
+
+
+def test_pool_signature():
+    service = SigningService(FakeBitShares(), processes=1)
+    service.chain_params = CHAIN
+    try:
+        transaction = get_transaction()
+        signatures = service.sign_async(transaction.json(), {WIF}).get(60)
+    finally:
+        service.close()
+
+    assert len(signatures) == 1
+
+    # Signatures are randomized, verify the signed transaction instead of comparing to a local signature
+    signed = Signed_Transaction(**dict(transaction.json(), signatures=signatures))
+    signed.verify([PrivateKey(WIF).pubkey], chain=CHAIN)
+
+
+if __name__ == '__main__':
+    test_pool_signature()
@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+import tempfile
+
+from dexbot.strategy_registry import BUILTIN_STRATEGIES, StrategyRegistry, site_directories
+
+""" This is the test of the strategy registry. The index file stands for the installed packages, it is reused until
+    a directory of the import path changes.
+"""
+
+
+def test_strategy_registry():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'strategy-index.json')
+        site_packages = os.path.join(directory, 'site-packages')
+        os.mkdir(site_packages)
+        search_paths = [site_packages]
+        strategies = StrategyRegistry(path, search_paths).strategies()
+        assert list(strategies.values())[:len(BUILTIN_STRATEGIES)] == list(BUILTIN_STRATEGIES)
+
+        # The next process reads the index instead of scanning the packages
+        with open(path) as file:
+            document = json.load(file)
+        document['strategies'].append(['Fake strategy', 'fake_strategy'])
+        with open(path, 'w') as file:
+            json.dump(document, file)
+        registry = StrategyRegistry(path, search_paths)
+        assert registry.get('fake_strategy').tag == 'fake'
+        assert registry.find_by_tag('stagger').module == 'dexbot.strategies.staggered_orders'
+        assert 'fake_strategy' not in sys.modules
+
+        # Installing a package changes the directory
+        stat = os.stat(site_packages)
+        os.utime(site_packages, (stat.st_atime, stat.st_mtime + 10))
+        assert StrategyRegistry(path, search_paths).get('fake_strategy') is None
+
+        strategy_class = registry.load('dexbot.strategies.relative_orders')
+        assert registry.load('dexbot.strategies.relative_orders') is strategy_class
+
+
+def test_site_directories():
+    with tempfile.TemporaryDirectory() as directory:
+        sys.path.append(directory)
+        try:
+            # Directories without installed packages, e.g. the current one, change without installing anything
+            assert '' not in site_directories() and directory not in site_directories()
+            os.mkdir(os.path.join(directory, 'fake_strategy-1.0.dist-info'))
+            assert directory in site_directories()
+        finally:
+            sys.path.remove(directory)
+
+
+if __name__ == '__main__':
+    test_strategy_registry()
+    test_site_directories()
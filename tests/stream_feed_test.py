@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from aiohttp import web
+
+from dexbot.strategies.external_feeds.price_aggregator import PriceAggregator
+from dexbot.strategies.external_feeds.stream_feed import BinanceTickerStream, set_ticker_stream
+
+""" This is the unit test for the streaming price feed. A local server replays recorded Binance
+    bookTicker messages to every subscription and then drops the connection.
+"""
+
+RECORDING = [
+    {'u': 1, 's': 'BTCUSDT', 'b': '9990.00', 'B': '1.2', 'a': '10010.00', 'A': '0.5'},
+    {'u': 2, 's': 'ETHUSDT', 'b': '199.00', 'B': '10', 'a': '201.00', 'A': '12'},
+    {'u': 3, 's': 'BTCUSDT', 'b': '10090.00', 'B': '0.3', 'a': '10110.00', 'A': '2.1'},
+]
+
+
+class ReplayServer:
+
+    def __init__(self, recording, delay=0.01):
+        self.recording = recording
+        self.delay = delay
+        self.subscriptions = []
+        self.runner = None
+        self.url = None
+
+    async def handle(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        message = json.loads((await ws.receive()).data)
+        self.subscriptions.append(message['params'])
+        await ws.send_str(json.dumps({'result': None, 'id': message['id']}))
+        for ticker in self.recording:
+            await asyncio.sleep(self.delay)
+            await ws.send_str(json.dumps(ticker))
+        await ws.close()
+        return ws
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get('/ws', self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        self.url = 'ws://127.0.0.1:{}/ws'.format(site._server.sockets[0].getsockname()[1])
+
+
+async def stream_prices():
+    server = ReplayServer(RECORDING)
+    await server.start()
+    stream = BinanceTickerStream(server.url)
+    set_ticker_stream('binance', stream)
+    try:
+        stream.subscribe('BTC/USDT')
+        stream.subscribe('ETH/USDT')
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if len(server.subscriptions) > 1:
+                break
+
+        # The stream reconnected after the server dropped it and subscribed both pairs again
+        assert sorted(server.subscriptions[-1]) == ['btcusdt@bookTicker', 'ethusdt@bookTicker']
+        assert stream.get_quote('BTC/USDT').price == 10100
+        assert stream.get_quote('BTC/USDT', max_age=-1) is None
+
+        # Streamed prices are read without a request
+        aggregator = PriceAggregator(['binance'], streaming=True)
+        assert aggregator.get_streamed_quotes('ETH/USDT') == [(200, None)]
+        assert aggregator.get_streamed_quotes('BTS/USDT') == []
+    finally:
+        stream.stop()
+        set_ticker_stream('binance', None)
+        await server.runner.cleanup()
+
+
+def test_stream():
+    asyncio.get_event_loop().run_until_complete(stream_prices())
+
+
+if __name__ == '__main__':
+    test_stream()
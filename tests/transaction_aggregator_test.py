@@ -0,0 +1,106 @@
+from grapheneapi.exceptions import RPCError
+
+from dexbot.transaction_aggregator import TransactionAggregator
+
+""" This is the unit test for splitting and routing of aggregated operations.
+    Broadcasting is replaced so no node is needed.
+"""
+
+
+class FakeWorker:
+
+    def __init__(self, name):
+        self.name = name
+        self.results = []
+
+    def handle_aggregated_result(self, transaction, exception=None):
+        self.results.append((transaction, exception))
+
+
+class FakeAggregator(TransactionAggregator):
+
+    def __init__(self, failing_operations=(), error=RPCError, **kwargs):
+        super().__init__(None, **kwargs)
+        self.failing_operations = failing_operations
+        self.error = error
+        self.broadcasts = []
+
+    def build_transaction(self, account, fee_asset_id, operations):
+        return account, fee_asset_id, operations
+
+    def broadcast(self, transaction):
+        self.broadcasts.append(transaction)
+        if any(op in self.failing_operations for op in transaction[2]):
+            raise self.error('Broadcast failed')
+        return {'operations': transaction[2]}
+
+
+def test_not_collecting():
+    aggregator = FakeAggregator()
+    assert not aggregator.add(FakeWorker('w1'), 'account', '1.3.0', [{'op': 1}])
+
+
+def test_one_transaction_per_account():
+    aggregator = FakeAggregator()
+    w1, w2, w3 = FakeWorker('w1'), FakeWorker('w2'), FakeWorker('w3')
+
+    aggregator.start()
+    assert aggregator.add(w1, 'account-a', '1.3.0', [{'op': 1}, {'op': 2}])
+    assert aggregator.add(w2, 'account-a', '1.3.0', [{'op': 3}])
+    assert aggregator.add(w3, 'account-b', '1.3.0', [{'op': 4}])
+    aggregator.flush()
+
+    assert len(aggregator.broadcasts) == 2
+    assert aggregator.broadcasts[0] == ('account-a', '1.3.0', [{'op': 1}, {'op': 2}, {'op': 3}])
+    assert w1.results[0][1] is None and w2.results[0][1] is None
+    assert not aggregator.collecting
+
+
+def test_operation_limit():
+    aggregator = FakeAggregator(max_operations=2)
+    workers = [FakeWorker(str(i)) for i in range(3)]
+
+    aggregator.start()
+    for worker in workers:
+        aggregator.add(worker, 'account', '1.3.0', [{'op': worker.name}])
+    aggregator.flush()
+
+    assert [len(ops) for _, _, ops in aggregator.broadcasts] == [2, 1]
+
+
+def test_failure_is_routed_to_origin():
+    bad_operation = {'op': 'bad'}
+    aggregator = FakeAggregator(failing_operations=[bad_operation])
+    good, bad = FakeWorker('good'), FakeWorker('bad')
+
+    aggregator.start()
+    aggregator.add(good, 'account', '1.3.0', [{'op': 'good'}])
+    aggregator.add(bad, 'account', '1.3.0', [bad_operation])
+    aggregator.flush()
+
+    # Combined transaction and then both batches separately
+    assert len(aggregator.broadcasts) == 3
+    assert good.results[0][0] is not None and good.results[0][1] is None
+    assert bad.results[0][0] is None and bad.results[0][1] is not None
+
+
+def test_timeout_is_not_sent_again():
+    aggregator = FakeAggregator(failing_operations=[{'op': 'slow'}], error=TimeoutError)
+    first, second = FakeWorker('first'), FakeWorker('second')
+
+    aggregator.start()
+    aggregator.add(first, 'account', '1.3.0', [{'op': 'slow'}])
+    aggregator.add(second, 'account', '1.3.0', [{'op': 'other'}])
+    aggregator.flush()
+
+    # The transaction may be in a block already
+    assert len(aggregator.broadcasts) == 1
+    assert isinstance(first.results[0][1], TimeoutError) and isinstance(second.results[0][1], TimeoutError)
+
+
+if __name__ == '__main__':
+    test_not_collecting()
+    test_one_transaction_per_account()
+    test_operation_limit()
+    test_failure_is_routed_to_origin()
+    test_timeout_is_not_sent_again()
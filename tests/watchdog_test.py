@@ -0,0 +1,61 @@
+from dexbot.watchdog import Watchdog
+
+""" This is the unit test of the watchdog. A worker with slow callbacks is degraded and recovers.
+"""
+
+
+class FakeLog:
+
+    def __init__(self):
+        self.messages = []
+
+    def warning(self, message):
+        self.messages.append(message)
+
+    info = warning
+
+
+def test_degrade_and_recover():
+    log = FakeLog()
+    watchdog = Watchdog(budget=1, strikes=2, interval=3, recovery_runs=2)
+    watchdog.observe('slow', 2, log)
+    assert not watchdog.is_degraded('slow')
+    # A callback within the budget takes a strike away
+    watchdog.observe('slow', 0.5, log)
+    watchdog.observe('slow', 2, log)
+    assert not watchdog.is_degraded('slow')
+    watchdog.observe('slow', 2, log)
+    assert watchdog.is_degraded('slow')
+    assert 'every 3 blocks' in log.messages[-1]
+
+    # Market and account events wait for the tick, only the latest is kept
+    assert not watchdog.allow('slow', 'onMarketUpdate', 'first')
+    assert not watchdog.allow('slow', 'onMarketUpdate', 'second')
+    assert watchdog.allow('other', 'onMarketUpdate', 'first')
+    ticks = []
+    for _ in range(6):
+        watchdog.block()
+        ticks.append(watchdog.allow('slow', 'ontick', None))
+    assert ticks == [False, False, True, False, False, True]
+    assert watchdog.take_pending('slow') == [('onMarketUpdate', 'second')]
+    assert watchdog.take_pending('slow') == []
+
+    watchdog.observe('slow', 0.5, log)
+    watchdog.observe('slow', 0.5, log)
+    assert not watchdog.is_degraded('slow')
+    assert 'back to running on every event' in log.messages[-1]
+    assert watchdog.allow('slow', 'onMarketUpdate', 'third')
+
+
+def test_disabled():
+    watchdog = Watchdog()
+    for _ in range(10):
+        with watchdog.watch('worker', FakeLog()):
+            pass
+    assert not watchdog.enabled
+    assert not watchdog.worker_strikes
+
+
+if __name__ == '__main__':
+    test_degrade_and_recover()
+    test_disabled()
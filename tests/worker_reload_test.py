@@ -0,0 +1,70 @@
+import copy
+import logging
+
+from benchmarks.cases import relative_worker
+from benchmarks.environment import Environment
+
+""" This is the test of reloading the config of running workers. Only the added, removed and changed workers are
+    touched and the subscriptions are reset once.
+"""
+
+
+class WarningHandler(logging.Handler):
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+class RecordingNotify:
+
+    def __init__(self):
+        self.subscriptions = []
+
+    def reset_subscriptions(self, accounts, markets):
+        self.subscriptions.append((sorted(accounts), sorted(markets)))
+
+
+def test_reload_config():
+    with Environment() as env:
+        env.place_book(20, 5)
+        workers = {'worker-{}'.format(number): relative_worker(env, 'reload-{}'.format(number), 5)
+                   for number in range(3)}
+        infrastructure = env.create_workers(workers)
+        infrastructure.notify = RecordingNotify()
+        kept = infrastructure.workers['worker-0']
+        changed = infrastructure.workers['worker-1']
+
+        config = {'workers': copy.deepcopy(workers)}
+        config['workers']['worker-1']['spread'] = 3
+        del config['workers']['worker-2']
+        config['workers']['worker-3'] = relative_worker(env, 'reload-3', 5)
+        assert infrastructure.reload_config(config) == (['worker-3'], ['worker-2'], ['worker-1'])
+
+        assert sorted(infrastructure.workers) == ['worker-0', 'worker-1', 'worker-3']
+        assert infrastructure.workers['worker-0'] is kept
+        assert infrastructure.workers['worker-1'] is not changed
+        assert infrastructure.workers['worker-1'].worker['spread'] == 3
+        market = workers['worker-0']['market']
+        assert infrastructure.notify.subscriptions == [(['reload-0', 'reload-1', 'reload-3'], [market])]
+
+        # Nothing changed, nothing to do. Settings the services changed themselves are not reported as changes.
+        infrastructure.config['rpc_pipelining'] = False
+        handler = WarningHandler()
+        logging.getLogger('dexbot.worker').addHandler(handler)
+        try:
+            assert infrastructure.reload_config(config) == ([], [], [])
+            config['metrics_port'] = 9100
+            infrastructure.reload_config(config)
+        finally:
+            logging.getLogger('dexbot.worker').removeHandler(handler)
+        assert len(infrastructure.notify.subscriptions) == 1
+        assert handler.messages == ['Changes of metrics_port take effect after a restart']
+        assert 'metrics_port' not in infrastructure.config
+
+
+if __name__ == '__main__':
+    test_reload_config()